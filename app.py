@@ -3,485 +3,428 @@
 # 6NPC + グノーシア1〜2人ランダム + 夜の「消す」処理付き
 # 実行: streamlit run app.py
 
-import random
+import functools
+import uuid
+
 import streamlit as st
 
-# ---------------------------------------
-# 基本設定
-# ---------------------------------------
-PLAYER_NAME = "あなた"
-NPC_NAMES = ["セツ", "ラキオ", "SQ", "ジナ", "ステラ", "しげみち"]
-ROLES = ["人間", "グノーシア"]
-MAX_DISCUSSION_TURNS = 5  # 1日あたり議論ターン数
+import profiling  # 有効なら engine の関数を計測つきに差し替えるので、engine より先に読む
+from engine import (
+    PLAYER_NAME,
+    advance,
+    advance_discussion,
+    apply_player_statement,
+    branch,
+    init_game,
+    player_kill_candidates,
+    resolve_night,
+    rewind_to,
+    settle,
+    timeline_label,
+    vote,
+)
+from profiling import PROFILER
+from session_store import SessionStore
+from solver import get_solver
+
+LOG_PAGE_SIZE = 40   # 当日ログを一度に表示する行数
+LOG_PAST_DAYS = 3    # 折りたたみで並べる過去の日数（それより前は「さらに表示」）
 
-LIKE_DELTA_UP = 1     # 庇われたときの好感度上昇
-LIKE_DELTA_DOWN = -1  # 疑われたときの好感度下降
 
 # ---------------------------------------
-# 好感度ユーティリティ
+# 部分キャッシュ
+# 表示用の文字列・選択肢は GameState.version（状態が変わるたびに新しくなる番号）が同じなら前回のものを使い回す。
+# 選択肢を選ぶ・ログをめくるといったゲームを進めない操作は、st.fragment でその部分だけを再実行する。
 # ---------------------------------------
-def init_like_map(names):
-    """全キャラ間の好感度を0で初期化"""
-    like_map = {}
-    for a in names:
-        like_map[a] = {}
-        for b in names:
-            if a == b:
-                continue
-            like_map[a][b] = 0
-    return like_map
+def cached_view(name, game, build):
+    """game.version が前回と同じなら、前回 build(game) で組み立てたものを返す。
+    残すのは最新の version の分だけ（version が変わったら全部捨てる）なので、長く遊んでも増えない。"""
+    state = st.session_state
+    cache = state.get("view_cache")
+    if cache is None or cache[0] != game.version:
+        cache = state.view_cache = (game.version, {})
+    views = cache[1]
+    if name in views:
+        return views[name]
+    PROFILER.count("views_rebuilt")
+    value = views[name] = build(game)
+    return value
+
+def game_fragment(render):
+    """render(game, ...) を、中の操作ではそこだけ再実行される部分にする。
+    中のボタンでゲームが進んだ（version が変わった）ときは、ほかの部分も古くなるので画面全体を描き直す。"""
+    def fragment(version, *args):
+        game = current_game()
+        if game.version != version:
+            st.rerun()
+        render(game, *args)
+    fragment.__qualname__ = render.__qualname__  # 部分の ID はこの名前と置き場所で決まる
+    fragment = st.fragment(fragment)
 
-def change_like(from_name, to_name, delta):
-    """from_name から to_name への好感度を変化させる"""
-    if "like_map" not in st.session_state:
-        return
-    if from_name not in st.session_state.like_map:
-        return
-    if to_name not in st.session_state.like_map[from_name]:
-        return
-    st.session_state.like_map[from_name][to_name] += delta
+    @functools.wraps(render)
+    def call(game, *args):
+        fragment(game.version, *args)
+    return call
 
-# ---------------------------------------
-# ゲーム状態の初期化
-# ---------------------------------------
-def init_game():
-    """ゲーム開始時に一度だけ呼び出して状態を初期化する。"""
-    all_names = [PLAYER_NAME] + NPC_NAMES
-
-    # グノーシア人数を 1〜2 でランダム決定
-    gn_count = random.choice([1, 2])
-    roles = {name: "人間" for name in all_names}
-    gnosias = random.sample(all_names, gn_count)
-    for g in gnosias:
-        roles[g] = "グノーシア"
-
-    st.session_state.roles = roles
-    st.session_state.alive = {name: True for name in all_names}
-    st.session_state.day = 1
-    st.session_state.phase = "discussion"  # discussion → vote → night → result
-    st.session_state.log = []
-    st.session_state.vote_target = None
-    st.session_state.npc_votes = {}
-    st.session_state.game_over = False
-    st.session_state.win = None
-    st.session_state.player_statement = None
-    st.session_state.discussion_turn = 0
-    st.session_state.like_map = init_like_map(all_names)
-
-    st.session_state.log.append("🌌 **ゲーム開始！** あなたを含む7人の中に、グノーシアが1〜2人います。")
-    st.session_state.log.append("あなたの役職はサイドバーで確認してください。")
-    st.session_state.log.append("議論→投票→夜の襲撃を繰り返し、勝利を目指しましょう！")
-    st.session_state.log.append(f"※1日あたり議論はちょうど{MAX_DISCUSSION_TURNS}ターン行われます。")
 
 # ---------------------------------------
-# NPC発言（好感度反映）
+# ログ表示
 # ---------------------------------------
-def npc_talks():
-    """NPCが順番に発言する（1ターン分）"""
-    alive_names = [name for name, alive in st.session_state.alive.items() if alive]
-    current_npcs = [n for n in NPC_NAMES if st.session_state.alive[n]]
-
-    if len(alive_names) <= 2:
-        return
-
-    turn_no = st.session_state.discussion_turn + 1
-    st.session_state.log.append("")
-    st.session_state.log.append(
-        f"―― NPCたちの発言（{st.session_state.day}日目・{turn_no}/{MAX_DISCUSSION_TURNS}ターン）――"
-    )
+def log_markdown(lines):
+    """ログ行をまとめて1つの markdown にする（空行は段落の区切り）"""
+    return "  \n".join(lines)
+
+def past_day_markdown(game, day):
+    """終わった日のログは変化しないので、日ごとに組み立てた markdown を使い回す。
+    持つのは今のゲーム（シード）の分だけで、新しいゲームを始めたら捨てる。"""
+    state = st.session_state
+    cache = state.get("log_md_cache")
+    if cache is None or cache[0] != game.seed:
+        cache = state.log_md_cache = (game.seed, {})
+    days = cache[1]
+    if day not in days:
+        start = game.day_starts[day - 1]
+        end = game.day_starts[day]
+        days[day] = log_markdown(game.log_lines(start, end))
+    PROFILER.count("log_lines_rendered", game.day_starts[day] - game.day_starts[day - 1])
+    return days[day]
+
+@game_fragment
+def render_log(game):
+    """過去の日は折りたたみ、当日は末尾から一定行数だけ表示する。
+    表示量に上限があるので、試合が長引いても再実行ごとの描画コストはほぼ一定。
+    「もっと見る」はこの部分だけを再実行し、当日の行はゲームが進むまで組み立て直さない。"""
+    state = st.session_state
+    if state.get("log_view_day") != (game.seed, game.day):
+        state.log_view_day = (game.seed, game.day)
+        state.log_lines_shown = LOG_PAGE_SIZE
+        state.log_days_shown = LOG_PAST_DAYS
+
+    # 過去の日
+    past_days = list(range(1, game.day))
+    hidden_days = len(past_days) - state.log_days_shown
+    if hidden_days > 0:
+        if st.button(f"⏪ さらに前の日を表示（残り{hidden_days}日）", key="log_more_days"):
+            state.log_days_shown += LOG_PAST_DAYS
+            hidden_days -= LOG_PAST_DAYS
+    for day in past_days[max(0, hidden_days):]:
+        with st.expander(f"📅 {day}日目のログ"):
+            st.markdown(past_day_markdown(game, day))
+
+    # 当日
+    lines = cached_view("log_today", game, lambda g: g.log_lines(g.day_starts[-1]))
+    hidden_lines = len(lines) - state.log_lines_shown
+    if hidden_lines > 0:
+        if st.button(f"🔼 もっと見る（残り{hidden_lines}行）", key="log_more_lines"):
+            state.log_lines_shown += LOG_PAGE_SIZE
+            hidden_lines -= LOG_PAGE_SIZE
+    shown = lines[max(0, hidden_lines):]
+    PROFILER.count("log_lines_rendered", len(shown))
+    st.markdown(log_markdown(shown))
 
-    for npc in current_npcs:
-        candidates = [n for n in alive_names if n != npc]
-        if not candidates:
-            continue
-
-        likes = st.session_state.like_map[npc]
-        like_values = [likes.get(c, 0) for c in candidates]
-
-        def weight_from_like_for_suspicion(like_vals):
-            # 好感度が低いほど重く
-            weights = []
-            for v in like_vals:
-                w = 1.0 + max(0.0, -0.3 * v)
-                weights.append(max(0.1, w))
-            return weights
-
-        def weight_from_like_for_trust(like_vals):
-            # 好感度が高いほど重く
-            weights = []
-            for v in like_vals:
-                w = 1.0 + 0.3 * v
-                weights.append(max(0.1, w))
-            return weights
-
-        role = st.session_state.roles[npc]
-        if role == "グノーシア":
-            action = random.choices(["疑う", "庇う"], weights=[0.7, 0.3], k=1)[0]
-        else:
-            action = random.choices(["疑う", "庇う"], weights=[0.6, 0.4], k=1)[0]
-
-        if action == "疑う":
-            weights = weight_from_like_for_suspicion(like_values)
-            target = random.choices(candidates, weights=weights, k=1)[0]
-            msg = f"{npc}：{target}が怪しい気がする……。"
-            st.session_state.log.append(msg)
-            change_like(target, npc, LIKE_DELTA_DOWN)
-        else:
-            weights = weight_from_like_for_trust(like_values)
-            target = random.choices(candidates, weights=weights, k=1)[0]
-            msg = f"{npc}：{target}は信用してもよさそうだね。"
-            st.session_state.log.append(msg)
-            change_like(target, npc, LIKE_DELTA_UP)
 
 # ---------------------------------------
-# プレイヤー発言 → 好感度反映
+# Streamlit UI
 # ---------------------------------------
-def apply_player_statement(statement: str):
-    """プレイヤーの『〜を疑う／〜を庇う』に応じて、対象NPC→プレイヤーの好感度を更新"""
-    if not statement or statement == "（まだ発言しない）":
-        return
-    s = statement.replace("**", "")
-    if "を疑う" in s:
-        name = s.split("を疑う")[0]
-        action = "疑う"
-    elif "を庇う" in s:
-        name = s.split("を庇う")[0]
-        action = "庇う"
-    else:
-        return
-
-    target = name
-    if target not in st.session_state.alive:
-        return
-
-    if action == "疑う":
-        change_like(target, PLAYER_NAME, LIKE_DELTA_DOWN)
-    elif action == "庇う":
-        change_like(target, PLAYER_NAME, LIKE_DELTA_UP)
+def stance_label(stance):
+    """立場表明の選択肢 (対象, 行動) を表示用の文字列にする"""
+    if stance is None:
+        return "（まだ発言しない）"
+    name, action = stance
+    return f"{name}を**{action}**"
+
+@st.cache_resource
+def session_store():
+    """プロセス全体で共有するゲーム置き場（放置されたゲームはディスクへ退避される）"""
+    return SessionStore()
+
+def session_id():
+    """このブラウザセッションのID。st.session_state にはIDだけを置く。"""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def new_game():
+    """新しいゲームをセッションに置く（前のゲームの分岐は捨てる）"""
+    game = init_game()
+    store = session_store()
+    store.put(session_id(), game)
+    for branch_id in st.session_state.pop("branch_ids", []):
+        store.delete(branch_id)
+    return game
+
+def current_game():
+    """このセッションのゲーム（無ければ新しく始める）"""
+    game = session_store().get(session_id())
+    if game is None:
+        game = new_game()
+    return game
 
 # ---------------------------------------
-# 投票ロジック（好感度反映）
+# ボタンの処理
+# ボタンは on_click で状態を進めるので、描画前に処理が終わり、1回の再実行で結果が出る。
+# 入力の要らない遷移（投票への移行・NPCだけの夜）は settle で同じ処理の中で済ませる。
 # ---------------------------------------
-def npc_votes():
-    """NPCの投票先を決定（好感度低い相手狙い＋プレイヤー少し狙われやすい）"""
-    alive_names = [name for name, alive in st.session_state.alive.items() if alive]
-    current_npcs = [n for n in NPC_NAMES if st.session_state.alive[n]]
-
-    votes = {}
-    if len(alive_names) <= 1:
-        return votes
-
-    for npc in current_npcs:
-        candidates = [n for n in alive_names if n != npc]
-        if not candidates:
-            continue
-
-        likes = st.session_state.like_map[npc]
-        like_values = [likes.get(c, 0) for c in candidates]
-
-        weights = []
-        for c, v in zip(candidates, like_values):
-            base = 1.0 + max(0.0, -0.3 * v)  # 好感度が低いほど重く
-            if c == PLAYER_NAME:
-                base += 0.3
-            weights.append(max(0.1, base))
-
-        target = random.choices(candidates, weights=weights, k=1)[0]
-        votes[npc] = target
-
-    st.session_state.npc_votes = votes
-    return votes
-
-def apply_vote():
-    """昼の投票結果を適用（追放）"""
-    alive_names = [name for name, alive in st.session_state.alive.items() if alive]
-    votes = {}
-    votes.update(st.session_state.npc_votes)
-
-    if st.session_state.vote_target is not None:
-        votes[PLAYER_NAME] = st.session_state.vote_target
+def on_advance_turn():
+    game = current_game()
+    advance_discussion(game)
+    settle(game)
+
+def on_statement():
+    stance = st.session_state.get("stance_select")
+    if stance is not None:
+        apply_player_statement(current_game(), *stance)
+
+def on_vote():
+    game = current_game()
+    vote(game, st.session_state.get("vote_choice"))
+    settle(game)
+
+def on_kill():
+    game = current_game()
+    resolve_night(game, st.session_state.get("kill_choice"))
+    settle(game)
+
+def on_skip(until):
+    """until まで一気に進める（"vote" / "day" / "end"）。投票先は選択中のもの（無ければランダム）。"""
+    game = current_game()
+    vote_target = st.session_state.get("vote_choice") if game.phase == "vote" else None
+    advance(game, until, vote_target=vote_target)
+    settle(game)
+
+def on_rewind():
+    """選んだフェーズの始まりに戻る（ログの日ごとの表示キャッシュは別の流れのものになるので捨てる）"""
+    index = st.session_state.get("rewind_choice")
+    if index is None:
+        return
+    session_store().put(session_id(), rewind_to(current_game(), index))
+    st.session_state.pop("log_md_cache", None)
+
+def on_save_branch():
+    """今の流れを分岐として残す（以後どちらを進めても、もう一方は変わらない）"""
+    branch_id = f"{session_id()}:{uuid.uuid4().hex[:8]}"
+    session_store().put(branch_id, branch(current_game()))
+    st.session_state.setdefault("branch_ids", []).append(branch_id)
+
+def on_switch_branch(branch_id):
+    """残しておいた分岐と今の流れを入れ替える"""
+    store = session_store()
+    saved = store.get(branch_id)
+    if saved is None:
+        st.session_state.branch_ids.remove(branch_id)
+        return
+    store.put(branch_id, current_game())
+    store.put(session_id(), saved)
+    st.session_state.pop("log_md_cache", None)
+
+@game_fragment
+def render_loop_panel(game):
+    """サイドバーのループ（巻き戻し・分岐）。戻る時点を選ぶだけならこの部分だけを再実行する"""
+    with st.expander("⏪ ループ"):
+        st.selectbox(
+            "戻る時点：", options=list(range(len(game.timeline))), key="rewind_choice",
+            index=len(game.timeline) - 1, format_func=lambda i: timeline_label(game.timeline[i]),
+        )
+        st.button("この時点からやり直す", on_click=on_rewind, use_container_width=True)
+        st.button("🌿 今の流れを分岐として残す", on_click=on_save_branch, use_container_width=True)
+        store = session_store()
+        for i, branch_id in enumerate(st.session_state.get("branch_ids", []), 1):
+            saved = store.get(branch_id)
+            if saved is None:
+                continue
+            label = "決着済み" if saved.game_over else timeline_label(saved)
+            st.button(
+                f"分岐{i}（{label}）に切り替える", key=f"branch_{branch_id}",
+                on_click=on_switch_branch, args=(branch_id,), use_container_width=True,
+            )
+
+def render_profiler_panel():
+    """計測が有効なときだけ出す、サイドバーの性能パネル"""
+    snapshot = PROFILER.snapshot()
+    with st.expander("⏱ 性能計測（デバッグ）"):
+        rows = [
+            {
+                "処理": name,
+                "回数": t["count"],
+                "p50 (ms)": round(t["p50"] * 1000, 3),
+                "p90 (ms)": round(t["p90"] * 1000, 3),
+                "p99 (ms)": round(t["p99"] * 1000, 3),
+            }
+            for name, t in sorted(snapshot["timers"].items())
+        ]
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        for name, n in sorted(snapshot["counters"].items()):
+            st.markdown(f"**{name}**: {n}")
+        st.download_button("JSON で保存", PROFILER.to_json(), file_name="metrics.json")
+        st.download_button("Prometheus 形式で保存", PROFILER.to_prometheus(), file_name="metrics.prom")
+        st.button("計測値をリセット", on_click=PROFILER.reset)
+
+def solve_odds(game):
+    with PROFILER.timed("odds"):
+        return get_solver(game.rules).solve(game)
+
+def render_odds_panel(game):
+    """サイドバーの勝率の読み（本当の配役を使うので折りたたんでおく）。局面が変わったときだけ読み直す"""
+    odds = cached_view("odds", game, solve_odds)
+    with st.expander("🎲 勝率の読み（ネタバレ注意）"):
+        cols = st.columns(2)
+        cols[0].metric("人間陣営", f"{odds.human:.1%}")
+        cols[1].metric("グノーシア陣営", f"{odds.gnosia:.1%}")
+        if odds.exact:
+            note = "決着まで読み切り"
+        elif odds.depth:
+            note = f"{odds.depth}手先まで展開＋好感度固定"
+        else:
+            note = odds.model
+        st.caption(f"{note}（{odds.elapsed * 1000:.0f} ms）")
+
+def status_markdown(game):
+    lines = [
+        f"**日数**: 第 {game.day} 日",
+        f"**フェーズ**: {game.phase}",
+        f"**議論ターン**: {game.discussion_turn}/{game.rules.max_discussion_turns}",
+        "",
+        "**生存者**:",
+    ]
+    for name in game.alive_names():
+        if name == PLAYER_NAME:
+            lines.append(f"• **{name}**（{game.roles[name]}）")
+        else:
+            lines.append(f"• {name}")
+    return "  \n".join(lines)
+
+def stance_options(game):
+    """立場表明の選択肢（まだ発言しない・生存者ごとに疑う／庇う）"""
+    options = [None]
+    for name in vote_candidates(game):
+        options.append((name, "疑う"))
+        options.append((name, "庇う"))
+    return options
+
+def vote_candidates(game):
+    return [n for n in game.alive_names() if n != PLAYER_NAME]
+
+def roles_markdown(game):
+    lines = []
+    for name, role in game.roles.items():
+        alive_status = "☠️排除/消滅" if not game.alive[name] else "✅生存"
+        lines.append(f"- {name}：{role} ({alive_status})")
+    return "\n".join(lines)
+
+@game_fragment
+def render_stance(game):
+    """プレイヤーの立場表明（選ぶだけならこの部分だけを再実行する）"""
+    st.markdown("### あなたの立場表明")
+    st.selectbox(
+        "立場を表明：", options=cached_view("stance_options", game, stance_options),
+        key="stance_select", format_func=stance_label,
+    )
+    st.button("発言する", on_click=on_statement, use_container_width=True)
+
+@game_fragment
+def render_vote(game):
+    candidates = cached_view("vote_candidates", game, vote_candidates)
+    st.write("怪しいと思う人物に投票してください。")
+    if not candidates:
+        st.write("投票先候補がいません。")
     else:
-        candidates = [n for n in alive_names if n != PLAYER_NAME]
-        if candidates:
-            votes[PLAYER_NAME] = random.choice(candidates)
-
-    counter = {}
-    for v in votes.values():
-        counter[v] = counter.get(v, 0) + 1
-
-    st.session_state.log.append("―― 投票結果 ――")
-    for voter, target in votes.items():
-        st.session_state.log.append(f"{voter} → {target}")
-
-    max_votes = max(counter.values())
-    top_candidates = [name for name, cnt in counter.items() if cnt == max_votes]
-    eliminated = random.choice(top_candidates)
+        st.radio("投票先：", options=candidates, key="vote_choice")
+        st.button("投票する", on_click=on_vote, use_container_width=True)
+        render_skip_buttons(game)
 
-    st.session_state.alive[eliminated] = False
-    role = st.session_state.roles[eliminated]
-    st.session_state.log.append(f"【{eliminated}】が追放されました。（正体：{role}）")
+@game_fragment
+def render_kill(game):
+    st.write("あなたはグノーシアです。今夜『消す』人間を1人選んでください。")
+    st.radio("『消す』相手：", options=cached_view("kill_candidates", game, player_kill_candidates), key="kill_choice")
+    st.button("この相手を『消す』", on_click=on_kill, use_container_width=True)
 
-    # 追放後に即勝敗がつくかチェック（グノーシア全滅 or 人間≦グノ）
-    if check_win_condition():
-        return
-    # まだ続く場合は夜フェーズへ
-    st.session_state.phase = "night"
-    st.session_state.log.append("")
-    st.session_state.log.append("―― 夜がやってきた……グノーシアが誰かを『消す』 ――")
-
-# ---------------------------------------
-# 夜フェーズ：グノーシアによる襲撃
-# ---------------------------------------
-def gn_kill_target_for_npc():
-    """NPCグノーシアたちが協議したことにして、人間1人を好感度をもとに選んで『消す』"""
-    alive_names = [n for n, a in st.session_state.alive.items() if a]
-    # 生存しているグノーシア
-    gn_list = [n for n in alive_names if st.session_state.roles[n] == "グノーシア"]
-    # 生存している人間
-    human_list = [n for n in alive_names if st.session_state.roles[n] == "人間"]
-
-    if not gn_list or not human_list:
-        return None
-
-    # 各グノーシアの「好感度の低い人間」を重ね合わせるイメージで重みをつける
-    weight_map = {h: 0.0 for h in human_list}
-    for gn in gn_list:
-        likes = st.session_state.like_map[gn]
-        for h in human_list:
-            v = likes.get(h, 0)
-            # 好感度が低いほど加点（狙われやすい）
-            weight_map[h] += max(0.1, 1.0 + -0.3 * v)
-
-    targets = list(weight_map.keys())
-    weights = list(weight_map.values())
-    if not targets or sum(weights) == 0:
-        return random.choice(human_list)
-
-    target = random.choices(targets, weights=weights, k=1)[0]
-    return target
-
-def apply_night_kill(target):
-    """夜に対象を『消す』処理"""
-    if target is None:
-        return
-    if not st.session_state.alive.get(target, False):
-        return
-    st.session_state.alive[target] = False
-    role = st.session_state.roles[target]
-    st.session_state.log.append(f"【{target}】が夜の間に『消されて』しまった……。（正体：{role}）")
-    check_win_condition()
+def render_skip_buttons(game):
+    """議論・投票をまとめて飛ばすボタン"""
+    cols = st.columns(3)
+    if game.phase == "discussion":
+        cols[0].button("⏩ 投票まで進める", on_click=on_skip, args=("vote",), use_container_width=True)
+    cols[1].button("⏭️ 次の日まで進める", on_click=on_skip, args=("day",), use_container_width=True)
+    cols[2].button("🤖 決着までおまかせ", on_click=on_skip, args=("end",), use_container_width=True)
 
-# ---------------------------------------
-# 勝敗判定
-# ---------------------------------------
-def check_win_condition():
-    """勝敗判定。決着したら True を返す。"""
-    alive_roles = [
-        st.session_state.roles[name]
-        for name, alive in st.session_state.alive.items()
-        if alive
-    ]
-    human_count = alive_roles.count("人間")
-    gn_count = alive_roles.count("グノーシア")
-
-    your_role = st.session_state.roles[PLAYER_NAME]
-
-    # グノーシア全滅 → 人間陣営勝ち
-    if gn_count == 0:
-        st.session_state.game_over = True
-        st.session_state.win = (your_role == "人間")
-        st.session_state.phase = "result"
-        st.session_state.log.append("グノーシアはすべて排除されました！")
-        return True
-
-    # 人間数 <= グノーシア数 → グノーシア陣営勝ち
-    if human_count <= gn_count:
-        st.session_state.game_over = True
-        st.session_state.win = (your_role == "グノーシア")
-        st.session_state.phase = "result"
-        st.session_state.log.append("人間よりグノーシアの数が多くなってしまった……。")
-        return True
-
-    # 続行
-    st.session_state.game_over = False
-    st.session_state.win = None
-    return False
 
 # ---------------------------------------
-# Streamlit UI
+# 画面
 # ---------------------------------------
 def main():
+    with PROFILER.timed("rerun"):
+        render_page()
+    if PROFILER.enabled:
+        PROFILER.export(profiling.METRICS_DIR)
+
+def render_page():
     st.set_page_config(page_title="グノーシア風ミニゲーム", page_icon="🛰")
     st.title("🛰 一人用・グノーシア風ミニゲーム（6NPC＋夜フェーズ）")
 
-    if "roles" not in st.session_state:
-        init_game()
+    game = settle(current_game())
 
     # サイドバー
     with st.sidebar:
         st.header("📊 ゲーム情報")
-        st.markdown(f"**日数**: 第 {st.session_state.day} 日")
-        st.markdown(f"**フェーズ**: {st.session_state.phase}")
-        st.markdown(f"**議論ターン**: {st.session_state.discussion_turn}/{MAX_DISCUSSION_TURNS}")
-
-        alive_list = [name for name, alive in st.session_state.alive.items() if alive]
-        st.markdown("**生存者**:")
-        for name in alive_list:
-            if name == PLAYER_NAME:
-                st.markdown(f"• **{name}**（{st.session_state.roles[name]}）")
-            else:
-                st.markdown(f"• {name}")
+        st.markdown(cached_view("status", game, status_markdown))
+
+        render_odds_panel(game)
+        render_loop_panel(game)
 
         st.markdown("---")
-        if st.button("🔄 新ゲーム開始"):
-            init_game()
-            st.rerun()
+        st.button("🔄 新ゲーム開始", on_click=new_game)
+        if PROFILER.enabled:
+            render_profiler_panel()
 
     # メインログ
     st.subheader("📜 ログ")
-    for line in st.session_state.log:
-        st.write(line)
+    with PROFILER.timed("render_log"):
+        render_log(game)
     st.markdown("---")
 
     # ゲーム中
-    if not st.session_state.game_over:
+    if not game.game_over:
         # ---------------- discussion ----------------
-        if st.session_state.phase == "discussion":
+        if game.phase == "discussion":
             st.subheader("💬 議論フェーズ")
 
-            remaining_turns = MAX_DISCUSSION_TURNS - st.session_state.discussion_turn
-            st.info(f"この日に残された議論ターン：{remaining_turns} / {MAX_DISCUSSION_TURNS}")
-
-            if st.session_state.discussion_turn < MAX_DISCUSSION_TURNS:
-                if st.button("▶️ 1ターン進める（NPC発言 → あなたの発言）", use_container_width=True):
-                    npc_talks()
-                    st.session_state.discussion_turn += 1
-                    st.rerun()
-            else:
-                st.warning("⏰ 規定の5ターンの議論が終了しました。自動で投票フェーズに移行します。")
-                st.session_state.phase = "vote"
-                st.session_state.log.append("―― 議論終了。投票タイムへ移行 ――")
-                st.rerun()
+            max_turns = game.rules.max_discussion_turns
+            remaining_turns = max_turns - game.discussion_turn
+            st.info(f"この日に残された議論ターン：{remaining_turns} / {max_turns}")
+            st.button(
+                "▶️ 1ターン進める（NPC発言 → あなたの発言）",
+                on_click=on_advance_turn, use_container_width=True,
+            )
+            render_skip_buttons(game)
 
             # プレイヤーの発言
-            st.markdown("### あなたの立場表明")
-            alive_names = [name for name, alive in st.session_state.alive.items() if alive]
-            candidates = [n for n in alive_names if n != PLAYER_NAME]
-
-            stance_options = ["（まだ発言しない）"]
-            for name in candidates:
-                stance_options.append(f"{name}を**疑う**")
-                stance_options.append(f"{name}を**庇う**")
-
-            stance = st.selectbox("立場を表明：", options=stance_options, key="stance_select")
-
-            if st.button("発言する", use_container_width=True):
-                if stance != "（まだ発言しない）":
-                    st.session_state.log.append(f"{PLAYER_NAME}：{stance}")
-                    st.session_state.player_statement = stance
-                    apply_player_statement(stance)
-                    st.rerun()
+            render_stance(game)
 
         # ---------------- vote ----------------
-        elif st.session_state.phase == "vote":
+        elif game.phase == "vote":
             st.subheader("🗳️ 投票フェーズ")
-            alive_names = [name for name, alive in st.session_state.alive.items() if alive]
-            candidates = [n for n in alive_names if n != PLAYER_NAME]
-
-            st.write("怪しいと思う人物に投票してください。")
-            if not candidates:
-                st.write("投票先候補がいません。")
-            else:
-                vote_choice = st.radio("投票先：", options=candidates)
-                if st.button("投票する", use_container_width=True):
-                    st.session_state.vote_target = vote_choice
-                    npc_votes()
-                    apply_vote()
-                    st.rerun()
+            render_vote(game)
 
         # ---------------- night ----------------
-        elif st.session_state.phase == "night":
+        elif game.phase == "night":
+            # settle 済みなので、ここに来るのはプレイヤー（グノーシア）が相手を選ぶときだけ
             st.subheader("🌙 夜フェーズ（グノーシアの行動）")
-
-            alive_names = [name for name, alive in st.session_state.alive.items() if alive]
-            gn_list = [n for n in alive_names if st.session_state.roles[n] == "グノーシア"]
-            human_list = [n for n in alive_names if st.session_state.roles[n] == "人間"]
-
-            # すでに勝敗が決まっている場合は何もしない
-            if st.session_state.game_over:
-                st.stop()
-
-            your_role = st.session_state.roles[PLAYER_NAME]
-
-            # グノーシアがいない or 人間がいない → 夜に誰も消えない（ほぼ該当しないが安全策）
-            if not gn_list or not human_list:
-                st.session_state.log.append("この夜には誰も『消されなかった』ようだ……。")
-                # 次の日の朝へ（勝敗チェック含む）
-                if not check_win_condition():
-                    st.session_state.phase = "discussion"
-                    st.session_state.discussion_turn = 0
-                    st.session_state.day += 1
-                    st.session_state.log.append("")
-                    st.session_state.log.append(f"―― 第{st.session_state.day}日 朝 ――")
-                st.rerun()
-
-            # プレイヤーがグノーシア → プレイヤーが消す相手を選ぶ
-            if your_role == "グノーシア" and st.session_state.alive[PLAYER_NAME]:
-                st.write("あなたはグノーシアです。今夜『消す』人間を1人選んでください。")
-                kill_candidates = [h for h in human_list if h != PLAYER_NAME]
-                # 念のため、自分は含めない（自殺防止）
-                if not kill_candidates:
-                    st.write("『消す』対象となる人間がいません。")
-                    # 次の日へ
-                    if not check_win_condition():
-                        st.session_state.phase = "discussion"
-                        st.session_state.discussion_turn = 0
-                        st.session_state.day += 1
-                        st.session_state.log.append("")
-                        st.session_state.log.append(f"―― 第{st.session_state.day}日 朝 ――")
-                    st.rerun()
-                else:
-                    target = st.radio("『消す』相手：", options=kill_candidates)
-                    if st.button("この相手を『消す』", use_container_width=True):
-                        apply_night_kill(target)
-                        if not st.session_state.game_over:
-                            st.session_state.phase = "discussion"
-                            st.session_state.discussion_turn = 0
-                            st.session_state.day += 1
-                            st.session_state.log.append("")
-                            st.session_state.log.append(f"―― 第{st.session_state.day}日 朝 ――")
-                        st.rerun()
-            else:
-                # プレイヤーが人間 → グノーシア(NPC)が好感度を見て誰かを消す
-                st.write("グノーシアたちが暗躍している……。")
-                target = gn_kill_target_for_npc()
-                apply_night_kill(target)
-                if not st.session_state.game_over:
-                    st.session_state.phase = "discussion"
-                    st.session_state.discussion_turn = 0
-                    st.session_state.day += 1
-                    st.session_state.log.append("")
-                    st.session_state.log.append(f"―― 第{st.session_state.day}日 朝 ――")
-                st.rerun()
+            render_kill(game)
 
     # ゲーム終了
-    if st.session_state.game_over and st.session_state.phase == "result":
+    if game.game_over and game.phase == "result":
         st.subheader("🏁 ゲーム結果")
-        your_role = st.session_state.roles[PLAYER_NAME]
+        your_role = game.roles[PLAYER_NAME]
         st.markdown(f"### あなたの役職：**{your_role}**")
-        if st.session_state.win:
+        if game.win:
             st.success("🎉 **あなたの陣営の勝利！**")
         else:
             st.error("💥 **あなたの陣営の敗北…**")
 
         with st.expander("👥 全員の役職と結果"):
-            for name, role in st.session_state.roles.items():
-                alive_status = "☠️排除/消滅" if not st.session_state.alive[name] else "✅生存"
-                st.write(f"- {name}：{role} ({alive_status})")
+            st.markdown(cached_view("roles", game, roles_markdown))
 
-        if st.button("🔄 もう一度遊ぶ", use_container_width=True):
-            init_game()
-            st.rerun()
+        st.button("🔄 もう一度遊ぶ", on_click=new_game, use_container_width=True)
 
 if __name__ == "__main__":
     main()
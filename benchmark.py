@@ -0,0 +1,257 @@
+# benchmark.py
+# フェーズ関数と1試合まるごとの処理速度を測るベンチマーク
+# 実行: python benchmark.py              （bench_baseline.json と比較して遅くなった項目を報告）
+#       python benchmark.py --save-baseline （今回の結果を基準として保存）
+#
+# ルール関数は engine.GameState を読み書きするので、st.session_state の代わりに
+# GameState をメモリ上に用意して直接呼び出す。
+#
+# 揺らぎ対策: 各項目を ROUNDS 回測って中央値を採り、毎回その直前に素の Python の処理（reference_op）も測って
+# 「マシンの速さに対する比」で基準と比べる。遅くなったように見えた項目は CONFIRM_ROUNDS 回測り直してから報告する。
+# 計測対象のコード（engine.py のフェーズ関数）を変えたコミットでは、--save-baseline で基準も作り直して一緒に入れる。
+
+import argparse
+import copy
+import gc
+import json
+import os
+import pickle
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from engine import (
+    Rules,
+    advance_discussion,
+    apply_vote,
+    check_win_condition,
+    end_discussion,
+    gn_kill_target_for_npc,
+    init_game,
+    make_roster,
+    npc_talks,
+    npc_votes,
+    play_until_over,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+SEED = 20240601
+LOBBY_SIZES = [6, 50, 200]        # NPC人数
+FULL_GAME_SIZES = [6, 50]         # 1試合まるごと測るときのNPC人数
+DISCUSSION_TURNS = [0, 5, 20]     # 計測前に進めておく議論ターン数（好感度の偏り具合）
+DEFAULT_TOLERANCE = 0.25          # 基準からこれ以上遅くなったら回帰とみなす
+DEFAULT_MIN_TIME = 0.2            # 1回の計測で回す時間（秒）
+ROUNDS = 5                        # 計測を何回くり返して中央値を採るか（揺らぎ対策。外れ値に引きずられない）
+CONFIRM_ROUNDS = 15               # 遅くなったように見えた項目だけ、この回数で測り直してから報告する
+FRESH_BATCH = 20                  # まっさらな状態が要る項目で、まとめて計る回数
+FRESH_MAX_WALL = 10               # その項目の1回の計測にかける時間の上限（min_time の何倍か）
+REFERENCE_TIME = 0.1              # 各計測の直前に測る、マシンの速さの目安（reference_op）の計測時間
+BELIEF_RULES = Rules(belief_weight=3.0)  # 役職推理つきのNPC（1ターン数ミリ秒に収まっているかを見る）
+
+
+# ---------------------------------------
+# 計測対象の準備
+# ---------------------------------------
+def prepared_game(n_npcs, turns, rules=None):
+    """議論を turns ターン進めた、まだ誰も脱落していない試合を作る"""
+    game = init_game(seed=SEED, npc_names=make_roster(n_npcs), record_log=False, rules=rules)
+    for _ in range(turns):
+        advance_discussion(game)
+    return game
+
+def vote_ready_game(n_npcs, turns):
+    game = prepared_game(n_npcs, turns)
+    end_discussion(game)
+    npc_votes(game)
+    return game
+
+def cases():
+    """(名前, 準備関数, 計測関数, 毎回まっさらな状態が要るか) を列挙する"""
+    for n in LOBBY_SIZES:
+        for turns in DISCUSSION_TURNS:
+            tag = f"npcs={n},turns={turns}"
+            yield (f"npc_talks[{tag}]", lambda n=n, t=turns: prepared_game(n, t), npc_talks, True)
+            yield (f"npc_votes[{tag}]", lambda n=n, t=turns: prepared_game(n, t), npc_votes, False)
+            yield (f"apply_vote[{tag}]", lambda n=n, t=turns: vote_ready_game(n, t), apply_vote, True)
+            yield (
+                f"gn_kill_target_for_npc[{tag}]",
+                lambda n=n, t=turns: prepared_game(n, t), gn_kill_target_for_npc, False,
+            )
+            yield (
+                f"check_win_condition[{tag}]",
+                lambda n=n, t=turns: prepared_game(n, t), check_win_condition, False,
+            )
+    for n in LOBBY_SIZES:
+        setup = lambda n=n: prepared_game(n, 5, BELIEF_RULES)
+        yield (f"npc_talks_belief[npcs={n}]", setup, npc_talks, True)
+        yield (f"npc_votes_belief[npcs={n}]", setup, npc_votes, False)
+    for n in FULL_GAME_SIZES:
+        yield (f"full_game[npcs={n}]", lambda n=n: prepared_game(n, 0), play_until_over, True)
+
+
+# ---------------------------------------
+# 計測
+# ---------------------------------------
+def measure(setup, op, fresh, min_time):
+    """op を min_time 秒以上くり返して ops/sec を求める。
+    fresh なら毎回 setup した状態（の複製）に対して呼び、準備の時間は含めない。
+    計測中は GC を止める（timeit と同じ。いつ走るかで結果が大きく揺れるため）。"""
+    template = setup()
+    enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        return _measure(template, op, fresh, min_time)
+    finally:
+        if enabled:
+            gc.enable()
+
+def _measure(template, op, fresh, min_time):
+    if not fresh:
+        # 同じ状態に何度も呼べるものは、まとめて回して計測のオーバーヘッドを減らす
+        n = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(n):
+                op(template)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                return n / elapsed
+            n *= 2
+
+    # 毎回まっさらな状態が要るものは、複製（pickle から戻すほうが deepcopy より速い）を
+    # FRESH_BATCH 個ずつ用意してから、その束をまとめて計る（1回ずつ時計を読むより揺らぎが小さい）。
+    # 複製のほうが op よりずっと重い項目もあるので、準備を含めた時間が FRESH_MAX_WALL 倍を超えたら打ち切る。
+    blob = pickle.dumps(template, pickle.HIGHEST_PROTOCOL)
+    deadline = time.perf_counter() + min_time * FRESH_MAX_WALL
+    ops = 0
+    elapsed = 0.0
+    while elapsed < min_time and (ops == 0 or time.perf_counter() < deadline):
+        games = [pickle.loads(blob) for _ in range(FRESH_BATCH)]
+        start = time.perf_counter()
+        for game in games:
+            op(game)
+        elapsed += time.perf_counter() - start
+        ops += len(games)
+    return ops / elapsed
+
+def measure_alloc(setup, op, fresh, repeat=20):
+    """1回あたりの (使ったメモリのピーク（tracemalloc, KiB）, 終わったあとも残ったブロック数)。
+    ブロック数は確保した数ではなく確保と解放の差し引きなので、確保してすぐ解放する処理では 0 に近くなる。
+    確保の多さはピークのほうで見る。"""
+    template = setup()
+    games = [copy.deepcopy(template) if fresh else template for _ in range(repeat)]
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    for game in games:
+        op(game)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks_after = sys.getallocatedblocks()
+    return peak / 1024 / repeat, (blocks_after - blocks_before) / repeat
+
+def reference_op(_):
+    """マシンの速さの目安にする、ゲームのコードを使わない素の Python の処理（乱数・辞書・並べ替え）"""
+    rng = random.Random(1)
+    counts = {}
+    for i in range(200):
+        k = rng.randrange(50)
+        counts[k] = counts.get(k, 0) + i
+    sorted(counts.items())
+
+def run(min_time, only=None, names=None, rounds=ROUNDS):
+    """各項目の ops/sec と、直前に測った reference_op の速さとの比（relative）の、rounds 回の中央値。
+    同じマシンでも時間帯や他の負荷で全体の速さが揺れるので、基準との比較には relative を使う。
+    names を渡すとその項目だけ測る。"""
+    results = {}
+    for name, setup, op, fresh in cases():
+        if only and only not in name:
+            continue
+        if names is not None and name not in names:
+            continue
+        samples = []
+        for _ in range(rounds):
+            ref = measure(lambda: None, reference_op, False, REFERENCE_TIME)
+            samples.append((measure(setup, op, fresh, min_time), ref))
+        ops = statistics.median(o for o, _ in samples)
+        relative = statistics.median(o / ref for o, ref in samples)
+        # メモリ計測は tracemalloc で遅くなるので、計測時間に収まる回数だけ回す
+        repeat = max(1, min(20, int(ops * min_time)))
+        peak_kib, blocks = measure_alloc(setup, op, fresh, repeat=repeat)
+        results[name] = {"ops_per_sec": ops, "relative": relative, "peak_kib": peak_kib, "retained_blocks": blocks}
+    return results
+
+
+# ---------------------------------------
+# 基準との比較
+# ---------------------------------------
+def speed_ratio(row, base):
+    """基準に対する今回の速さ。両方に relative があればそれで比べる（古い基準なら ops/sec）"""
+    key = "relative" if "relative" in row and "relative" in base else "ops_per_sec"
+    return row[key] / base[key]
+
+def compare(results, baseline, tolerance):
+    """基準より tolerance 以上遅くなった項目の (名前, 基準の ops/sec, 今回の ops/sec, 基準比) を返す"""
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = speed_ratio(row, base)
+        if ratio < 1.0 - tolerance:
+            regressions.append((name, base["ops_per_sec"], row["ops_per_sec"], ratio))
+    return regressions
+
+def format_results(results, baseline):
+    lines = [f"{'ベンチマーク':<48}{'ops/sec':>14}{'基準比':>9}{'peak KiB':>11}{'retained':>9}"]
+    for name, row in results.items():
+        base = baseline.get(name)
+        ratio = f"{speed_ratio(row, base):.2f}x" if base else "-"
+        lines.append(
+            f"{name:<48}{row['ops_per_sec']:>14,.0f}{ratio:>9}"
+            f"{row['peak_kib']:>11.1f}{row['retained_blocks']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="グノーシア風ミニゲームのベンチマーク")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="1回の計測で回す時間（秒）")
+    parser.add_argument("--only", help="名前にこの文字列を含む項目だけ測る")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基準となる結果の JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="今回の結果を基準として保存する")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="許容する速度低下の割合")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = run(args.min_time, only=args.only)
+    print(format_results(results, baseline))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"基準を保存しました: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        # 一時的に遅くなっただけのこともあるので、引っかかった項目は回数を増やして測り直す
+        print()
+        print(f"遅くなったように見えた {len(regressions)} 項目を {CONFIRM_ROUNDS} 回ずつ測り直します")
+        results.update(run(args.min_time, names={r[0] for r in regressions}, rounds=CONFIRM_ROUNDS))
+        regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print()
+        print(f"⚠️ 基準より {args.tolerance:.0%} 以上遅くなった項目:")
+        for name, base, now, ratio in regressions:
+            print(f"  {name}: {base:,.0f} → {now:,.0f} ops/sec（マシンの速さで補正した基準比 {ratio:.2f}x）")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
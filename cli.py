@@ -0,0 +1,253 @@
+# cli.py
+# Streamlit を使わないコマンドライン入口（遊ぶ・勝率シミュレーション・探索・リプレイ表示）
+# 実行: python -m cli play
+#       python -m cli simulate -n 100000 -j 8
+#       python -m cli replay game.gnev --until-day 3
+#       python -m cli tournament default random grudge
+#       python -m cli server serve（複数人で遊ぶルームサーバー）
+#       python -m cli ui          （Streamlit 版を起動。Streamlit を読み込むのはこれだけ）
+#
+# サブコマンドごとに必要なモジュールだけをその場で import するので、起動は engine を読む分だけで済む。
+
+import argparse
+import os
+import sys
+
+import engine
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+# ---------------------------------------
+# 端末で遊ぶ
+# ---------------------------------------
+class TerminalGame:
+    """端末の入出力で1ゲームを進める。ログは前回表示したところから続きだけを出す。"""
+
+    def __init__(self, game, out=None, inp=None):
+        self.game = game
+        self.out = sys.stdout if out is None else out
+        self.inp = sys.stdin if inp is None else inp
+        self.shown = 0  # 表示済みのイベント数
+
+    def say(self, text=""):
+        print(text, file=self.out)
+
+    def ask(self, prompt):
+        """1行読む。入力が尽きたら None"""
+        self.out.write(prompt)
+        self.out.flush()
+        line = self.inp.readline()
+        if not line:
+            return None
+        return line.strip()
+
+    def flush_log(self):
+        game = self.game
+        for line in game.log_lines(self.shown):
+            self.say(line)
+        self.shown = len(game.events)
+
+    def choose(self, options, prompt):
+        """番号つきで options を並べて1つ選ばせる。空行なら None、入力が尽きたら False。"""
+        for i, name in enumerate(options, 1):
+            self.say(f"  {i}. {name}")
+        while True:
+            answer = self.ask(prompt)
+            if answer is None:
+                return False
+            if answer == "":
+                return None
+            if answer.isdigit() and 1 <= int(answer) <= len(options):
+                return options[int(answer) - 1]
+            self.say("番号で選んでください。")
+
+    def run(self):
+        """決着するか入力が尽きる（q / EOF）まで遊ぶ。決着したら True。"""
+        self.say(f"あなたの役職：{self.game.roles[engine.PLAYER_NAME]}")
+        while True:
+            game = self.game  # 巻き戻すと別のゲームに替わる
+            engine.settle(game)
+            self.flush_log()
+            if game.game_over:
+                self.show_result()
+                return True
+            if game.phase == "discussion":
+                ok = self.discussion_step()
+            elif game.phase == "vote":
+                ok = self.vote_step()
+            else:
+                ok = self.night_step()
+            if not ok:
+                return False
+
+    def discussion_step(self):
+        game = self.game
+        remaining = game.rules.max_discussion_turns - game.discussion_turn
+        self.say(f"\n💬 議論（残り {remaining} ターン）"
+                 "  Enter: 1ターン進める / s: 疑う / d: 庇う / v: 投票まで / a: 決着までおまかせ"
+                 " / r: 巻き戻す / q: 終了")
+        answer = self.ask("> ")
+        if answer is None or answer == "q":
+            return False
+        if answer == "":
+            engine.advance_discussion(game)
+        elif answer in ("s", "d"):
+            candidates = [n for n in game.alive_names() if n != engine.PLAYER_NAME]
+            target = self.choose(candidates, "相手の番号: ")
+            if target is False:
+                return False
+            if target is not None:
+                engine.apply_player_statement(game, target, "疑う" if answer == "s" else "庇う")
+        elif answer == "v":
+            engine.advance(game, "vote")
+        elif answer == "a":
+            engine.advance(game, "end")
+        elif answer == "r":
+            return self.rewind_step()
+        else:
+            self.say("入力が分かりません。")
+        return True
+
+    def rewind_step(self):
+        """timeline から選んだフェーズの始まりに戻る"""
+        timeline = self.game.timeline
+        labels = [engine.timeline_label(snap) for snap in timeline]
+        label = self.choose(labels, "戻る時点の番号: ")
+        if label is False:
+            return False
+        if label is not None:
+            self.game = engine.rewind_to(self.game, labels.index(label))
+            self.shown = len(self.game.events)
+            self.say(f"\n⏪ {label}の始まりに戻りました。")
+        return True
+
+    def vote_step(self):
+        game = self.game
+        self.say("\n🗳️ 投票先を選んでください（Enter でランダム）")
+        candidates = [n for n in game.alive_names() if n != engine.PLAYER_NAME]
+        target = self.choose(candidates, "投票先の番号: ")
+        if target is False:
+            return False
+        engine.vote(game, target)
+        return True
+
+    def night_step(self):
+        game = self.game
+        self.say("\n🌙 あなたはグノーシアです。今夜『消す』人間を選んでください（Enter でおまかせ）")
+        target = self.choose(engine.player_kill_candidates(game), "相手の番号: ")
+        if target is False:
+            return False
+        engine.resolve_night(game, target)
+        return True
+
+    def show_result(self):
+        game = self.game
+        self.say("\n🏁 " + ("あなたの陣営の勝利！" if game.win else "あなたの陣営の敗北…"))
+        for name, role in game.roles.items():
+            status = "生存" if game.alive[name] else "排除/消滅"
+            self.say(f"  {name}：{role}（{status}）")
+
+
+# ---------------------------------------
+# サブコマンド
+# ---------------------------------------
+def load_saved(path, until_day=None):
+    """保存したゲームを読む。壊れたファイルはトレースバックでなく1行のメッセージで終える"""
+    from replay import load_game
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return load_game(data, until_day=until_day)
+    except ValueError as e:
+        sys.exit(f"{path}: {e}")
+
+def cmd_play(args):
+    if args.load:
+        game = load_saved(args.load)
+    else:
+        game = engine.init_game(seed=args.seed, npc_names=engine.make_roster(args.npcs))
+
+    session = TerminalGame(game)
+    if args.auto:
+        engine.play_until_over(game)
+        session.flush_log()
+        session.show_result()
+    else:
+        session.run()
+
+    if args.save:
+        from replay import dump_game
+        with open(args.save, "wb") as f:
+            f.write(dump_game(session.game))  # 巻き戻していれば、その先の流れを保存する
+        print(f"保存しました: {args.save}")
+    return 0
+
+def cmd_replay(args):
+    game = load_saved(args.path, until_day=args.until_day)
+    session = TerminalGame(game)
+    session.flush_log()
+    if game.game_over:
+        session.show_result()
+    return 0
+
+def cmd_simulate(args, rest):
+    from simulate import main
+    main(rest)
+    return 0
+
+def cmd_tune(args, rest):
+    from tune import main
+    main(rest)
+    return 0
+
+def cmd_tournament(args, rest):
+    from tournament import main
+    main(rest)
+    return 0
+
+def cmd_server(args, rest):
+    from server import main
+    return main(rest)
+
+def cmd_ui(args, rest):
+    """Streamlit 版を起動する（このプロセスを streamlit run に置き換える）"""
+    os.execv(sys.executable, [sys.executable, "-m", "streamlit", "run", APP_PATH, *rest])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cli", description="グノーシア風ミニゲーム")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("play", help="端末で遊ぶ")
+    p.add_argument("--seed", type=int, help="乱数シード（同じシードなら同じ配役・展開）")
+    p.add_argument("--npcs", type=int, default=len(engine.NPC_NAMES), help="NPCの人数")
+    p.add_argument("--load", help="保存したゲームの続きから遊ぶ")
+    p.add_argument("--save", help="終了時にゲームを保存するファイル")
+    p.add_argument("--auto", action="store_true", help="入力なしで決着まで進めてログを表示する")
+    p.set_defaults(func=cmd_play)
+
+    p = sub.add_parser("replay", help="保存したゲームのログを表示する")
+    p.add_argument("path")
+    p.add_argument("--until-day", type=int, help="この日の朝までで止める")
+    p.set_defaults(func=cmd_replay)
+
+    # 残りの引数をそのまま渡すサブコマンド
+    for name, func, text in (
+        ("simulate", cmd_simulate, "勝率シミュレーション（引数は simulate.py と同じ）"),
+        ("tune", cmd_tune, "バランス定数の探索（引数は tune.py と同じ）"),
+        ("tournament", cmd_tournament, "NPCの方針どうしの総当たり戦（引数は tournament.py と同じ）"),
+        ("server", cmd_server, "複数人で遊ぶルームサーバー・クライアント（引数は server.py と同じ）"),
+        ("ui", cmd_ui, "Streamlit 版を起動する（残りの引数は streamlit run へ）"),
+    ):
+        p = sub.add_parser(name, help=text, add_help=False)
+        p.set_defaults(func=func, passthrough=True)
+
+    args, rest = parser.parse_known_args(argv)
+    if not getattr(args, "passthrough", False):
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        return args.func(args)
+    return args.func(args, rest)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1197 @@
+# engine.py
+# グノーシア風ミニゲームのルール本体（Streamlit 非依存）
+# app.py の UI や simulate.py のバッチ実行から共通で使う
+
+import itertools
+import random
+
+import events
+
+# ---------------------------------------
+# 基本設定
+# ---------------------------------------
+PLAYER_NAME = "あなた"
+NPC_NAMES = ["セツ", "ラキオ", "SQ", "ジナ", "ステラ", "しげみち"]
+ROLES = ["人間", "グノーシア"]
+MAX_DISCUSSION_TURNS = 5  # 1日あたり議論ターン数
+
+LIKE_DELTA_UP = 1     # 庇われたときの好感度上昇
+LIKE_DELTA_DOWN = -1  # 疑われたときの好感度下降
+
+SAMPLER_MIN_PLAYERS = 32  # この人数以上のロビーでは、好感度による重みを WeightTree で持ち続ける
+
+RNG_CLASS = random.Random  # ゲームごとの乱数（profiling.install が呼び出し回数を数えるものに差し替える）
+
+
+# ---------------------------------------
+# バランス調整用の定数
+# ---------------------------------------
+class Rules:
+    """ゲームバランスを決める定数一式。既定値は元のゲームのまま。
+    tune.py はこれを差し替えた試合を大量に回して、勝率の釣り合う組み合わせを探す。"""
+
+    __slots__ = (
+        "like_delta_up", "like_delta_down", "gn_talk_weights", "human_talk_weights",
+        "like_slope", "player_vote_bias", "max_discussion_turns", "gn_counts", "belief_weight",
+    )
+
+    def __init__(
+        self,
+        like_delta_up=LIKE_DELTA_UP,
+        like_delta_down=LIKE_DELTA_DOWN,
+        gn_talk_weights=(0.7, 0.3),     # グノーシアの (疑う, 庇う) の重み
+        human_talk_weights=(0.6, 0.4),  # 人間の (疑う, 庇う) の重み
+        like_slope=0.3,                 # 好感度1あたりの重みの変化
+        player_vote_bias=0.3,           # NPCがプレイヤーに投票しやすくなる分
+        max_discussion_turns=MAX_DISCUSSION_TURNS,
+        gn_counts=(1, 2),               # グノーシア人数の候補（等確率）
+        belief_weight=0.0,              # 人間NPCが役職推理を狙いに反映する強さ（0 なら好感度だけ）
+    ):
+        self.like_delta_up = like_delta_up
+        self.like_delta_down = like_delta_down
+        self.gn_talk_weights = tuple(gn_talk_weights)
+        self.human_talk_weights = tuple(human_talk_weights)
+        self.like_slope = like_slope
+        self.player_vote_bias = player_vote_bias
+        self.max_discussion_turns = max_discussion_turns
+        self.gn_counts = tuple(gn_counts)
+        self.belief_weight = belief_weight
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def replace(self, **changes):
+        """一部の定数だけ変えた Rules を返す"""
+        return Rules(**{**self.as_dict(), **changes})
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash(tuple(self.as_dict().values()))
+
+    def __repr__(self):
+        args = ", ".join(f"{k}={v!r}" for k, v in self.as_dict().items())
+        return f"Rules({args})"
+
+DEFAULT_RULES = Rules()
+
+
+def step_seed(seed, day, step):
+    """day 日目の手番 step（"talk1", "vote", "night" など）で使う乱数の種"""
+    return f"{seed}:{day}:{step}"
+
+def make_roster(n_npcs):
+    """n_npcs 人ぶんのNPC名簿を作る（大人数ロビー用）。足りない分は連番の名前で埋める。"""
+    names = NPC_NAMES[:n_npcs]
+    width = len(str(n_npcs))
+    for i in range(len(names) + 1, n_npcs + 1):
+        names.append(f"NPC{i:0{width}d}")
+    return names
+
+
+# ---------------------------------------
+# 生存者の集合
+# ---------------------------------------
+class AliveSet:
+    """生存者の集合。追加・削除・ランダムな1人の抽出がすべて O(1)。
+    削除は末尾との入れ替えで行うので、並び順は保たれない。"""
+
+    __slots__ = ("_items", "_pos")
+
+    def __init__(self, names=()):
+        self._items = list(names)
+        self._pos = {name: i for i, name in enumerate(self._items)}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, name):
+        return name in self._pos
+
+    def copy(self):
+        other = AliveSet.__new__(AliveSet)
+        other._items = self._items.copy()
+        other._pos = self._pos.copy()
+        return other
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def discard(self, name):
+        i = self._pos.pop(name, None)
+        if i is None:
+            return
+        last = self._items.pop()
+        if last != name:
+            self._items[i] = last
+            self._pos[last] = i
+
+    def choice(self, rng):
+        return self._items[rng.randrange(len(self._items))]
+
+
+# ---------------------------------------
+# 名簿
+# ---------------------------------------
+class Roster:
+    """参加者の名簿と席番号。同じ顔ぶれのゲーム同士で1つを共有する。"""
+
+    __slots__ = ("npc_names", "all_names", "seat")
+
+    def __init__(self, npc_names):
+        self.npc_names = tuple(npc_names)
+        self.all_names = (PLAYER_NAME,) + self.npc_names
+        self.seat = {name: i for i, name in enumerate(self.all_names)}
+
+_ROSTERS = {}
+
+def get_roster(npc_names=None):
+    """npc_names の名簿を返す（同じ顔ぶれなら同じオブジェクト）"""
+    key = tuple(NPC_NAMES if npc_names is None else npc_names)
+    roster = _ROSTERS.get(key)
+    if roster is None:
+        roster = _ROSTERS[key] = Roster(key)
+    return roster
+
+
+# ---------------------------------------
+# ゲーム状態
+# ---------------------------------------
+# スナップショットと共有し、書き換える直前に（GameState.own で）初めて複製する入れ物と、その複製のしかた。
+# like_map は外側の辞書だけを複製し、行は change_like が書き換える行だけを1行ずつ複製する。
+# roles・npc_votes は書き換えずに丸ごと差し替えるだけなので、共有したままでよい。
+# events は EventLog.view で共有する（追記しかしないので複製しない）。
+_COPY_ON_WRITE = {
+    "alive": dict.copy,
+    "alive_order": dict.copy,
+    "alive_pool": AliveSet.copy,
+    "alive_by_role": lambda by_role: {role: s.copy() for role, s in by_role.items()},
+    "eliminated": list.copy,
+    "day_starts": list.copy,
+    "like_map": dict.copy,
+    "beliefs": lambda beliefs: beliefs.copy(),
+    "weights": lambda weights: weights.copy(),
+}
+
+_VERSIONS = itertools.count(1)  # GameState.version の払い出し
+
+class GameState:
+    """1ゲーム分の状態。st.session_state の代わりにルール関数が読み書きする。
+    生存者は席順の辞書・抽選用の集合・陣営別の集合を脱落のたびに更新するので、
+    勝敗判定や候補選びで全員をなめ直す必要がない。
+    多数のセッションを同時に持てるよう __slots__ で属性を固定し、名簿は共有する。
+
+    snapshot / fork は入れ物を複製せずに共有し（O(1)）、どちらかが書き換えるときに
+    その入れ物（好感度は1行）だけを複製する。各フェーズの始まりのスナップショットを timeline に残すので、
+    巻き戻し・分岐（rewind / branch）はそこから fork するだけで済み、メモリは変化した分しか増えない。"""
+
+    __slots__ = (
+        "seed", "rng", "record_log", "roster", "rules",
+        "gn_count", "roles", "alive", "alive_order", "alive_pool", "alive_by_role",
+        "day", "phase", "events", "day_starts", "players", "vote_targets", "npc_votes",
+        "game_over", "win", "winner", "player_statement", "discussion_turn", "like_map",
+        "beliefs", "weights", "eliminated", "strategies", "version",
+        "timeline", "_shared", "_own_rows",
+    )
+
+    def __init__(self, npc_names=None, seed=None, record_log=True, rules=None):
+        if seed is None:
+            seed = random.randrange(1 << 63)
+        self.seed = seed
+        self.rng = RNG_CLASS(seed)
+        self.record_log = record_log
+        self.roster = get_roster(npc_names)
+        self.rules = DEFAULT_RULES if rules is None else rules
+
+        self.gn_count = 0
+        self.roles = {}
+        self.alive = {}
+        self.alive_order = {}  # 生存者（席順。値は使わない）
+        self.alive_pool = AliveSet()  # 生存者（ランダム抽出用）
+        self.alive_by_role = {role: AliveSet() for role in ROLES}
+        self.eliminated = []  # 脱落した順（追放・消滅共通）
+        self.day = 1
+        self.phase = "discussion"  # discussion → vote → night → result
+        self.events = events.EventLog()  # 出来事の記録（表示用の文章は log_lines で組み立てる）
+        self.day_starts = [0]  # 各日の最初のイベント位置（day_starts[d-1] が d日目）
+        self.players = (PLAYER_NAME,)  # 人が操作する席（複数人で遊ぶときは server.Room が差し替える）
+        self.vote_targets = {}  # 人の投票先（名前 → 投票先）
+        self.npc_votes = {}
+        self.game_over = False
+        self.win = None
+        self.winner = None  # 勝利陣営（"人間" / "グノーシア"）
+        self.player_statement = None
+        self.discussion_turn = 0
+        # 好感度は変化したペアだけを持つ疎な辞書（like_map[a][b] が無ければ 0）
+        self.like_map = {}
+        # 役職推理（rules.belief_weight が 0 より大きいときだけ inference.RoleBelief）
+        self.beliefs = None
+        # 大人数ロビーでの抽選用の重み（WeightTable）。小さな試合では None のまま
+        self.weights = None
+        # 席ごとの NPC の方針（Strategy）。None なら全員 DEFAULT_STRATEGY
+        self.strategies = None
+        # 状態が変わるたびに新しくなる番号（プロセス全体で一意。画面の部分キャッシュのキー）。
+        # スナップショット・分岐は元と同じ番号から始まり、どちらかが変われば別の番号になる
+        self.version = next(_VERSIONS)
+        # 各フェーズの始まりのスナップショット（checkpoint が足していく）
+        self.timeline = []
+        self._shared = set()   # スナップショットと共有中の入れ物（_COPY_ON_WRITE の名前）
+        self._own_rows = None  # 複製済みの好感度の行（None ならスナップショットを取っていないので全部自分のもの）
+
+    @property
+    def npc_names(self):
+        return self.roster.npc_names
+
+    @property
+    def all_names(self):
+        return self.roster.all_names
+
+    @property
+    def seat(self):
+        return self.roster.seat
+
+    # ---------------- スナップショット ----------------
+    def own(self, name):
+        """入れ物 name をこれから書き換えるので、自分専用のものを返す（共有中ならここで複製する）"""
+        value = getattr(self, name)
+        if name in self._shared:
+            self._shared.discard(name)
+            if value is not None:
+                value = _COPY_ON_WRITE[name](value)
+                setattr(self, name, value)
+        return value
+
+    def _clone(self, share_weights=True):
+        other = GameState.__new__(GameState)
+        for name in GameState.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.events = self.events.view()
+        # 以後はどちらも、書き換える前に複製する
+        weights_shared = "weights" in self._shared
+        self._shared = set(_COPY_ON_WRITE)
+        if not share_weights and not weights_shared:
+            self._shared.discard("weights")
+        other._shared = set(_COPY_ON_WRITE)
+        self._own_rows = set()
+        other._own_rows = set()
+        return other
+
+    def snapshot(self):
+        """今の状態のスナップショット（読むだけ。続きを遊ぶときは fork する）。
+        記録するゲームは手番ごとに乱数を作り直すので、乱数の状態は持たない。
+        抽選用の重み（WeightTable）は好感度から同じものを作り直せるので持たず、fork のときに作る。"""
+        snap = self._clone(share_weights=False)
+        snap.timeline = None
+        if self.weights is not None:
+            snap.weights = _WEIGHTS_FROM_LIKES
+        if self.record_log:
+            snap.rng = None
+        else:
+            snap.rng = RNG_CLASS()
+            snap.rng.setstate(self.rng.getstate())
+        return snap
+
+    def fork(self):
+        """この状態から分岐した新しいゲーム。元のゲーム（スナップショットでもよい）は変わらない。"""
+        other = self._clone()
+        other.timeline = None if self.timeline is None else list(self.timeline)
+        if other.weights is _WEIGHTS_FROM_LIKES:
+            other.weights = weights_from_likes(other)
+            other._shared.discard("weights")
+        other.rng = RNG_CLASS(self.seed)
+        if self.rng is not None:
+            other.rng.setstate(self.rng.getstate())
+        return other
+
+    def checkpoint(self):
+        """フェーズの始まりのスナップショットを timeline に足す。
+        記録しないシミュレーションと、timeline を None にしたゲーム（巻き戻さない server のルームなど）では何もしない。"""
+        if self.record_log and self.timeline is not None:
+            self.timeline.append(self.snapshot())
+
+    def begin_step(self, step):
+        """手番の最初に乱数を (seed, 日, 手番) から作り直す。
+        手番の途中の乱数状態を持ち越さないので、イベント列だけから続きを再現できる。
+        記録しない（再現する必要のない）シミュレーションでは何もしない。"""
+        if self.record_log:
+            self.rng.seed(step_seed(self.seed, self.day, step))
+
+    def touch(self):
+        """状態が変わった印に version を新しくする（record が呼ぶので、記録を伴わない変更のときだけ使う）"""
+        self.version = next(_VERSIONS)
+
+    def record(self, kind, speaker=None, target=None, turn=None):
+        """出来事を1件記録する（シミュレーション時は記録しない）。状態の変化には必ず記録が伴うので、version もここで進める"""
+        self.version = next(_VERSIONS)
+        if not self.record_log:
+            return
+        self.events.append(
+            kind,
+            events.NONE if speaker is None else self.seat[speaker],
+            events.NONE if target is None else self.seat[target],
+            self.day,
+            self.discussion_turn if turn is None else turn,
+        )
+
+    def log_lines(self, start=0, end=None):
+        """start 番目から end 番目の手前までのイベントを表示行にする"""
+        return events.render_events(
+            self.events.slice(start, end), self.all_names, self.roles,
+            self.rules.max_discussion_turns,
+        )
+
+    @property
+    def log(self):
+        """全イベントの表示行"""
+        return self.log_lines()
+
+    def set_roles(self, roles):
+        """役職を確定させ、生存者の集合を作り直す"""
+        self.roles = roles
+        self.alive = {name: True for name in self.all_names}
+        self.alive_order = dict.fromkeys(self.all_names)
+        self.alive_pool = AliveSet(self.all_names)
+        self.alive_by_role = {
+            role: AliveSet(n for n in self.all_names if roles[n] == role) for role in ROLES
+        }
+
+    def eliminate(self, name):
+        """name を脱落させる（追放・消滅共通）"""
+        if self._shared:
+            for field in ("alive", "alive_order", "alive_pool", "alive_by_role", "eliminated", "weights"):
+                self.own(field)
+        self.alive[name] = False
+        del self.alive_order[name]
+        self.eliminated.append(name)
+        self.alive_pool.discard(name)
+        self.alive_by_role[self.roles[name]].discard(name)
+        if self.weights is not None:
+            self.weights.remove(name)
+
+    def alive_names(self):
+        return list(self.alive_order)
+
+    def alive_count(self, role=None):
+        if role is None:
+            return len(self.alive_pool)
+        return len(self.alive_by_role[role])
+
+    def likes_of(self, name):
+        """name から他の人への好感度（変化したものだけ）"""
+        return self.like_map.get(name, _NO_LIKES)
+
+
+_NO_LIKES = {}
+
+
+# ---------------------------------------
+# 好感度ユーティリティ
+# ---------------------------------------
+def change_like(game, from_name, to_name, delta):
+    """from_name から to_name への好感度を変化させる"""
+    if from_name not in game.roles or to_name not in game.roles:
+        return
+    if from_name == to_name:
+        return
+    own_rows = game._own_rows
+    if own_rows is None:
+        row = game.like_map.setdefault(from_name, {})
+    else:
+        # スナップショットと共有している行は、書き換える前に複製する
+        like_map = game.own("like_map")
+        row = like_map.get(from_name)
+        if from_name not in own_rows:
+            row = like_map[from_name] = {} if row is None else row.copy()
+            own_rows.add(from_name)
+    row[to_name] = row.get(to_name, 0) + delta
+    if game.weights is not None:
+        game.own("weights").update(game, from_name, to_name)
+
+
+# ---------------------------------------
+# 重み付き抽選
+# ---------------------------------------
+def sample_sparse(rng, pool, special, base, exclude=None):
+    """pool から1人選ぶ。special に載っている人はその重み、それ以外は一律 base の重み。
+    好感度が0のままの相手はみな同じ重みになるので、変化した相手だけを数えれば済む。
+    special には pool 内かつ exclude 以外の人だけを入れておくこと。"""
+    n_rest = len(pool) - len(special)
+    if exclude is not None and exclude in pool:
+        n_rest -= 1
+    special_total = sum(special.values())
+    total = special_total + base * n_rest
+    if total <= 0:
+        return None
+
+    u = rng.random() * total
+    if u < special_total or n_rest <= 0:
+        for name, w in special.items():
+            u -= w
+            if u < 0:
+                return name
+        return name  # 丸め誤差で抜けたときは最後の人
+
+    # 一律の重みの人から一様に選ぶ（該当者が多ければ引き直し、少なければ列挙）
+    if 2 * (len(special) + 1) < len(pool):
+        while True:
+            name = pool.choice(rng)
+            if name != exclude and name not in special:
+                return name
+    rest = [n for n in pool if n != exclude and n not in special]
+    return rest[rng.randrange(len(rest))]
+
+
+WEIGHT_SCALE = 1 << 32  # WeightTree は重みをこの倍の整数で持つ（合計が 2**53 を超えない大きさ）
+
+class WeightTree:
+    """名前ごとの重みを持つ Fenwick 木。重みの変更・合計・重みに比例した抽出がどれも O(log N)。
+    一度外した名前は戻さない前提（脱落者）なので、枠は詰めずに重み0で残す。
+    重みは WEIGHT_SCALE 倍の整数（固定小数点）で持つので、合計に丸め誤差が積もらず、
+    同じ名前の並びに同じ重みを入れれば、途中の変更の順序によらず同じ木になる（好感度から作り直しても同じ抽選になる）。"""
+
+    __slots__ = ("_tree", "_w", "_slot", "_names", "_sum", "total", "count")
+
+    def __init__(self):
+        self._tree = [0]      # 1始まりの Fenwick 配列
+        self._w = [0]         # 枠ごとの重み
+        self._slot = {}       # 名前 → 枠
+        self._names = [None]  # 枠 → 名前
+        self._sum = 0
+        self.total = 0.0      # 重みの合計（_sum を元の単位に戻したもの）
+        self.count = 0        # 重みが0でない名前の数
+
+    def __contains__(self, name):
+        i = self._slot.get(name)
+        return i is not None and self._w[i] > 0
+
+    def copy(self):
+        other = WeightTree.__new__(WeightTree)
+        other._tree = self._tree.copy()
+        other._w = self._w.copy()
+        other._slot = self._slot.copy()
+        other._names = self._names.copy()
+        other._sum = self._sum
+        other.total = self.total
+        other.count = self.count
+        return other
+
+    def set(self, name, w):
+        q = round(w * WEIGHT_SCALE) if w > 0.0 else 0
+        i = self._slot.get(name)
+        if i is None:
+            if q <= 0:
+                return
+            self._append(name, q)
+            return
+        old = self._w[i]
+        if old <= 0 < q:
+            self.count += 1
+        elif q <= 0 < old:
+            self.count -= 1
+        self._w[i] = q
+        d = q - old
+        self._sum += d
+        self.total = self._sum / WEIGHT_SCALE
+        tree = self._tree
+        n = len(tree)
+        while i < n:
+            tree[i] += d
+            i += i & -i
+
+    def discard(self, name):
+        if name in self._slot:
+            self.set(name, 0.0)
+
+    def _append(self, name, q):
+        i = len(self._w)
+        self._w.append(q)
+        self._names.append(name)
+        self._slot[name] = i
+        # 新しい枠 i が受け持つ区間 (i - lowbit(i), i] の合計
+        self._tree.append(q + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        self._sum += q
+        self.total = self._sum / WEIGHT_SCALE
+        self.count += 1
+
+    def _prefix(self, i):
+        tree = self._tree
+        s = 0
+        while i > 0:
+            s += tree[i]
+            i -= i & -i
+        return s
+
+    def find(self, u):
+        """累積重みが u を超える最初の名前（0 <= u < total）"""
+        u *= WEIGHT_SCALE
+        tree = self._tree
+        n = len(tree) - 1
+        i = 0
+        step = 1 << (n.bit_length() - 1) if n else 0
+        while step:
+            j = i + step
+            if j <= n and tree[j] <= u:
+                u -= tree[j]
+                i = j
+            step >>= 1
+        # u が合計ちょうどのときは末尾の先に出るので、手前の重みのある枠に戻す
+        i = min(i + 1, n)
+        while i > 1 and self._w[i] <= 0:
+            i -= 1
+        return self._names[i]
+
+
+class LikeWeights:
+    """1人のNPCが抽選に使う重み（好感度が変化した生存者の分だけ）。
+    suspicion: 疑う・投票、trust: 庇う、kill: 夜に消す相手（グノーシアのみ。人間だけを入れる）"""
+
+    __slots__ = ("suspicion", "trust", "kill")
+
+    def __init__(self, is_gnosia):
+        self.suspicion = WeightTree()
+        self.trust = WeightTree()
+        self.kill = WeightTree() if is_gnosia else None
+
+    def copy(self):
+        other = LikeWeights.__new__(LikeWeights)
+        other.suspicion = self.suspicion.copy()
+        other.trust = self.trust.copy()
+        other.kill = None if self.kill is None else self.kill.copy()
+        return other
+
+    def update(self, name, v, slope, is_human):
+        self.suspicion.set(name, weight_from_like_for_suspicion(v, slope))
+        self.trust.set(name, weight_from_like_for_trust(v, slope))
+        if self.kill is not None and is_human:
+            self.kill.set(name, max(0.1, 1.0 + -slope * v))
+
+    def discard(self, name):
+        self.suspicion.discard(name)
+        self.trust.discard(name)
+        if self.kill is not None:
+            self.kill.discard(name)
+
+_EMPTY_TREE = WeightTree()
+_NO_WEIGHTS = LikeWeights(False)  # まだ誰の好感度も変化していないNPC用（読むだけ）
+
+class WeightTable:
+    """NPCごとの LikeWeights と、脱落時に消す先を引くための逆引き（誰の行に載っているか）。
+    copy は行を共有したままにして、書き換える行・逆引きだけをそのとき複製する（GameState.snapshot 用）。"""
+
+    __slots__ = ("rows", "holders", "_own_rows", "_own_holders")
+
+    def __init__(self):
+        self.rows = {}     # name → LikeWeights
+        self.holders = {}  # name → name が載っている行の持ち主の集合
+        self._own_rows = None     # 複製済みの行（None なら全部自分のもの）
+        self._own_holders = None  # 複製済みの逆引き（同上）
+
+    def copy(self):
+        other = WeightTable.__new__(WeightTable)
+        other.rows = self.rows.copy()
+        other.holders = self.holders.copy()
+        other._own_rows = set()
+        other._own_holders = set()
+        return other
+
+    def row(self, name):
+        return self.rows.get(name, _NO_WEIGHTS)
+
+    def _row_for_write(self, name, is_gnosia):
+        row = self.rows.get(name)
+        if row is None:
+            row = self.rows[name] = LikeWeights(is_gnosia)
+        elif self._own_rows is not None and name not in self._own_rows:
+            row = self.rows[name] = row.copy()
+        if self._own_rows is not None:
+            self._own_rows.add(name)
+        return row
+
+    def _holders_for_write(self, name):
+        holders = self.holders.get(name)
+        if holders is None:
+            holders = self.holders[name] = set()
+        elif self._own_holders is not None and name not in self._own_holders:
+            holders = self.holders[name] = holders.copy()
+        if self._own_holders is not None:
+            self._own_holders.add(name)
+        return holders
+
+    def update(self, game, from_name, to_name):
+        """from_name → to_name の好感度が変わったので重みを付け直す（脱落者は扱わない）"""
+        if not game.alive[from_name] or not game.alive[to_name]:
+            return
+        row = self._row_for_write(from_name, game.roles[from_name] == "グノーシア")
+        v = game.like_map[from_name][to_name]
+        row.update(to_name, v, game.rules.like_slope, game.roles[to_name] == "人間")
+        self._holders_for_write(to_name).add(from_name)
+
+    def remove(self, name):
+        """脱落した name の行を捨て、name が載っている行から外す"""
+        self.rows.pop(name, None)
+        for holder in self.holders.pop(name, ()):
+            if holder in self.rows:
+                self._row_for_write(holder, False).discard(name)
+
+_WEIGHTS_FROM_LIKES = object()  # スナップショットの weights（fork のときに好感度から作る）
+
+def weights_from_likes(game):
+    """game の好感度から WeightTable を作り直す。
+    行ごとの名前の並び（好感度が初めて変化した順）と重みが元と同じになるので、抽選も元と同じになる。"""
+    weights = WeightTable()
+    for from_name, row in game.like_map.items():
+        for to_name in row:
+            weights.update(game, from_name, to_name)
+    return weights
+
+def sample_rest(rng, pool, tree, exclude=None):
+    """pool のうち tree に載っていない（exclude 以外の）人から一様に1人選ぶ"""
+    n_rest = len(pool) - tree.count - (1 if exclude is not None and exclude in pool else 0)
+    if n_rest <= 0:
+        return None
+    if 2 * (tree.count + 1) < len(pool):
+        while True:
+            name = pool.choice(rng)
+            if name != exclude and name not in tree:
+                return name
+    rest = [n for n in pool if n != exclude and n not in tree]
+    return rest[rng.randrange(len(rest))]
+
+def sample_tree(rng, pool, tree, exclude=None, bonus_names=(), bonus=0.0):
+    """sample_sparse の WeightTree 版。tree に載っている人はその重み、それ以外は一律 1.0。
+    bonus_names の各人には重みに bonus を上乗せする（投票でプレイヤーを狙いやすくする分）。"""
+    n_rest = len(pool) - tree.count - (1 if exclude is not None and exclude in pool else 0)
+    bonus_total = bonus * len(bonus_names)
+    total = bonus_total + tree.total + n_rest
+    if total <= 0:
+        return None
+    u = rng.random() * total
+    if u < bonus_total:
+        return bonus_names[min(int(u / bonus), len(bonus_names) - 1)]
+    u -= bonus_total
+    if u < tree.total or n_rest <= 0:
+        return tree.find(min(u, tree.total))
+    return sample_rest(rng, pool, tree, exclude)
+
+
+# ---------------------------------------
+# ゲーム状態の初期化
+# ---------------------------------------
+def init_game(seed=None, npc_names=None, record_log=True, rules=None):
+    """新しいゲームを作って初期化する。seed を渡すと同じ展開を再現できる。
+    rules を渡すとバランス定数を差し替えた試合になる（省略時は DEFAULT_RULES）。"""
+    game = GameState(npc_names=npc_names, seed=seed, record_log=record_log, rules=rules)
+    all_names = game.all_names
+    rng = game.rng
+
+    # グノーシア人数を 1〜2 でランダム決定
+    game.gn_count = rng.choice(game.rules.gn_counts)
+    roles = {name: "人間" for name in all_names}
+    gnosias = rng.sample(all_names, game.gn_count)
+    for g in gnosias:
+        roles[g] = "グノーシア"
+    game.set_roles(roles)
+    if game.rules.belief_weight:
+        from inference import RoleBelief
+        game.beliefs = RoleBelief(len(all_names), game.rules, seed=game.seed)
+    elif len(all_names) >= SAMPLER_MIN_PLAYERS:
+        # 推理で重みを補正するときは毎回組み立て直すので、木は大人数かつ推理なしのときだけ
+        game.weights = WeightTable()
+    game.record(events.GAME_START)
+    game.checkpoint()
+    return game
+
+
+# ---------------------------------------
+# NPC発言（好感度反映）
+# ---------------------------------------
+def weight_from_like_for_suspicion(v, slope=0.3):
+    # 好感度が低いほど重く
+    return max(0.1, 1.0 + max(0.0, -slope * v))
+
+def weight_from_like_for_trust(v, slope=0.3):
+    # 好感度が高いほど重く
+    return max(0.1, 1.0 + slope * v)
+
+BELIEF_TOP = 8  # 推理を反映する相手の数（推理上いちばん怪しい順）
+
+def apply_beliefs(game, npc, special, suspect, suspicion):
+    """人間NPC npc の抽選の重み special を、役職推理 suspicion（RoleBelief.suspicion()）で補正する。
+    疑う・投票ではグノーシアらしい相手ほど重く、庇うでは軽くする。
+    大人数でも手間が一定になるよう、補正するのは怪しい順に BELIEF_TOP 人と、もともと special に居る人だけ。"""
+    if suspicion is None or game.roles[npc] != "人間":
+        return special
+    names = game.all_names
+    pool = game.alive_pool
+    seat_of = game.seat
+    p = suspicion[seat_of[npc]]
+    for seat in game.beliefs.top(BELIEF_TOP)[seat_of[npc]]:
+        name = names[seat]
+        if name != npc and name in pool:
+            special.setdefault(name, 1.0)
+    k = game.rules.belief_weight
+    for name, w in special.items():
+        factor = 1.0 + k * p[seat_of[name]]
+        special[name] = w * factor if suspect else w / factor
+    return special
+
+
+# ---------------------------------------
+# NPCの方針（差し替えできる）
+# ---------------------------------------
+TALK_ACTIONS = ["疑う", "庇う"]
+
+class Strategy:
+    """NPCの方針（発言・投票・『消す』相手の選び方）。
+    GameState.strategies で席ごとに差し替える（None なら全員 DEFAULT_STRATEGY）。
+    乱数は game.rng だけを使うこと（記録するゲームは手番ごとに作り直すので、同じ展開を再現できる）。
+    suspicion は役職推理の疑わしさ（RoleBelief.suspicion()。推理しない試合では None）。
+    状態を持たせるなら席ごとに別のインスタンスにすること（同じ方針の NPC どうしで共有される）。"""
+
+    name = "base"
+
+    def talk(self, game, npc, suspicion):
+        """議論での発言。("疑う" か "庇う", 相手) を返す"""
+        raise NotImplementedError
+
+    def vote(self, game, npc, suspicion):
+        """投票先を返す"""
+        raise NotImplementedError
+
+    def kill(self, game, gn_list, humans):
+        """夜に『消す』人間を返す（gn_list は生存グノーシア、humans は生存している人間。どちらも AliveSet）"""
+        raise NotImplementedError
+
+
+class DefaultStrategy(Strategy):
+    """元からの方針。好感度の低い相手を疑い・投票し、高い相手を庇う（役職推理があれば人間NPCはそれも重みに掛ける）。
+    投票では生存しているプレイヤーを少し狙いやすい。大人数ロビーでは WeightTable から同じ分布で選ぶ。"""
+
+    name = "default"
+
+    def talk(self, game, npc, suspicion):
+        rng = game.rng
+        rules = game.rules
+        if game.roles[npc] == "グノーシア":
+            action = rng.choices(TALK_ACTIONS, weights=rules.gn_talk_weights, k=1)[0]
+        else:
+            action = rng.choices(TALK_ACTIONS, weights=rules.human_talk_weights, k=1)[0]
+        pool = game.alive_pool
+
+        if game.weights is not None:
+            row = game.weights.row(npc)
+            tree = row.suspicion if action == "疑う" else row.trust
+            return action, sample_tree(rng, pool, tree, exclude=npc)
+
+        slope = rules.like_slope
+        likes = game.likes_of(npc)
+        if action == "疑う":
+            special = {c: weight_from_like_for_suspicion(v, slope) for c, v in likes.items() if c in pool}
+            apply_beliefs(game, npc, special, True, suspicion)
+        else:
+            special = {c: weight_from_like_for_trust(v, slope) for c, v in likes.items() if c in pool}
+            apply_beliefs(game, npc, special, False, suspicion)
+        return action, sample_sparse(rng, pool, special, 1.0, exclude=npc)
+
+    def vote(self, game, npc, suspicion):
+        pool = game.alive_pool
+        bias = game.rules.player_vote_bias
+        targets = tuple(p for p in game.players if game.alive[p])  # 狙われやすい生存プレイヤー
+        if game.weights is not None:
+            row = game.weights.row(npc)
+            return sample_tree(game.rng, pool, row.suspicion, exclude=npc, bonus_names=targets, bonus=bias)
+
+        # 好感度が低いほど重く
+        slope = game.rules.like_slope
+        likes = game.likes_of(npc)
+        special = {c: weight_from_like_for_suspicion(v, slope) for c, v in likes.items() if c in pool}
+        apply_beliefs(game, npc, special, True, suspicion)
+        for p in targets:
+            special[p] = special.get(p, 1.0) + bias
+        return sample_sparse(game.rng, pool, special, 1.0, exclude=npc)
+
+    def kill(self, game, gn_list, humans):
+        if game.weights is not None:
+            return gn_kill_target_from_trees(game, gn_list, humans)
+
+        # 各グノーシアの「好感度の低い人間」を重ね合わせるイメージで重みをつける。
+        # 好感度0の相手は1人につき 1.0 なので、全員に len(gn_list) を配り、差分だけ足す。
+        base = float(len(gn_list))
+        slope = game.rules.like_slope
+        special = {}
+        for gn in gn_list:
+            for h, v in game.likes_of(gn).items():
+                if h in humans:
+                    # 好感度が低いほど加点（狙われやすい）
+                    special[h] = special.get(h, base) + max(0.1, 1.0 + -slope * v) - 1.0
+
+        return sample_sparse(game.rng, humans, special, base)
+
+
+DEFAULT_STRATEGY = DefaultStrategy()
+STRATEGIES = {DEFAULT_STRATEGY.name: DEFAULT_STRATEGY}  # 名前 → 方針（register_strategy で足す）
+
+def strategy_name(strategy):
+    """方針の名前。name を決めていない方針はクラス名にする（基底の "base" のままだと別の方針と見分けがつかない）"""
+    name = getattr(strategy, "name", None)
+    if name is None or name == Strategy.name:
+        return type(strategy).__name__
+    return name
+
+def register_strategy(strategy):
+    """方針を名前で引けるように登録する（ワーカープロセスへは名前で渡すので、読み込み時に登録しておく）"""
+    STRATEGIES[strategy_name(strategy)] = strategy
+    return strategy
+
+def get_strategy(spec):
+    """名前（登録済み）か "モジュール:名前" で方針を返す。クラスならインスタンスにする。"""
+    if isinstance(spec, Strategy):
+        return spec
+    if spec not in STRATEGIES:
+        if ":" not in spec:
+            raise KeyError(f"知らない方針です: {spec}")
+        import importlib
+        module, attr = spec.split(":", 1)
+        obj = getattr(importlib.import_module(module), attr)
+        STRATEGIES[spec] = obj() if isinstance(obj, type) else obj
+    return STRATEGIES[spec]
+
+def npc_talks(game):
+    """NPCが順番に発言する（1ターン分）"""
+    if game.alive_count() <= 2:
+        return
+
+    game.begin_step(f"talk{game.discussion_turn + 1}")
+    rules = game.rules
+    beliefs = game.own("beliefs")
+    suspicion = beliefs.suspicion() if beliefs is not None else None
+    game.record(events.TALK_TURN, turn=game.discussion_turn + 1)
+
+    players = game.players
+    strategies = game.strategies
+    seat = game.seat
+    for npc in game.alive_names():
+        if npc in players:
+            continue
+
+        strategy = DEFAULT_STRATEGY if strategies is None else strategies[seat[npc]]
+        action, target = strategy.talk(game, npc, suspicion)
+        if beliefs is not None:
+            beliefs.observe_statement(seat[npc], action == "疑う")
+        if action == "疑う":
+            game.record(events.SUSPECT, npc, target)
+            change_like(game, target, npc, rules.like_delta_down)
+        else:
+            game.record(events.DEFEND, npc, target)
+            change_like(game, target, npc, rules.like_delta_up)
+
+    if beliefs is not None:
+        beliefs.commit()
+
+def advance_discussion(game):
+    """議論を1ターン進める"""
+    npc_talks(game)
+    game.discussion_turn += 1
+    game.touch()
+
+def end_discussion(game):
+    """規定ターンの議論を終えて投票フェーズへ移る"""
+    game.phase = "vote"
+    game.record(events.DISCUSSION_END)
+    game.checkpoint()
+
+
+# ---------------------------------------
+# プレイヤー発言 → 好感度反映
+# ---------------------------------------
+def apply_player_statement(game, target, action, speaker=PLAYER_NAME):
+    """プレイヤーの『target を疑う／庇う』に応じて、対象NPC→プレイヤーの好感度を更新。
+    speaker は発言した人（複数人で遊ぶときは game.players のだれか）。
+    脱落した人・自分自身を相手にした発言は何もしない。"""
+    if not game.alive.get(target) or target == speaker:
+        return
+
+    if action == "疑う":
+        game.record(events.PLAYER_SUSPECT, speaker, target)
+        change_like(game, target, speaker, game.rules.like_delta_down)
+    elif action == "庇う":
+        game.record(events.PLAYER_DEFEND, speaker, target)
+        change_like(game, target, speaker, game.rules.like_delta_up)
+    else:
+        return
+    if speaker == PLAYER_NAME:
+        game.player_statement = (target, action)
+
+
+# ---------------------------------------
+# 投票ロジック（好感度反映）
+# ---------------------------------------
+def npc_votes(game):
+    """NPCの投票先を決定（好感度低い相手狙い＋プレイヤー少し狙われやすい）"""
+    votes = {}
+    if game.alive_count() <= 1:
+        return votes
+
+    game.begin_step("vote")
+    suspicion = game.beliefs.suspicion() if game.beliefs is not None else None
+    players = game.players
+    strategies = game.strategies
+    seat = game.seat
+    for npc in game.alive_names():
+        if npc in players:
+            continue
+
+        strategy = DEFAULT_STRATEGY if strategies is None else strategies[seat[npc]]
+        votes[npc] = strategy.vote(game, npc, suspicion)
+
+    game.npc_votes = votes
+    return votes
+
+def apply_vote(game):
+    """昼の投票結果を適用（追放）"""
+    votes = {}
+    votes.update(game.npc_votes)
+
+    # 脱落したプレイヤーは投票しない（1人で遊ぶときのあなたは従来どおり脱落後もランダムに1票入る）
+    solo = len(game.players) == 1
+    for player in game.players:
+        if not game.alive[player] and not (solo and player == PLAYER_NAME):
+            continue
+        target = game.vote_targets.get(player)
+        if target is None:
+            target = sample_sparse(game.rng, game.alive_pool, {}, 1.0, exclude=player)
+        if target is not None:
+            votes[player] = target
+
+    counter = {}
+    for v in votes.values():
+        counter[v] = counter.get(v, 0) + 1
+
+    game.record(events.VOTE_START)
+    for voter, target in votes.items():
+        game.record(events.VOTE, voter, target)
+
+    max_votes = max(counter.values())
+    top_candidates = [name for name, cnt in counter.items() if cnt == max_votes]
+    eliminated = game.rng.choice(top_candidates)
+
+    game.eliminate(eliminated)
+    if game.beliefs is not None:
+        game.own("beliefs").observe_exile(game.seat[eliminated], game.roles[eliminated] == "グノーシア")
+    game.record(events.EXILE, target=eliminated)
+
+    # 追放後に即勝敗がつくかチェック（グノーシア全滅 or 人間≦グノ）
+    if check_win_condition(game):
+        return
+    # まだ続く場合は夜フェーズへ
+    game.phase = "night"
+    game.record(events.NIGHT_START)
+    game.checkpoint()
+
+
+# ---------------------------------------
+# 夜フェーズ：グノーシアによる襲撃
+# ---------------------------------------
+def gn_kill_target_for_npc(game):
+    """NPCグノーシアたちが協議したことにして、人間1人を選んで『消す』。
+    選び方は生存グノーシアのうち席順で最初の人の方針（Strategy.kill）で決まる。"""
+    # 生存しているグノーシア／人間
+    gn_list = game.alive_by_role["グノーシア"]
+    humans = game.alive_by_role["人間"]
+
+    if not gn_list or not humans:
+        return None
+
+    strategy = DEFAULT_STRATEGY
+    if game.strategies is not None:
+        leader = next(n for n in game.alive_order if n in gn_list)
+        strategy = game.strategies[game.seat[leader]]
+    return strategy.kill(game, gn_list, humans)
+
+def gn_kill_target_from_trees(game, gn_list, humans):
+    """gn_kill_target_for_npc の WeightTree 版。グノーシアごとの重み（好感度が変化していない人間は 1.0）を
+    足し合わせた分布から選ぶ。まずグノーシアを合計重みに比例して選び、その人の重みで1人選ぶのと同じ。"""
+    rows = []
+    total = 0.0
+    for gn in gn_list:
+        tree = game.weights.row(gn).kill or _EMPTY_TREE
+        row_total = tree.total + (len(humans) - tree.count)
+        rows.append((tree, row_total))
+        total += row_total
+    u = game.rng.random() * total
+    for tree, row_total in rows:
+        if u < row_total:
+            break
+        u -= row_total
+    if u < tree.total:
+        return tree.find(u)
+    return sample_rest(game.rng, humans, tree)
+
+def apply_night_kill(game, target):
+    """夜に対象を『消す』処理"""
+    if target is None:
+        return
+    if not game.alive.get(target, False):
+        return
+    game.eliminate(target)
+    game.record(events.KILL, target=target)
+    if game.beliefs is not None:
+        game.own("beliefs").observe_kill(game.seat[target])
+    check_win_condition(game)
+
+def player_kill_candidates(game, player=PLAYER_NAME):
+    """プレイヤー（player）が生存グノーシアなら『消す』候補の人間を返す（それ以外は None）"""
+    if game.roles[player] != "グノーシア" or not game.alive[player]:
+        return None
+    # 念のため、自分は含めない（自殺防止）
+    humans = game.alive_by_role["人間"]
+    return [n for n in game.alive_names() if n in humans and n != player]
+
+def start_next_day(game):
+    """次の日の朝へ進める"""
+    game.phase = "discussion"
+    game.discussion_turn = 0
+    game.day += 1
+    game.own("day_starts").append(len(game.events))
+    game.record(events.DAY_START)
+    game.checkpoint()
+
+def resolve_night(game, target=None):
+    """夜フェーズを処理して、決着していなければ次の日の朝へ進める。
+    target はプレイヤーがグノーシアのときに選んだ相手。None ならNPCグノーシアが選ぶ。"""
+    game.begin_step("night")
+    # グノーシアがいない or 人間がいない → 夜に誰も消えない（ほぼ該当しないが安全策）
+    if not game.alive_count("グノーシア") or not game.alive_count("人間"):
+        game.record(events.NO_KILL)
+        if not check_win_condition(game):
+            start_next_day(game)
+        return
+
+    if target is None:
+        target = gn_kill_target_for_npc(game)
+    apply_night_kill(game, target)
+    if not game.game_over:
+        start_next_day(game)
+
+
+# ---------------------------------------
+# 勝敗判定
+# ---------------------------------------
+def check_win_condition(game):
+    """勝敗判定。決着したら True を返す。"""
+    human_count = game.alive_count("人間")
+    gn_count = game.alive_count("グノーシア")
+
+    your_role = game.roles[PLAYER_NAME]
+
+    # グノーシア全滅 → 人間陣営勝ち
+    if gn_count == 0:
+        game.game_over = True
+        game.winner = "人間"
+        game.win = (your_role == "人間")
+        game.phase = "result"
+        game.record(events.HUMANS_WIN)
+        return True
+
+    # 人間数 <= グノーシア数 → グノーシア陣営勝ち
+    if human_count <= gn_count:
+        game.game_over = True
+        game.winner = "グノーシア"
+        game.win = (your_role == "グノーシア")
+        game.phase = "result"
+        game.record(events.GNOSIA_WIN)
+        return True
+
+    # 続行
+    game.game_over = False
+    game.win = None
+    if game.beliefs is not None:
+        game.own("beliefs").observe_alive(game.seat[n] for n in game.alive_order)
+    return False
+
+
+# ---------------------------------------
+# 自動進行
+# ---------------------------------------
+def needs_player_kill(game):
+    """夜フェーズでプレイヤー（生存グノーシア）の『消す』相手選びを待っているか"""
+    return game.phase == "night" and bool(player_kill_candidates(game))
+
+def settle(game):
+    """プレイヤーの入力が要らない遷移（規定ターン後の投票移行・NPCだけの夜）をまとめて進める"""
+    while not game.game_over:
+        if game.phase == "discussion" and game.discussion_turn >= game.rules.max_discussion_turns:
+            end_discussion(game)
+        elif game.phase == "night" and not needs_player_kill(game):
+            resolve_night(game)
+        else:
+            break
+    return game
+
+def vote(game, target=None, targets=None):
+    """プレイヤーの投票（None ならランダム）とNPCの投票をまとめて行い、追放まで進める。
+    targets は複数人で遊ぶときの各プレイヤーの投票先（名前 → 投票先。入っていない人はランダム）"""
+    game.vote_targets = dict(targets) if targets else {}
+    if target is not None:
+        game.vote_targets[PLAYER_NAME] = target
+    npc_votes(game)
+    apply_vote(game)
+    game.vote_targets = {}
+
+def advance(game, until, vote_target=None):
+    """入力待ちにならない限り、until まで一気に進める。
+    until: "vote"（投票フェーズの手前まで）/ "day"（次の日の朝まで）/ "end"（決着まで）
+    投票は vote_target（None ならランダム）。"end" ではプレイヤーがグノーシアでも
+    『消す』相手をNPCと同じ基準で選ぶ。"""
+    start_day = game.day
+    while not game.game_over:
+        if game.phase == "discussion":
+            if game.discussion_turn < game.rules.max_discussion_turns:
+                advance_discussion(game)
+            else:
+                end_discussion(game)
+        elif game.phase == "vote":
+            if until == "vote":
+                break
+            vote(game, vote_target)
+        elif game.phase == "night":
+            if until != "end" and needs_player_kill(game):
+                break
+            resolve_night(game)
+        if until == "day" and game.day > start_day:
+            break
+    return game
+
+def play_until_over(game):
+    """プレイヤーも自動で動かして、決着がつくまでゲームを進める（シミュレーション用）。
+    プレイヤーは発言せず、投票はランダム、グノーシアなら襲撃はNPCと同じ基準で選ぶ。"""
+    return advance(game, "end")
+
+
+# ---------------------------------------
+# ループ（巻き戻し・分岐）
+# ---------------------------------------
+PHASE_LABELS = {"discussion": "朝", "vote": "投票", "night": "夜"}
+
+def timeline_label(snap):
+    """timeline の1件の表示名"""
+    return f"{snap.day}日目・{PHASE_LABELS.get(snap.phase, snap.phase)}"
+
+def rewind(game, day, phase="discussion"):
+    """day 日目の phase の始まりに戻った新しいゲームを返す（無ければ None）。元のゲームはそのまま。
+    手番ごとの乱数は (シード, 日, 手番) で決まるので、プレイヤーが同じ行動をとれば同じ展開をくり返す。"""
+    for i, snap in enumerate(game.timeline):
+        if snap.day == day and snap.phase == phase:
+            return rewind_to(game, i)
+    return None
+
+def rewind_to(game, index):
+    """timeline の index 番目のスナップショットから続ける新しいゲーム"""
+    new = game.timeline[index].fork()
+    new.timeline = game.timeline[:index + 1]
+    return new
+
+def branch(game):
+    """今の状態から分岐した新しいゲームを返す。どちらを進めても、もう一方は変わらない。"""
+    return game.fork()
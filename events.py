@@ -0,0 +1,135 @@
+# events.py
+# ゲーム中の出来事を固定長のバイナリ列として記録するイベントログ
+# 表示用の文章はここから必要なときだけ組み立てる（engine.GameState.log_lines など）
+#
+# 1イベント = 8バイト: 種類(u8) 発言者(u16) 対象(u16) 日(u16) ターン(u8)
+# 発言者・対象は参加者の席番号（0 がプレイヤー）。該当なしは NONE。
+
+import struct
+
+RECORD = struct.Struct("<BHHHB")
+NONE = 0xFFFF
+
+# ---------------------------------------
+# イベントの種類
+# ---------------------------------------
+GAME_START = 1
+TALK_TURN = 2        # NPC発言ターンの見出し（turn = 何ターン目か）
+SUSPECT = 3          # speaker が target を疑う
+DEFEND = 4           # speaker が target を庇う
+PLAYER_SUSPECT = 5
+PLAYER_DEFEND = 6
+DISCUSSION_END = 7
+VOTE_START = 8
+VOTE = 9             # speaker が target に投票
+EXILE = 10           # target が追放された
+NIGHT_START = 11
+KILL = 12            # target が夜に消された
+NO_KILL = 13
+DAY_START = 14       # day 日目の朝
+HUMANS_WIN = 15
+GNOSIA_WIN = 16
+
+
+class EventLog:
+    """追記専用のイベント列。中身は bytearray 1本だけなので、文字列のログより桁違いに小さい。
+
+    view() で作る別の EventLog は同じ bytearray の先頭 end バイトを共有する（スナップショット・分岐用）。
+    追記は、自分の end が bytearray の末尾と一致していればその場で伸ばし、
+    そうでなければ（別のログが先に伸ばした＝分岐した）自分の分だけ複製してから伸ばす。
+    共有している他のログからは自分の end より先しか変わらないので、どのログの中身も書き換わらない。"""
+
+    __slots__ = ("buf", "end")
+
+    def __init__(self, data=b""):
+        self.buf = bytearray(data)
+        self.end = len(self.buf)
+
+    def __len__(self):
+        return self.end // RECORD.size
+
+    def __iter__(self):
+        return RECORD.iter_unpack(memoryview(self.buf)[:self.end])
+
+    def __getitem__(self, i):
+        if not 0 <= i * RECORD.size < self.end:
+            raise IndexError(i)
+        return RECORD.unpack_from(self.buf, i * RECORD.size)
+
+    def append(self, kind, speaker=NONE, target=NONE, day=0, turn=0):
+        if self.end != len(self.buf):
+            self.buf = self.buf[:self.end]
+        self.buf += RECORD.pack(kind, speaker, target, day, turn)
+        self.end = len(self.buf)
+
+    def view(self):
+        """今の中身を共有する別のログ（複製しない）"""
+        log = EventLog.__new__(EventLog)
+        log.buf = self.buf
+        log.end = self.end
+        return log
+
+    def slice(self, start, end=None):
+        """start 番目から end 番目の手前までのイベントを返す"""
+        size = RECORD.size
+        stop = self.end if end is None else min(end * size, self.end)
+        return RECORD.iter_unpack(memoryview(self.buf)[start * size:stop])
+
+    def to_bytes(self):
+        return bytes(memoryview(self.buf)[:self.end])
+
+
+# ---------------------------------------
+# 表示用の文章
+# ---------------------------------------
+def render_event(event, names, roles, max_turns):
+    """1イベントぶんの表示行をリストで返す"""
+    kind, speaker, target, day, turn = event
+    who = names[speaker] if speaker != NONE else None
+    whom = names[target] if target != NONE else None
+
+    if kind == SUSPECT:
+        return [f"{who}：{whom}が怪しい気がする……。"]
+    if kind == DEFEND:
+        return [f"{who}：{whom}は信用してもよさそうだね。"]
+    if kind == VOTE:
+        return [f"{who} → {whom}"]
+    if kind == TALK_TURN:
+        return ["", f"―― NPCたちの発言（{day}日目・{turn}/{max_turns}ターン）――"]
+    if kind == PLAYER_SUSPECT:
+        return [f"{who}：{whom}を**疑う**"]
+    if kind == PLAYER_DEFEND:
+        return [f"{who}：{whom}を**庇う**"]
+    if kind == DISCUSSION_END:
+        return ["―― 議論終了。投票タイムへ移行 ――"]
+    if kind == VOTE_START:
+        return ["―― 投票結果 ――"]
+    if kind == EXILE:
+        return [f"【{whom}】が追放されました。（正体：{roles[whom]}）"]
+    if kind == NIGHT_START:
+        return ["", "―― 夜がやってきた……グノーシアが誰かを『消す』 ――"]
+    if kind == KILL:
+        return [f"【{whom}】が夜の間に『消されて』しまった……。（正体：{roles[whom]}）"]
+    if kind == NO_KILL:
+        return ["この夜には誰も『消されなかった』ようだ……。"]
+    if kind == DAY_START:
+        return ["", f"―― 第{day}日 朝 ――"]
+    if kind == HUMANS_WIN:
+        return ["グノーシアはすべて排除されました！"]
+    if kind == GNOSIA_WIN:
+        return ["人間よりグノーシアの数が多くなってしまった……。"]
+    if kind == GAME_START:
+        return [
+            f"🌌 **ゲーム開始！** あなたを含む{len(names)}人の中に、グノーシアが1〜2人います。",
+            "あなたの役職はサイドバーで確認してください。",
+            "議論→投票→夜の襲撃を繰り返し、勝利を目指しましょう！",
+            f"※1日あたり議論はちょうど{max_turns}ターン行われます。",
+        ]
+    return []
+
+def render_events(events, names, roles, max_turns):
+    """イベント列を表示行のリストにする"""
+    lines = []
+    for event in events:
+        lines.extend(render_event(event, names, roles, max_turns))
+    return lines
@@ -0,0 +1,272 @@
+# inference.py
+# NPCの役職推理（誰がグノーシアかの事後確率）
+#
+# 仮説 = 「グノーシアが誰か」の割り当て1通り。仮説を行、参加者を列にした真偽表 table を持ち、
+# 仮説ごとの対数重み logw を出来事のたびに更新する。
+#   - 発言（疑う／庇う）: グノーシアと人間で「疑う」を選ぶ確率が違うので、発言者を含む仮説と含まない仮説で重みが変わる
+#   - 夜に消された人  : グノーシアは消されないので、その人を含む仮説を捨てる
+#   - 追放された人    : 正体が公開されるので、その人の役職が食い違う仮説を捨てる
+#   - 決着しなかった  : その時点の生存者で決着してしまう仮説（グノーシア全滅・人間≦グノーシア）を捨てる
+# 投票そのものは役職によらず好感度だけで決まるので、投票日の情報は追放された人の正体と決着の有無として入る。
+#
+# 1ターンの発言はまとめて反映する（commit）。NPCはターンの最初の推理をもとに発言するので、
+# 重い計算はターンに1回で済み、NPCごとの手間は suspicion() の1行を読むだけになる。
+#
+# 仮説の数が MAX_HYPOTHESES 以下なら全割り当てを列挙した表（人数と人数候補ごとに共有）で厳密に計算する。
+# それより多い大人数ロビーでは、仮説を N_PARTICLES 個の標本（粒子）で近似し、
+# 重みが偏ったら引き直して入れ替え提案（MH法）で散らす。1回の更新・参照が数ミリ秒に収まる大きさにしてある。
+
+import copy
+import itertools
+import math
+
+import numpy as np
+
+MAX_HYPOTHESES = 5000  # これを超える人数では粒子近似に切り替える
+N_PARTICLES = 1024
+MH_SWEEPS = 2          # 引き直しのあとの入れ替え提案の回数
+
+_TABLES = {}  # (人数, グノーシア人数の候補) → (table, 事前の対数重み)
+
+
+def assignment_table(n_players, gn_counts):
+    """全割り当ての真偽表と事前の対数重み（人数は等確率、同じ人数の割り当ては等確率）"""
+    key = (n_players, tuple(gn_counts))
+    cached = _TABLES.get(key)
+    if cached is not None:
+        return cached
+    rows = []
+    prior = []
+    for k in gn_counts:
+        logp = -math.log(len(gn_counts)) - math.log(math.comb(n_players, k))
+        for members in itertools.combinations(range(n_players), k):
+            row = np.zeros(n_players, dtype=bool)
+            row[list(members)] = True
+            rows.append(row)
+            prior.append(logp)
+    table = np.array(rows, dtype=bool)
+    table.setflags(write=False)
+    cached = _TABLES[key] = (table, table.astype(float), np.array(prior))
+    return cached
+
+def hypothesis_count(n_players, gn_counts):
+    return sum(math.comb(n_players, k) for k in gn_counts)
+
+
+class RoleBelief:
+    """全員に共通の（公開情報だけからの）役職推理。
+    各NPCの推理は suspicion() の行として、「自分は人間」という知識を足して取り出す。"""
+
+    def __init__(self, n_players, rules, seed=0):
+        self.n_players = n_players
+        self.gn_counts = tuple(rules.gn_counts)
+        # 発言ごとの対数尤度の差（グノーシア − 人間）
+        gn_s, gn_d = rules.gn_talk_weights
+        hu_s, hu_d = rules.human_talk_weights
+        self.llr_suspect = math.log(gn_s / (gn_s + gn_d)) - math.log(hu_s / (hu_s + hu_d))
+        self.llr_defend = math.log(gn_d / (gn_s + gn_d)) - math.log(hu_d / (hu_s + hu_d))
+
+        self.llr = np.zeros(n_players)                     # 参加者ごとの対数尤度の差の累計
+        self.known_human = np.zeros(n_players, dtype=bool)  # 消された・追放されたので人間と分かっている人
+        self.known_gnosia = np.zeros(n_players, dtype=bool) # 追放されてグノーシアと分かった人
+        self.alive_checks = []                              # 決着しなかった時点の生存者（bool 配列）
+        self._pending = []                                  # まだ反映していない発言 (席, 対数尤度の差)
+        self._weights = None
+        self._marginals = None
+        self._suspicion = None
+        self._top = {}
+
+        self.exact = hypothesis_count(n_players, self.gn_counts) <= MAX_HYPOTHESES
+        if self.exact:
+            self.table, self._table_f, prior = assignment_table(n_players, self.gn_counts)
+            self.logw = prior.copy()
+        else:
+            self.rng = np.random.default_rng(seed)
+            self.table = self._sample_prior(N_PARTICLES)
+            self._table_f = None
+            self.logw = np.zeros(N_PARTICLES)
+
+    def copy(self):
+        """書き換える配列だけを複製した RoleBelief（GameState.snapshot 用。真偽表は共有する）"""
+        other = RoleBelief.__new__(RoleBelief)
+        other.__dict__.update(self.__dict__)
+        other.llr = self.llr.copy()
+        other.known_human = self.known_human.copy()
+        other.known_gnosia = self.known_gnosia.copy()
+        other.alive_checks = list(self.alive_checks)
+        other._pending = list(self._pending)
+        other.logw = self.logw.copy()
+        other._top = dict(self._top)
+        if not self.exact:
+            other.rng = copy.deepcopy(self.rng)
+        return other
+
+    # ---------------- 観測 ----------------
+    def observe_statement(self, seat, suspect):
+        """NPC seat の発言（suspect=True なら疑う、False なら庇う）。commit するまで反映しない。"""
+        self._pending.append((seat, self.llr_suspect if suspect else self.llr_defend))
+
+    def commit(self):
+        """ためておいた発言をまとめて反映する"""
+        if not self._pending:
+            return
+        delta = np.zeros(self.n_players)
+        for seat, d in self._pending:
+            delta[seat] += d
+        self._pending.clear()
+        self.llr += delta
+        table_f = self._table_f if self.exact else self.table.astype(float)
+        self.logw += table_f @ delta
+        self._changed()
+
+    def observe_kill(self, seat):
+        """seat が夜に消された（＝人間）"""
+        self.commit()
+        self.known_human[seat] = True
+        self.logw[self.table[:, seat]] = -np.inf
+        self._changed()
+
+    def observe_exile(self, seat, is_gnosia):
+        """seat が追放され、正体（is_gnosia）が公開された"""
+        self.commit()
+        if is_gnosia:
+            self.known_gnosia[seat] = True
+            self.logw[~self.table[:, seat]] = -np.inf
+        else:
+            self.known_human[seat] = True
+            self.logw[self.table[:, seat]] = -np.inf
+        self._changed()
+
+    def observe_alive(self, alive_seats):
+        """alive_seats が生き残った状態で決着しなかった"""
+        self.commit()
+        alive = np.zeros(self.n_players, dtype=bool)
+        alive[list(alive_seats)] = True
+        self.alive_checks.append(alive)
+        self.logw[~self._consistent(self.table, alive)] = -np.inf
+        self._changed()
+
+    def _consistent(self, table, alive):
+        gn_alive = table[:, alive].sum(axis=1)
+        human_alive = alive.sum() - gn_alive
+        return (gn_alive > 0) & (human_alive > gn_alive)
+
+    def _changed(self):
+        self._weights = None
+        self._marginals = None
+        self._suspicion = None
+        self._top = {}
+        if not self.exact:
+            self._maybe_resample()
+            self._weights = None
+
+    # ---------------- 参照 ----------------
+    def weights(self):
+        """仮説ごとの確率（正規化済み）"""
+        if self._weights is None:
+            finite = np.isfinite(self.logw)
+            w = np.zeros(len(self.logw))
+            if finite.any():
+                w[finite] = np.exp(self.logw[finite] - self.logw[finite].max())
+                w /= w.sum()
+            self._weights = w
+        return self._weights
+
+    def marginals(self):
+        """参加者ごとの「グノーシアである確率」（公開情報のみ）"""
+        if self._marginals is None:
+            table = self._table_f if self.exact else self.table
+            self._marginals = self.weights() @ table
+        return self._marginals
+
+    def suspicion(self):
+        """S[i, g] = 人間NPC i から見た g がグノーシアである確率（自分は 0）。
+        厳密モードでは「i を含まない仮説」だけで i ごとに計算し直す（行列積1回）。
+        粒子近似では公開の確率を 1 − P(i) で割って近似する（グノーシア1人なら厳密に一致）。"""
+        if self._suspicion is None:
+            if self.exact:
+                w = self.weights()
+                not_i = w[:, None] * (1.0 - self._table_f)   # 仮説 h の重み × [i は人間]
+                z = not_i.sum(axis=0)
+                s = not_i.T @ self._table_f
+                s = np.divide(s, z[:, None], out=np.zeros_like(s), where=z[:, None] > 0)
+            else:
+                m = self.marginals()
+                rest = 1.0 - m
+                s = np.minimum(1.0, m[None, :] / np.where(rest > 0, rest, np.inf)[:, None])
+            np.fill_diagonal(s, 0.0)
+            self._suspicion = s
+        return self._suspicion
+
+    def top(self, k):
+        """各NPCから見て怪しい上位 k 人の席番号（行 i が NPC i から見た上位。順不同）"""
+        top = self._top.get(k)
+        if top is None:
+            if k >= self.n_players:
+                top = [list(range(self.n_players))] * self.n_players
+            else:
+                top = np.argpartition(-self.suspicion(), k, axis=1)[:, :k].tolist()
+            self._top[k] = top
+        return top
+
+    # ---------------- 粒子近似 ----------------
+    def _sample_prior(self, n):
+        """事前分布（人数は等確率、候補は正体の分かった人以外から一様）から n 個の割り当てを引く。
+        追放されてグノーシアと分かった人は必ず含める。"""
+        known = np.flatnonzero(self.known_gnosia)
+        candidates = np.flatnonzero(~self.known_human & ~self.known_gnosia)
+        counts = [k for k in self.gn_counts if k >= len(known)] or list(self.gn_counts)
+        table = np.zeros((n, self.n_players), dtype=bool)
+        table[:, known] = True
+        ks = self.rng.choice(counts, size=n)
+        keys = self.rng.random((n, len(candidates)))
+        order = np.argsort(keys, axis=1)
+        for k in set(ks.tolist()):
+            rows = np.flatnonzero(ks == k)
+            picked = candidates[order[rows, :max(0, k - len(known))]]
+            table[rows[:, None], picked] = True
+        return table
+
+    def _maybe_resample(self):
+        """有効な粒子数が半分を切ったら重みに比例して引き直し、入れ替え提案で散らす"""
+        w = self.weights()
+        if not w.any():
+            # すべての粒子が矛盾した：事前分布から引き直して、分かっている制約を当てはめる
+            self.table = self._sample_prior(N_PARTICLES)
+            self.logw = self.table @ self.llr
+            for alive in self.alive_checks:
+                self.logw[~self._consistent(self.table, alive)] = -np.inf
+            self._weights = None
+            w = self.weights()
+            if not w.any():
+                self.logw = np.zeros(N_PARTICLES)
+                return
+        if 1.0 / np.sum(w * w) >= N_PARTICLES / 2:
+            return
+        # 系統抽出で引き直す
+        positions = (self.rng.random() + np.arange(N_PARTICLES)) / N_PARTICLES
+        idx = np.minimum(np.searchsorted(np.cumsum(w), positions), len(w) - 1)
+        self.table = self.table[idx]
+        self.logw = np.zeros(N_PARTICLES)
+        for _ in range(MH_SWEEPS):
+            self._mh_sweep()
+
+    def _mh_sweep(self):
+        """各粒子で「グノーシア1人と、それ以外の1人」の入れ替えを提案し、事後確率の比で受け入れる
+        （正体の分かった人は動かさない）"""
+        n = len(self.table)
+        table = self.table
+        movable = table & ~self.known_gnosia
+        eligible = ~table & ~self.known_human
+        out_seat = np.argmax(movable * self.rng.random(table.shape), axis=1)
+        in_seat = np.argmax(eligible * self.rng.random(table.shape), axis=1)
+        valid = movable.any(axis=1) & eligible.any(axis=1)
+        rows = np.arange(n)
+
+        proposed = table.copy()
+        proposed[rows, out_seat] = False
+        proposed[rows, in_seat] = True
+        accept = valid & (np.log(self.rng.random(n)) < self.llr[in_seat] - self.llr[out_seat])
+        for alive in self.alive_checks:
+            accept &= self._consistent(proposed, alive)
+        self.table = np.where(accept[:, None], proposed, table)
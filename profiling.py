@@ -0,0 +1,233 @@
+# profiling.py
+# 任意で有効にできる計測フック
+# フェーズ関数ごとの処理時間・画面の再実行1回の時間・描画したログ行数・ゲームの乱数を引いた回数を集め、
+# 直近の値から分位点を出す。結果は JSON / Prometheus テキスト形式で書き出せる。
+#
+# 有効にする: 環境変数 GNOSIA_PROFILE=1（書き出し先は GNOSIA_METRICS_DIR、既定はカレント）
+# 有効なときは import した時点で engine の関数を差し替えるので、engine から名前を取り込む前に import すること。
+
+import functools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import engine
+
+WINDOW = 1000            # 分位点を出すときに使う直近の件数
+QUANTILES = (0.5, 0.9, 0.99)
+EXPORT_INTERVAL = 10.0   # ファイルへ書き出す最短間隔（秒）
+
+# 計測するフェーズ関数（engine のモジュール関数を差し替える）
+PHASE_FUNCTIONS = [
+    "npc_talks",
+    "apply_player_statement",
+    "npc_votes",
+    "apply_vote",
+    "gn_kill_target_for_npc",
+    "resolve_night",
+    "check_win_condition",
+    "advance",
+    "settle",
+]
+
+
+# ---------------------------------------
+# 集計
+# ---------------------------------------
+class RollingStats:
+    """直近 WINDOW 件の値と、これまでの合計・件数"""
+
+    __slots__ = ("samples", "total", "count")
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.total += value
+        self.count += 1
+
+    def quantiles(self, qs=QUANTILES):
+        if not self.samples:
+            return {q: 0.0 for q in qs}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {q: ordered[min(last, int(q * len(ordered)))] for q in qs}
+
+
+class Profiler:
+    """処理時間と回数の集計。Streamlit のセッションはスレッドごとに動くのでロックで守る。"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timers = {}    # 名前 → RollingStats（秒）
+        self.counters = {}  # 名前 → 回数
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self.timers.get(name)
+            if stats is None:
+                stats = self.timers[name] = RollingStats()
+            stats.add(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timed(self, name):
+        """with 文の中の処理時間を name で記録する"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def wrap(self, name, func):
+        """func を呼ぶたびに処理時間を記録する関数を返す"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(name, time.perf_counter() - start)
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    # ---------------- 書き出し ----------------
+    def snapshot(self):
+        """JSON にできる形の集計結果"""
+        with self._lock:
+            timers = {
+                name: {
+                    "count": stats.count,
+                    "sum_seconds": stats.total,
+                    **{f"p{int(q * 100)}": v for q, v in stats.quantiles().items()},
+                }
+                for name, stats in self.timers.items()
+            }
+            return {"timers": timers, "counters": dict(self.counters)}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2, sort_keys=True)
+
+    def to_prometheus(self):
+        """Prometheus のテキスト形式"""
+        with self._lock:
+            lines = [
+                "# HELP gnosia_phase_seconds Time spent in each phase function or rerun.",
+                "# TYPE gnosia_phase_seconds summary",
+            ]
+            for name, stats in sorted(self.timers.items()):
+                for q, v in stats.quantiles().items():
+                    lines.append(f'gnosia_phase_seconds{{phase="{name}",quantile="{q}"}} {v:.9f}')
+                lines.append(f'gnosia_phase_seconds_sum{{phase="{name}"}} {stats.total:.9f}')
+                lines.append(f'gnosia_phase_seconds_count{{phase="{name}"}} {stats.count}')
+            for name, n in sorted(self.counters.items()):
+                metric = f"gnosia_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {n}")
+            return "\n".join(lines) + "\n"
+
+    def export(self, directory, force=False):
+        """metrics.json と metrics.prom を directory に書き出す（EXPORT_INTERVAL ごとに1回まで）。
+        複数のセッションが同時に書き出しても混ざらないよう、一時ファイルは書き出しごとに別の名前にして置き換える。"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_export < EXPORT_INTERVAL:
+                return False
+            self._last_export = now
+        os.makedirs(directory, exist_ok=True)
+        for filename, text in (("metrics.json", self.to_json()), ("metrics.prom", self.to_prometheus())):
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=directory, prefix=filename + ".", suffix=".tmp", delete=False
+            ) as f:
+                f.write(text)
+            try:
+                os.replace(f.name, os.path.join(directory, filename))
+            except OSError:
+                os.unlink(f.name)
+                raise
+        return True
+
+
+# ---------------------------------------
+# 乱数の呼び出し回数
+# ---------------------------------------
+class CountingRandom(random.Random):
+    """乱数を引くたびに profiler の rng_draws を数える random.Random（profiler が None なら PROFILER）。
+    choice / choices / sample / shuffle はどれも random か getrandbits を通るので、
+    この2つで数えれば呼び出し元によらず1回引くごとに1回になる。"""
+
+    profiler = None
+
+    def random(self):
+        (self.profiler or PROFILER).count("rng_draws")
+        return super().random()
+
+    def getrandbits(self, k):
+        (self.profiler or PROFILER).count("rng_draws")
+        return super().getrandbits(k)
+
+def counting_random(profiler):
+    """profiler に数えさせる CountingRandom のクラス（PROFILER ならそのまま。pickle できるのはこちら）"""
+    if profiler is PROFILER:
+        return CountingRandom
+    return type("CountingRandom", (CountingRandom,), {"profiler": profiler, "__module__": __name__})
+
+
+# ---------------------------------------
+# 組み込み
+# ---------------------------------------
+PROFILER = Profiler(enabled=os.environ.get("GNOSIA_PROFILE") == "1")
+METRICS_DIR = os.environ.get("GNOSIA_METRICS_DIR", ".")
+
+_installed = False
+
+def install(profiler=None):
+    """engine のフェーズ関数を計測つきに差し替え、以後のゲームの乱数を CountingRandom にする。
+    engine 内部の呼び出しはモジュール変数を経由するので、差し替え後はそちらも計測される。"""
+    global _installed
+    if _installed:
+        return
+    profiler = PROFILER if profiler is None else profiler
+    for name in PHASE_FUNCTIONS:
+        setattr(engine, name, profiler.wrap(name, getattr(engine, name)))
+    engine.RNG_CLASS = counting_random(profiler)
+    _installed = True
+
+def uninstall():
+    """install で差し替えた関数を元に戻す"""
+    global _installed
+    if not _installed:
+        return
+    for name in PHASE_FUNCTIONS:
+        setattr(engine, name, getattr(engine, name).__wrapped__)
+    engine.RNG_CLASS = random.Random
+    _installed = False
+
+
+if PROFILER.enabled:
+    install()
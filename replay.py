@@ -0,0 +1,147 @@
+# replay.py
+# イベントログからゲームを復元する（保存・読み込み・指定日までの早送り）
+#
+# 乱数は手番ごとに engine.step_seed から作り直しているので、どの時点まで復元した状態からでも
+# 同じ操作で続ければ、元の試合とまったく同じ展開になる。
+# 早送りはイベントを順に当てはめるだけで、NPCの抽選はやり直さない。
+
+import struct
+
+import events
+from engine import PLAYER_NAME, change_like, init_game, make_roster
+
+MAGIC = b"GNEV"
+VERSION = 1
+HEADER = struct.Struct("<4sBQHI")  # マジック, 版, シード, NPC人数, 名前ブロックの長さ
+
+
+# ---------------------------------------
+# 保存形式
+# ---------------------------------------
+def dump_game(game):
+    """シードと名簿とイベント列を1つのバイト列にする。
+    名簿が make_roster の既定どおりなら名前は保存しない。"""
+    names = b""
+    if list(game.npc_names) != make_roster(len(game.npc_names)):
+        names = "\n".join(game.npc_names).encode("utf-8")
+    header = HEADER.pack(MAGIC, VERSION, game.seed, len(game.npc_names), len(names))
+    return header + names + game.events.to_bytes()
+
+def parse_game(data):
+    """dump_game のバイト列を (シード, NPC名簿, EventLog) に分解する。
+    途中で切れている・形式が違うバイト列は ValueError にする。"""
+    if len(data) < HEADER.size:
+        raise ValueError("イベントログが途中で切れています")
+    magic, version, seed, n_npcs, names_len = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("イベントログの形式が違います")
+    offset = HEADER.size
+    body = len(data) - offset - names_len
+    if body < events.RECORD.size or body % events.RECORD.size:
+        raise ValueError("イベントログが途中で切れています")
+    if names_len:
+        try:
+            npc_names = bytes(data[offset:offset + names_len]).decode("utf-8").split("\n")
+        except UnicodeDecodeError as e:
+            raise ValueError("イベントログの名簿が壊れています") from e
+        if len(npc_names) != n_npcs:
+            raise ValueError("イベントログの名簿が壊れています")
+    else:
+        npc_names = make_roster(n_npcs)
+    return seed, npc_names, events.EventLog(data[offset + names_len:])
+
+def load_game(data, until_day=None, rules=None):
+    """保存したバイト列からゲームを復元する。until_day を渡すとその日の朝で止める。
+    既定以外の rules で遊んだゲームは、同じ rules を渡すこと（rules は保存していない）。"""
+    seed, npc_names, log = parse_game(data)
+    return rebuild(seed, npc_names, log, until_day=until_day, rules=rules)
+
+
+# ---------------------------------------
+# 復元
+# ---------------------------------------
+def rebuild(seed, npc_names, log, until_day=None, rules=None):
+    """イベントを順に当てはめてゲーム状態を作り直す。
+    until_day を渡すと、その日の朝（議論開始前）の状態で止める。
+    席番号が名簿に無いなど、当てはめられないイベントがあれば ValueError にする。"""
+    game = init_game(seed=seed, npc_names=npc_names, rules=rules)
+    try:
+        _apply_log(game, log, until_day)
+    except (IndexError, KeyError) as e:
+        raise ValueError("イベントログが壊れています") from e
+    if game.beliefs is not None:
+        game.own("beliefs").commit()
+    return game
+
+def _apply_log(game, log, until_day):
+    """log のイベントを順に当てはめる（rebuild の本体）"""
+    for i, event in enumerate(log):
+        if not i and event[0] != events.GAME_START:
+            raise ValueError("イベントログが GAME_START から始まっていません")
+        if i:
+            # 先頭の GAME_START は init_game が記録済み。途中のスナップショットが
+            # その時点までのログを持てるよう、当てはめながら記録し直す
+            game.events.append(*event)
+            game.touch()
+        apply_event(game, event, i)
+        if until_day is not None and event[0] in (events.GAME_START, events.DAY_START):
+            if event[3] >= until_day:
+                break
+
+def apply_event(game, event, index):
+    """1イベントぶんの結果をゲーム状態に反映する（記録はしない）"""
+    kind, speaker, target, day, turn = event
+    names = game.all_names
+    rules = game.rules
+    beliefs = game.own("beliefs")
+    if beliefs is not None and kind != events.SUSPECT and kind != events.DEFEND:
+        # NPCの発言はターンの終わりにまとめて反映する（engine.npc_talks と同じ区切り）
+        beliefs.commit()
+
+    if kind == events.SUSPECT or kind == events.PLAYER_SUSPECT:
+        if beliefs is not None and kind == events.SUSPECT:
+            beliefs.observe_statement(speaker, True)
+        change_like(game, names[target], names[speaker], rules.like_delta_down)
+        if speaker == 0:
+            game.player_statement = (names[target], "疑う")
+    elif kind == events.DEFEND or kind == events.PLAYER_DEFEND:
+        if beliefs is not None and kind == events.DEFEND:
+            beliefs.observe_statement(speaker, False)
+        change_like(game, names[target], names[speaker], rules.like_delta_up)
+        if speaker == 0:
+            game.player_statement = (names[target], "庇う")
+    elif kind == events.TALK_TURN:
+        game.discussion_turn = turn
+    elif kind == events.DISCUSSION_END:
+        game.phase = "vote"
+        game.checkpoint()
+    elif kind == events.VOTE_START:
+        game.npc_votes = {}
+    elif kind == events.VOTE:
+        # プレイヤーの票は毎回その場で決めるので、状態には残さない
+        if names[speaker] != PLAYER_NAME:
+            game.npc_votes[names[speaker]] = names[target]
+    elif kind == events.EXILE or kind == events.KILL:
+        game.eliminate(names[target])
+        if beliefs is not None and kind == events.KILL:
+            beliefs.observe_kill(target)
+        elif beliefs is not None:
+            beliefs.observe_exile(target, game.roles[names[target]] == "グノーシア")
+    elif kind == events.NIGHT_START:
+        game.phase = "night"
+        if beliefs is not None:
+            beliefs.observe_alive(game.seat[n] for n in game.alive_order)
+        game.checkpoint()
+    elif kind == events.DAY_START:
+        if beliefs is not None:
+            beliefs.observe_alive(game.seat[n] for n in game.alive_order)
+        game.phase = "discussion"
+        game.discussion_turn = 0
+        game.day = day
+        game.own("day_starts").append(index)
+        game.checkpoint()
+    elif kind == events.HUMANS_WIN or kind == events.GNOSIA_WIN:
+        game.game_over = True
+        game.winner = "人間" if kind == events.HUMANS_WIN else "グノーシア"
+        game.win = (game.roles[PLAYER_NAME] == game.winner)
+        game.phase = "result"
@@ -0,0 +1,275 @@
+# results_store.py
+# 終わった試合の結果を列ごとの固定長ファイルに追記し、メモリマップで集計する
+#
+# ディレクトリ構成（1列 = 1ファイル。中身はリトルエンディアンの生の配列）
+#   meta.json            : 列の型と、確定済みの行数（試合数）
+#   <列名>.col           : 固定長の列（1試合1要素）
+#   <列名>.values        : 可変長の列の中身（全試合ぶんを連結）
+#   <列名>.offsets       : 可変長の列で、各試合の終わりの位置（u8）
+# 追記は列ファイルを書いてから meta.json を置き換えるので、途中で落ちても meta.json の行数までは壊れない。
+# 開いたときに列ファイルが meta.json の行数より短ければ、書き足しでは起こらない壊れ方なので ValueError にする。
+# 書き込みは1プロセスから（simulate.run_batch はワーカーの結果を親プロセスでまとめて書く）。
+#
+# 試合の行を集めるだけの GameRecords は標準ライブラリの array だけで動く（ワーカー側で numpy を要らない）。
+# 読み出しの ResultsStore は numpy.memmap で列を開き、Python のオブジェクトを作らずに集計する。
+
+import json
+import os
+from array import array
+
+import numpy as np
+
+from engine import PLAYER_NAME
+
+VERSION = 2  # 2: 好感度の列を浮動小数点に（Rules の好感度の変化量は小数でもよい）
+
+# 固定長の列（列名 → (array の型コード, numpy の型)）
+COLUMNS = {
+    "seed": ("Q", "<u8"),
+    "n_players": ("H", "<u2"),
+    "gn_count": ("B", "u1"),
+    "winner": ("B", "u1"),            # 0 = 人間, 1 = グノーシア
+    "player_role": ("B", "u1"),       # 0 = 人間, 1 = グノーシア
+    "player_alive": ("B", "u1"),
+    "days": ("H", "<u2"),             # 決着した日
+    "like_pairs": ("I", "<u4"),       # 好感度が変化した組の数
+    "like_sum": ("d", "<f8"),
+    "like_min": ("f", "<f4"),
+    "like_max": ("f", "<f4"),
+    "player_like_sum": ("d", "<f8"),  # NPCからプレイヤーへの好感度の合計
+}
+# 可変長の列（席番号の並び）
+RAGGED = {
+    "elim_order": ("H", "<u2"),       # 脱落した順
+    "gn_seats": ("H", "<u2"),         # グノーシアの席
+}
+FACTIONS = ["人間", "グノーシア"]
+
+
+# ---------------------------------------
+# 行を集める（numpy 不要）
+# ---------------------------------------
+class GameRecords:
+    """試合結果の行を列ごとの array にためる。pickle できるのでワーカーからそのまま返せる。"""
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, (code, _) in COLUMNS.items()}
+        self.values = {name: array(code) for name, (code, _) in RAGGED.items()}
+        self.lengths = {name: array("I") for name in RAGGED}
+
+    def __len__(self):
+        return len(self.columns["seed"])
+
+    def add(self, game):
+        """決着した game の結果を1行足す"""
+        seat = game.seat
+        c = self.columns
+        c["seed"].append(game.seed)
+        c["n_players"].append(len(game.all_names))
+        c["gn_count"].append(game.gn_count)
+        c["winner"].append(FACTIONS.index(game.winner))
+        c["player_role"].append(FACTIONS.index(game.roles[PLAYER_NAME]))
+        c["player_alive"].append(int(game.alive[PLAYER_NAME]))
+        c["days"].append(game.day)
+
+        pairs = total = 0
+        low = high = 0
+        to_player = 0
+        for from_name, row in game.like_map.items():
+            for to_name, v in row.items():
+                pairs += 1
+                total += v
+                low = min(low, v)
+                high = max(high, v)
+                if to_name == PLAYER_NAME:
+                    to_player += v
+        c["like_pairs"].append(pairs)
+        c["like_sum"].append(total)
+        c["like_min"].append(low)
+        c["like_max"].append(high)
+        c["player_like_sum"].append(to_player)
+
+        self._add_ragged("elim_order", [seat[n] for n in game.eliminated])
+        self._add_ragged("gn_seats", [seat[n] for n, r in game.roles.items() if r == "グノーシア"])
+
+    def _add_ragged(self, name, items):
+        self.values[name].extend(items)
+        self.lengths[name].append(len(items))
+
+    def extend(self, other):
+        for name, col in other.columns.items():
+            self.columns[name].extend(col)
+        for name in RAGGED:
+            self.values[name].extend(other.values[name])
+            self.lengths[name].extend(other.lengths[name])
+        return self
+
+
+# ---------------------------------------
+# 書き込み
+# ---------------------------------------
+def _col_path(root, name, suffix):
+    return os.path.join(root, f"{name}.{suffix}")
+
+def _read_meta(root):
+    path = os.path.join(root, "meta.json")
+    if not os.path.exists(path):
+        return {"version": VERSION, "rows": 0, "ragged_sizes": {name: 0 for name in RAGGED}}
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != VERSION:
+        raise ValueError("結果ストアの形式が違います")
+    return meta
+
+class ResultsWriter:
+    """結果ストアへの追記。開いたときに、確定していない書きかけ（meta.json より後ろ）を切り詰める。"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.meta = _read_meta(root)
+        rows = self.meta["rows"]
+        for name, (_, dtype) in COLUMNS.items():
+            self._truncate(_col_path(root, name, "col"), rows * np.dtype(dtype).itemsize)
+        for name, (_, dtype) in RAGGED.items():
+            self._truncate(_col_path(root, name, "offsets"), rows * 8)
+            self._truncate(_col_path(root, name, "values"), self.meta["ragged_sizes"][name] * np.dtype(dtype).itemsize)
+
+    @staticmethod
+    def _truncate(path, size):
+        """列ファイルを meta.json の大きさにそろえる（後ろの書きかけは捨てる。足りなければ壊れている）"""
+        with open(path, "ab") as f:
+            have = f.tell()
+            if have < size:
+                raise ValueError(f"結果ストアの列が meta.json の行数より短くなっています: {os.path.basename(path)}")
+            if have > size:
+                f.truncate(size)
+
+    def append(self, records):
+        """records（GameRecords）をまとめて追記する"""
+        n = len(records)
+        if not n:
+            return
+        for name, (_, dtype) in COLUMNS.items():
+            self._write(_col_path(self.root, name, "col"), records.columns[name], dtype)
+        sizes = self.meta["ragged_sizes"]
+        for name, (_, dtype) in RAGGED.items():
+            ends = np.cumsum(np.frombuffer(records.lengths[name], dtype=np.uint32), dtype="<u8") + sizes[name]
+            self._write(_col_path(self.root, name, "offsets"), ends, "<u8")
+            self._write(_col_path(self.root, name, "values"), records.values[name], dtype)
+            sizes[name] = int(ends[-1])
+        self.meta["rows"] += n
+        self._commit()
+
+    @staticmethod
+    def _write(path, data, dtype):
+        with open(path, "ab") as f:
+            f.write(np.asarray(data).astype(dtype, copy=False).tobytes())
+
+    def _commit(self):
+        path = os.path.join(self.root, "meta.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, path)
+
+
+# ---------------------------------------
+# 読み出し・集計
+# ---------------------------------------
+class ResultsStore:
+    """結果ストアを読み取り専用で開く。列は numpy.memmap なので、集計はページ単位で読むだけで済む。"""
+
+    def __init__(self, root):
+        self.root = root
+        self.meta = _read_meta(root)
+        self.rows = self.meta["rows"]
+        self._cache = {}
+
+    def __len__(self):
+        return self.rows
+
+    def _map(self, path, dtype, count):
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+    def column(self, name):
+        """固定長の列（memmap）"""
+        if name not in self._cache:
+            dtype = COLUMNS[name][1]
+            self._cache[name] = self._map(_col_path(self.root, name, "col"), dtype, self.rows)
+        return self._cache[name]
+
+    def ragged(self, name):
+        """可変長の列の (中身, 各試合の始まり, 各試合の終わり)"""
+        key = ("ragged", name)
+        if key not in self._cache:
+            ends = self._map(_col_path(self.root, name, "offsets"), "<u8", self.rows)
+            size = self.meta["ragged_sizes"][name]
+            values = self._map(_col_path(self.root, name, "values"), RAGGED[name][1], size)
+            starts = np.concatenate(([0], ends[:-1])).astype(np.int64) if self.rows else ends
+            self._cache[key] = (values, starts, np.asarray(ends, dtype=np.int64))
+        return self._cache[key]
+
+    def seats(self, name, i):
+        """i 試合目の可変長の列"""
+        values, starts, ends = self.ragged(name)
+        return values[starts[i]:ends[i]].tolist()
+
+    # ---------------- 集計 ----------------
+    def human_win_rate(self):
+        if not self.rows:
+            return 0.0
+        return 1.0 - self.column("winner").mean()
+
+    def win_rates_by(self, key):
+        """列 key の値ごとの (試合数, 人間陣営の勝率)"""
+        keys = self.column(key)
+        games = np.bincount(keys)
+        human = np.bincount(keys, weights=(self.column("winner") == 0))
+        return {int(k): (int(games[k]), human[k] / games[k]) for k in np.flatnonzero(games)}
+
+    def player_win_rate_by_role(self):
+        """プレイヤーの役職ごとの (試合数, プレイヤー陣営の勝率)"""
+        role = self.column("player_role")
+        games = np.bincount(role, minlength=2)
+        wins = np.bincount(role, weights=(self.column("winner") == role), minlength=2)
+        return {FACTIONS[r]: (int(games[r]), wins[r] / games[r]) for r in np.flatnonzero(games)}
+
+    def mean_days(self, by=None):
+        """平均日数（by に列名を渡すとその値ごと）"""
+        days = self.column("days")
+        if by is None:
+            return float(days.mean()) if self.rows else 0.0
+        keys = self.column(by)
+        games = np.bincount(keys)
+        total = np.bincount(keys, weights=days)
+        return {int(k): total[k] / games[k] for k in np.flatnonzero(games)}
+
+    def first_exile_gnosia_rate(self):
+        """最初に脱落した人がグノーシアだった試合の割合（可変長の列どうしの突き合わせ）"""
+        order, o_start, o_end = self.ragged("elim_order")
+        gn, g_start, g_end = self.ragged("gn_seats")
+        has = o_end > o_start
+        if not has.any():
+            return 0.0
+        first = order[o_start[has]]
+        g_start, g_count = g_start[has], (g_end - g_start)[has]
+        hit = np.zeros(len(first), dtype=bool)
+        for j in range(int(g_count.max())):
+            valid = j < g_count
+            hit[valid] |= gn[g_start[valid] + j] == first[valid]
+        return float(hit.mean())
+
+    def summary(self):
+        lines = [f"試合数: {self.rows:,}", f"  人間陣営の勝率: {self.human_win_rate():.4f}"]
+        days_by_gn = self.mean_days(by="gn_count")
+        for gn_count, (games, rate) in self.win_rates_by("gn_count").items():
+            lines.append(
+                f"  グノーシア{gn_count}人 ({games:,}試合): 人間 {rate:.4f}  平均 {days_by_gn[gn_count]:.2f}日"
+            )
+        for role, (games, rate) in self.player_win_rate_by_role().items():
+            lines.append(f"  プレイヤーが{role} ({games:,}試合): 勝率 {rate:.4f}")
+        lines.append(f"  最初の脱落者がグノーシア: {self.first_exile_gnosia_rate():.4f}")
+        return "\n".join(lines)
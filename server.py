@@ -0,0 +1,666 @@
+# server.py
+# 複数人で遊ぶためのルームサーバー（asyncio・1行1JSONの TCP）
+# 実行: python -m server serve --port 8765
+#       python -m server client --name ミナ --room abc      （端末のクライアント）
+#       python -m server load --rooms 1000 --humans 2         （ボットでの負荷試験）
+#
+# 1プロセスで多数のルームを同時に進める。ルームの席のうち人が座らなかった席はNPCが埋め、
+# 人が座った席（game.players）の発言・投票・『消す』相手はその人の入力で決まる。
+# 進行はボタンではなくフェーズごとのタイマーで、全員が入力し終えたらタイマーを待たずに次へ進む。
+#
+# ゲームの進行は engine の関数をイベントループの上でそのまま呼ぶ（1手番は1ms未満なので別スレッドに逃がさない）。
+# 送信はまとめて行う: 状態が変わったルームに印をつけておき、BROADCAST_INTERVAL ごとに
+# ルームの新しいイベントを1通のメッセージにして（エンコードは1ルーム1回）、各接続へ1回の write で送る。
+#
+# プロトコル（クライアント → サーバー）
+#   {"op": "join", "name": "ミナ", "room": "abc"}   room を省くと空きのあるルームに入る
+#   {"op": "start"}                                 ロビーのルームでゲームを始める（席が埋まると自動で始まる）
+#   {"op": "say", "target": 3, "action": "疑う"}    議論中、1ターンに1回（action は 疑う / 庇う）
+#   {"op": "vote", "target": 3}
+#   {"op": "kill", "target": 3}                     夜、生存グノーシアのとき
+#   {"op": "pass"}                                  このターン（投票ならランダム・夜ならおまかせ）は入力しない
+#   {"op": "leave"}
+# サーバー → クライアント
+#   {"t": "lobby", "room", "members"} / {"t": "start", "seat", "role", "allies", "names", "max_turns"}
+#   {"t": "update", "phase", "day", "turn", "left", "alive", "events", "roles"[, "winner"]} / {"t": "error", "message"}
+# target・seat・alive は席番号（names の添字）。events は events.RECORD と同じ (種類, 話し手, 相手, 日, ターン)。
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+import engine
+import events
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_SEATS = 1 + len(engine.NPC_NAMES)
+BROADCAST_INTERVAL = 0.05     # 送信をまとめる間隔（秒）
+MAX_WRITE_BUFFER = 1 << 20    # 送りきれない分がこれを超えた接続は切る（読まないクライアント対策）
+MAX_NAME_LENGTH = 16
+LISTEN_BACKLOG = 4096         # 一斉に接続されても取りこぼさないように
+
+
+class PhaseTimes:
+    """フェーズごとの制限時間（秒）"""
+
+    __slots__ = ("talk", "vote", "night")
+
+    def __init__(self, talk=20.0, vote=30.0, night=20.0):
+        self.talk = talk     # 議論の1ターン（NPCの発言のあと、人が発言できる時間）
+        self.vote = vote
+        self.night = night   # グノーシアのプレイヤーが『消す』相手を選ぶ時間
+
+FAST_TIMES = PhaseTimes(0.05, 0.05, 0.05)  # 負荷試験用
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+# ---------------------------------------
+# 接続
+# ---------------------------------------
+class Connection:
+    """クライアント1人。送るメッセージは outbox にためて、サーバーの flush でまとめて書く。"""
+
+    __slots__ = ("server", "writer", "name", "room", "player", "outbox")
+
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.name = None
+        self.room = None
+        self.player = None  # ゲーム中に座っている席の名前（engine 側の名前）
+        self.outbox = []
+
+    def send(self, message):
+        self.push(encode(message))
+
+    def push(self, data):
+        if not self.outbox:
+            self.server.mark(self)
+        self.outbox.append(data)
+
+    def flush(self):
+        writer = self.writer
+        if writer.is_closing():
+            self.outbox.clear()
+            return
+        writer.write(b"".join(self.outbox))
+        self.outbox.clear()
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            writer.close()
+
+
+# ---------------------------------------
+# ルーム
+# ---------------------------------------
+class Room:
+    """1つのテーブル。ロビーで人を集め、始まったらタイマーでフェーズを進める。"""
+
+    __slots__ = (
+        "id", "server", "members", "game", "names", "timer", "next_step", "deadline",
+        "acted", "choices", "sent",
+    )
+
+    def __init__(self, server, room_id):
+        self.id = room_id
+        self.server = server
+        self.members = []     # 入った順の Connection（席もこの順）
+        self.game = None      # 対戦中の GameState（ロビーでは None）
+        self.names = None     # 表示名（席順。人の席はニックネーム）
+        self.timer = None
+        self.next_step = None  # タイマーが切れたら（全員が入力したら）呼ぶ段階
+        self.deadline = None
+        self.acted = set()    # このフェーズで入力を終えたプレイヤー
+        self.choices = {}     # 投票先・『消す』相手（プレイヤー → 相手）
+        self.sent = 0         # 送信済みのイベント数
+
+    @property
+    def playing(self):
+        return self.game is not None
+
+    def has_seat(self):
+        return not self.playing and len(self.members) < self.server.seats
+
+    # ---------------- ロビー ----------------
+    def add(self, conn):
+        self.members.append(conn)
+        conn.room = self
+        self.broadcast({"t": "lobby", "room": self.id, "members": [m.name for m in self.members]})
+        if len(self.members) >= self.server.seats:
+            self.start()
+
+    def remove(self, conn):
+        self.members.remove(conn)
+        conn.room = None
+        player, conn.player = conn.player, None
+        if not self.members:
+            self.close()
+            return
+        if not self.playing:
+            self.broadcast({"t": "lobby", "room": self.id, "members": [m.name for m in self.members]})
+            return
+        # 抜けた席はNPCが引き継ぐ
+        game = self.game
+        game.players = tuple(p for p in game.players if p != player)
+        self.acted.discard(player)
+        self.choices.pop(player, None)
+        self.maybe_advance()
+
+    def close(self):
+        self.cancel_timer()
+        self.game = None
+        self.server.rooms.pop(self.id, None)
+
+    # ---------------- 進行 ----------------
+    def start(self, seed=None):
+        server = self.server
+        game = engine.init_game(seed=seed, npc_names=engine.make_roster(server.seats - 1), rules=server.rules)
+        game.timeline = None  # ルームでは巻き戻さないのでスナップショットを取らない
+        players = game.all_names[:len(self.members)]
+        game.players = players
+        self.game = game
+        self.sent = 0
+        server.stats["games"] += 1
+
+        names = list(game.all_names)
+        taken = set(names[len(players):])
+        for i, conn in enumerate(self.members):
+            conn.player = players[i]
+            name, k = conn.name, 2
+            while name in taken:
+                name, k = f"{conn.name}{k}", k + 1
+            taken.add(name)
+            names[i] = name
+        self.names = names
+
+        gnosia = [game.seat[n] for n, r in game.roles.items() if r == "グノーシア"]
+        for i, conn in enumerate(self.members):
+            role = game.roles[conn.player]
+            conn.send({
+                "t": "start", "room": self.id, "seat": i, "role": role,
+                "allies": [s for s in gnosia if s != i] if role == "グノーシア" else [],
+                "names": names, "max_turns": game.rules.max_discussion_turns,
+            })
+        self.talk_turn()
+
+    def schedule(self, seconds, callback):
+        self.cancel_timer()
+        loop = asyncio.get_running_loop()
+        self.deadline = loop.time() + seconds
+        self.next_step = callback
+        self.timer = loop.call_later(seconds, self.step, callback)
+        self.server.mark_room(self)
+
+    def cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+            self.next_step = None
+
+    def step(self, callback):
+        """タイマー・入力から次の段階へ進める。ルール側で落ちたらそのルームだけ閉じる。"""
+        self.cancel_timer()
+        if self.game is None:
+            return
+        try:
+            callback()
+        except Exception:
+            traceback.print_exc()
+            self.broadcast({"t": "error", "message": "ゲームを続けられなくなりました"})
+            for conn in list(self.members):
+                conn.room = conn.player = None
+            self.close()
+
+    def talk_turn(self):
+        """議論を1ターン進める（NPCが発言してから、人の発言を待つ）"""
+        game = self.game
+        engine.advance_discussion(game)
+        self.acted = set()
+        self.schedule(self.server.times.talk, self.end_turn)
+
+    def end_turn(self):
+        game = self.game
+        if game.discussion_turn < game.rules.max_discussion_turns:
+            self.talk_turn()
+            return
+        engine.end_discussion(game)
+        self.acted = set()
+        self.choices = {}
+        self.schedule(self.server.times.vote, self.resolve_vote)
+
+    def resolve_vote(self):
+        game = self.game
+        engine.vote(game, targets=self.choices)
+        if game.game_over:
+            self.finish()
+            return
+        self.acted = set()
+        self.choices = {}
+        if self.waiting():
+            self.schedule(self.server.times.night, self.resolve_night)
+        else:
+            self.resolve_night()
+
+    def resolve_night(self):
+        game = self.game
+        target = None
+        if self.choices:
+            # グノーシアのプレイヤーが複数いれば多数決（同数なら先に選ばれた方）
+            target = Counter(self.choices.values()).most_common(1)[0][0]
+        engine.resolve_night(game, target)
+        if game.game_over:
+            self.finish()
+        else:
+            self.talk_turn()
+
+    def finish(self):
+        self.flush()
+        game = self.game
+        self.server.stats["finished"] += 1
+        self.broadcast({
+            "t": "update", "phase": "result", "day": game.day, "turn": game.discussion_turn, "left": None,
+            "alive": [game.seat[n] for n in game.alive_order], "events": [],
+            "roles": {game.seat[n]: r for n, r in game.roles.items()}, "winner": game.winner,
+        })
+        for conn in self.members:
+            conn.player = None
+        self.game = None
+        self.deadline = None
+        self.broadcast({"t": "lobby", "room": self.id, "members": [m.name for m in self.members]})
+
+    # ---------------- 人の入力 ----------------
+    def waiting(self):
+        """このフェーズでまだ入力していないプレイヤー"""
+        game = self.game
+        if game.phase == "night":
+            ready = [p for p in game.players if engine.player_kill_candidates(game, p)]
+        else:
+            ready = [p for p in game.players if game.alive[p]]
+        return [p for p in ready if p not in self.acted]
+
+    def maybe_advance(self):
+        """全員が入力し終えたらタイマーを待たずに進める"""
+        if self.timer is None or self.waiting():
+            return
+        self.step(self.next_step)
+
+    def act(self, conn, op, message):
+        """プレイヤーの入力を受け付ける。だめならエラーの文言を返す。"""
+        game = self.game
+        player = conn.player
+        if game is None or player is None:
+            return "ゲーム中ではありません"
+        if player not in self.waiting():
+            return "今は入力できません"
+
+        if op != "pass":
+            target = message.get("target")
+            if not isinstance(target, int) or not 0 <= target < len(game.all_names):
+                return "相手の席番号が正しくありません"
+            target = game.all_names[target]
+            if target == player or not game.alive[target]:
+                return "その相手は選べません"
+
+        if op == "say":
+            if game.phase != "discussion" or message.get("action") not in ("疑う", "庇う"):
+                return "今は発言できません"
+            engine.apply_player_statement(game, target, message["action"], speaker=player)
+            self.server.mark_room(self)
+        elif op == "vote":
+            if game.phase != "vote":
+                return "今は投票できません"
+            self.choices[player] = target
+        elif op == "kill":
+            if game.phase != "night" or target not in engine.player_kill_candidates(game, player):
+                return "その相手は選べません"
+            self.choices[player] = target
+        self.acted.add(player)
+        self.maybe_advance()
+        return None
+
+    # ---------------- 送信 ----------------
+    def broadcast(self, message):
+        data = encode(message)
+        for conn in self.members:
+            conn.push(data)
+
+    def flush(self):
+        """前回から増えたイベントと今の状態を、全員に同じ1通で送る"""
+        game = self.game
+        if game is None:
+            return
+        new = [list(e) for e in game.events.slice(self.sent)]
+        self.sent = len(game.events)
+        roles = {}
+        for kind, _, target, _, _ in new:
+            if kind == events.EXILE or kind == events.KILL:
+                roles[target] = game.roles[game.all_names[target]]
+        left = None
+        if self.timer is not None:
+            left = round(max(0.0, self.deadline - asyncio.get_running_loop().time()), 2)
+        self.broadcast({
+            "t": "update", "phase": game.phase, "day": game.day, "turn": game.discussion_turn, "left": left,
+            "alive": [game.seat[n] for n in game.alive_order], "events": new, "roles": roles,
+        })
+
+
+# ---------------------------------------
+# サーバー
+# ---------------------------------------
+class GameServer:
+    """ルームを持ち、接続からのメッセージを振り分け、送信をまとめて行う"""
+
+    def __init__(self, seats=DEFAULT_SEATS, times=None, rules=None, interval=BROADCAST_INTERVAL):
+        self.seats = seats
+        self.times = PhaseTimes() if times is None else times
+        self.rules = rules
+        self.interval = interval
+        self.rooms = {}
+        self.stats = {"connections": 0, "games": 0, "finished": 0}
+        self._dirty_rooms = set()
+        self._dirty_conns = set()
+        self._flush_handle = None
+
+    # ---------------- まとめて送る ----------------
+    def mark_room(self, room):
+        self._dirty_rooms.add(room)
+        self._schedule_flush()
+
+    def mark(self, conn):
+        self._dirty_conns.add(conn)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.interval, self.flush)
+
+    def flush(self):
+        self._flush_handle = None
+        rooms, self._dirty_rooms = self._dirty_rooms, set()
+        for room in rooms:
+            room.flush()
+        conns, self._dirty_conns = self._dirty_conns, set()
+        for conn in conns:
+            conn.flush()
+
+    # ---------------- 受信 ----------------
+    async def handle(self, reader, writer):
+        conn = Connection(self, writer)
+        self.stats["connections"] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    op = message["op"]
+                except (ValueError, KeyError, TypeError):
+                    conn.send({"t": "error", "message": "読めないメッセージです"})
+                    continue
+                error = self.dispatch(conn, op, message)
+                if error:
+                    conn.send({"t": "error", "message": error})
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.stats["connections"] -= 1
+            if conn.room is not None:
+                conn.room.remove(conn)
+            self._dirty_conns.discard(conn)
+            writer.close()
+
+    def dispatch(self, conn, op, message):
+        if op == "join":
+            if conn.room is not None:
+                return "もうルームに入っています"
+            name = str(message.get("name") or "名無し")[:MAX_NAME_LENGTH]
+            conn.name = name
+            room = self.find_room(message.get("room"))
+            if room is None:
+                return "そのルームは満席か対戦中です"
+            room.add(conn)
+            return None
+        room = conn.room
+        if room is None:
+            return "先に join してください"
+        if op == "start":
+            if room.playing:
+                return "もう始まっています"
+            room.start()
+            return None
+        if op == "leave":
+            room.remove(conn)
+            return None
+        if op in ("say", "vote", "kill", "pass"):
+            return room.act(conn, op, message)
+        return "知らない op です"
+
+    def find_room(self, room_id):
+        """room_id のルーム（無ければ作る）。None なら空きのあるロビーか、新しいルーム"""
+        if room_id is None:
+            for room in self.rooms.values():
+                if room.has_seat():
+                    return room
+            room_id = f"{random.getrandbits(32):08x}"
+        room_id = str(room_id)
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = Room(self, room_id)
+        return room if room.has_seat() else None
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return await asyncio.start_server(self.handle, host, port, backlog=LISTEN_BACKLOG)
+
+
+# ---------------------------------------
+# 端末のクライアント
+# ---------------------------------------
+class TerminalClient:
+    """サーバーからの更新を events.render_event で表示し、端末の入力を送る"""
+
+    HELP = "s 席: 疑う / d 席: 庇う / v 席: 投票 / k 席: 消す / p: パス / start: 開始 / q: 終了"
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.names = []
+        self.roles = {}
+        self.max_turns = 0
+
+    def send(self, message):
+        self.writer.write(encode(message))
+
+    def show(self, message):
+        t = message["t"]
+        if t == "lobby":
+            print(f"ルーム {message['room']}: " + "、".join(message["members"]))
+        elif t == "start":
+            self.names = message["names"]
+            self.max_turns = message["max_turns"]
+            self.roles = {name: "？" for name in self.names}
+            print(f"\n🌌 ゲーム開始！ あなたは {message['seat']}番 {self.names[message['seat']]}・{message['role']}")
+            if message["allies"]:
+                print("仲間のグノーシア: " + "、".join(self.names[s] for s in message["allies"]))
+            print("  " + "  ".join(f"{i}:{n}" for i, n in enumerate(self.names)))
+            print(self.HELP)
+        elif t == "update":
+            for seat, role in message["roles"].items():
+                self.roles[self.names[int(seat)]] = role
+            for event in message["events"]:
+                for line in events.render_event(event, self.names, self.roles, self.max_turns):
+                    print(line)
+            if message.get("winner"):
+                print(f"\n🏁 {message['winner']}陣営の勝利")
+            elif message["left"] is not None:
+                print(f"[{message['day']}日目・{engine.PHASE_LABELS.get(message['phase'], message['phase'])}"
+                      f" 残り{message['left']:.0f}秒]")
+        elif t == "error":
+            print(f"⚠️ {message['message']}")
+
+    def command(self, line):
+        parts = line.split()
+        if not parts:
+            return True
+        ops = {"s": "say", "d": "say", "v": "vote", "k": "kill"}
+        head = parts[0]
+        if head == "q":
+            return False
+        if head == "start":
+            self.send({"op": "start"})
+        elif head == "p":
+            self.send({"op": "pass"})
+        elif head in ops and len(parts) == 2 and parts[1].isdigit():
+            message = {"op": ops[head], "target": int(parts[1])}
+            if head in ("s", "d"):
+                message["action"] = "疑う" if head == "s" else "庇う"
+            self.send(message)
+        else:
+            print(self.HELP)
+        return True
+
+    async def run(self, name, room):
+        loop = asyncio.get_running_loop()
+        lines = asyncio.Queue()
+
+        def read_stdin():
+            for line in sys.stdin:
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+            loop.call_soon_threadsafe(lines.put_nowait, None)
+
+        threading.Thread(target=read_stdin, daemon=True).start()
+        self.send({"op": "join", "name": name, "room": room})
+
+        async def receive():
+            while line := await self.reader.readline():
+                self.show(json.loads(line))
+
+        receiver = asyncio.create_task(receive())
+        while True:
+            line = await lines.get()
+            if line is None or not self.command(line):
+                break
+        receiver.cancel()
+        self.writer.close()
+
+
+# ---------------------------------------
+# 負荷試験（ランダムに入力するボット）
+# ---------------------------------------
+async def bot(host, port, room, name, humans, rng, done):
+    """1人分のボット。ルームに humans 人そろったら最初の人が start し、決着したら抜ける。"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"op": "join", "name": name, "room": room}))
+    seat = role = None
+    acted = None
+    try:
+        while line := await reader.readline():
+            message = json.loads(line)
+            t = message["t"]
+            if t == "lobby" and message["members"][0] == name and len(message["members"]) == humans and seat is None:
+                writer.write(encode({"op": "start"}))
+            elif t == "start":
+                seat, role = message["seat"], message["role"]
+            elif t == "update":
+                if message.get("winner"):
+                    done.append(message["winner"])
+                    break
+                alive = message["alive"]
+                key = (message["phase"], message["day"], message["turn"])
+                if seat not in alive or key == acted:
+                    continue
+                others = [s for s in alive if s != seat]
+                phase = message["phase"]
+                if phase == "discussion":
+                    request = {"op": "say", "target": rng.choice(others), "action": rng.choice(["疑う", "庇う"])}
+                elif phase == "vote":
+                    request = {"op": "vote", "target": rng.choice(others)}
+                elif phase == "night" and role == "グノーシア":
+                    request = {"op": "pass"}
+                else:
+                    continue
+                acted = key
+                writer.write(encode(request))
+    finally:
+        writer.close()
+
+async def load_test(rooms, humans, seats, seed=None):
+    server = GameServer(seats=seats, times=FAST_TIMES)
+    listener = await server.serve(DEFAULT_HOST, 0)
+    port = listener.sockets[0].getsockname()[1]
+    rng = random.Random(seed)
+    done = []
+    start = time.perf_counter()
+    tasks = [
+        bot(DEFAULT_HOST, port, f"load{r}", f"bot{r}-{h}", humans, random.Random(rng.random()), done)
+        for r in range(rooms) for h in range(humans)
+    ]
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    listener.close()
+    finished = server.stats["finished"]
+    print(f"{rooms}ルーム × {humans}人（{seats}席）: {finished}試合が決着 {elapsed:.2f}秒"
+          f"（{finished / elapsed:.1f}試合/秒、ボットの決着通知 {len(done) // max(1, humans)}ルーム分）")
+
+
+# ---------------------------------------
+# 入口
+# ---------------------------------------
+async def serve_forever(args):
+    server = GameServer(seats=args.seats, times=PhaseTimes(args.talk, args.vote, args.night))
+    listener = await server.serve(args.host, args.port)
+    print(f"待ち受け中: {args.host}:{args.port}（{args.seats}席）")
+    async with listener:
+        await listener.serve_forever()
+
+async def client_main(args):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    await TerminalClient(reader, writer).run(args.name, args.room)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m server", description="複数人で遊ぶルームサーバー")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="サーバーを起動する")
+    p.add_argument("--host", default=DEFAULT_HOST)
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--seats", type=int, default=DEFAULT_SEATS, help="1ルームの席数（人が埋めなかった席はNPC）")
+    p.add_argument("--talk", type=float, default=PhaseTimes().talk, help="議論1ターンの秒数")
+    p.add_argument("--vote", type=float, default=PhaseTimes().vote, help="投票の秒数")
+    p.add_argument("--night", type=float, default=PhaseTimes().night, help="夜の秒数")
+
+    p = sub.add_parser("client", help="端末のクライアントで入る")
+    p.add_argument("--host", default=DEFAULT_HOST)
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--name", required=True)
+    p.add_argument("--room", help="ルーム名（省くと空きのあるルーム）")
+
+    p = sub.add_parser("load", help="ボットで負荷試験をする（同じプロセスにサーバーを立てる）")
+    p.add_argument("--rooms", type=int, default=100)
+    p.add_argument("--humans", type=int, default=2, help="1ルームのボットの人数")
+    p.add_argument("--seats", type=int, default=DEFAULT_SEATS)
+    p.add_argument("--seed", type=int)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "serve":
+            asyncio.run(serve_forever(args))
+        elif args.command == "client":
+            asyncio.run(client_main(args))
+        else:
+            asyncio.run(load_test(args.rooms, args.humans, args.seats, args.seed))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
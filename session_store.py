@@ -0,0 +1,156 @@
+# session_store.py
+# 多人数ホスティング用のゲーム置き場
+# 遊んでいるゲームだけをメモリに置き、しばらく触られていないゲームは
+# イベントログ（replay.dump_game の数百バイト〜数KB）にしてディスクへ退避する。
+# 次に触られたときはイベントログから復元するので、呼び出し側からは区別がつかない。
+# 復元したゲームの行はディスクから消す（もう一度退避するまではメモリ上のものだけが正しい）。
+# ディスクに退避したまま ttl_seconds 以上触られなかったゲームは、戻ってこないものとして消す。
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from replay import dump_game, load_game
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "gnosia_sessions.sqlite3")
+DEFAULT_IDLE_SECONDS = 300   # これ以上触られていないゲームはディスクへ退避
+DEFAULT_MAX_ACTIVE = 1000    # メモリに置いておくゲーム数の上限
+DEFAULT_TTL_SECONDS = 86400  # これ以上触られていない退避済みのゲームはディスクからも消す
+EXPIRE_INTERVAL = 600        # 期限切れの掃除をする間隔（秒）
+
+
+class SessionStore:
+    """セッションIDごとのゲームを保持する。スレッドセーフ。
+
+    メモリ上のゲームは engine.GameState そのもの（小さな試合で1つ10KB弱）。
+    退避したゲームはディスク上の1行だけになり、メモリは使わない。"""
+
+    def __init__(self, path=DEFAULT_PATH, idle_seconds=DEFAULT_IDLE_SECONDS, max_active=DEFAULT_MAX_ACTIVE,
+                 ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.idle_seconds = idle_seconds
+        self.max_active = max_active
+        self.ttl_seconds = ttl_seconds  # None なら消さない
+        self._expired_at = None         # 最後に期限切れを掃除した時刻
+        self._active = OrderedDict()  # session_id → (game, 最後に触られた時刻)。古い順
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            " session_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS games_updated ON games (updated)")
+        self._db.commit()
+
+    # ---------------- 取り出し・登録 ----------------
+    def get(self, session_id, now=None):
+        """session_id のゲームを返す（退避済みなら復元する）。無ければ None。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._active.pop(session_id, None)
+            if entry is not None:
+                game = entry[0]
+            else:
+                game = self._restore(session_id)
+                if game is None:
+                    return None
+            self._active[session_id] = (game, now)
+            self._evict(now)
+            return game
+
+    def put(self, session_id, game, now=None):
+        """session_id のゲームを登録（置き換え）する"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._active.pop(session_id, None)
+            self._active[session_id] = (game, now)
+            self._evict(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._active.pop(session_id, None)
+            self._db.execute("DELETE FROM games WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    # ---------------- 退避 ----------------
+    def evict_idle(self, now=None):
+        """idle_seconds 以上触られていないゲームをディスクへ退避する"""
+        with self._lock:
+            self._evict(time.time() if now is None else now)
+
+    def expire(self, now=None):
+        """ttl_seconds 以上触られていない退避済みのゲームをディスクから消し、消した数を返す。
+        メモリ上のゲームは触られているので消さない（退避するときに新しい時刻で書き直される）。"""
+        with self._lock:
+            return self._expire(time.time() if now is None else now)
+
+    def checkpoint_all(self):
+        """メモリ上のゲームをすべてディスクへ書き出す（メモリからは消さない）"""
+        with self._lock:
+            rows = [(sid, dump_game(game), used) for sid, (game, used) in self._active.items()]
+            self._write(rows)
+
+    def _expire(self, now):
+        self._expired_at = now
+        if self.ttl_seconds is None:
+            return 0
+        cur = self._db.execute("DELETE FROM games WHERE updated < ?", (now - self.ttl_seconds,))
+        self._db.commit()
+        return cur.rowcount
+
+    def _evict(self, now):
+        """古い順に、期限切れか上限超えのゲームを書き出してメモリから外す。
+        EXPIRE_INTERVAL ごとに、ディスク上の期限切れのゲームも消す。"""
+        if self._expired_at is None or now - self._expired_at >= EXPIRE_INTERVAL:
+            self._expire(now)
+        rows = []
+        while self._active:
+            session_id, (game, used) = next(iter(self._active.items()))
+            if len(self._active) <= self.max_active and now - used < self.idle_seconds:
+                break
+            del self._active[session_id]
+            rows.append((session_id, dump_game(game), used))
+        self._write(rows)
+
+    def _restore(self, session_id):
+        """退避済みのゲームを読み込み、その行を消す。
+        読むのと消すのを1つの書き込みトランザクションにするので、同じファイルを開いた別のプロセスとも取り合わない。
+        読み込めなかったときは行を残したまま例外を上げる。"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT data FROM games WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                self._db.rollback()
+                return None
+            game = load_game(row[0])
+            self._db.execute("DELETE FROM games WHERE session_id = ?", (session_id,))
+        except BaseException:
+            self._db.rollback()
+            raise
+        self._db.commit()
+        return game
+
+    def _write(self, rows):
+        if not rows:
+            return
+        self._db.executemany(
+            "INSERT OR REPLACE INTO games (session_id, data, updated) VALUES (?, ?, ?)", rows
+        )
+        self._db.commit()
+
+    # ---------------- 状態 ----------------
+    def active_count(self):
+        with self._lock:
+            return len(self._active)
+
+    def stored_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def close(self):
+        self.checkpoint_all()
+        with self._lock:
+            self._active.clear()
+            self._db.close()
@@ -0,0 +1,182 @@
+# simulate.py
+# engine.py のルールでゲームを大量に自動対戦させて、陣営ごとの勝率を集計する
+# 実行: python simulate.py -n 100000 -j 8 --seed 1
+
+import argparse
+import os
+import random
+import time
+
+from engine import NPC_NAMES, Rules, init_game, make_roster, play_until_over
+
+DEFAULT_CHUNK_SIZE = 2000  # 1タスクあたりのゲーム数
+
+
+# ---------------------------------------
+# 集計結果
+# ---------------------------------------
+class BatchResult:
+    """バッチ実行の集計。ワーカーごとの結果は merge で足し合わせる。"""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = {"人間": 0, "グノーシア": 0}
+        # gn_count → {"games": 試合数, "人間": 勝利数, "グノーシア": 勝利数}
+        self.by_gn_count = {}
+        self.total_days = 0
+        self.records = None  # 試合ごとの行（results_store.GameRecords。集めるときだけ）
+
+    def add(self, game):
+        self.games += 1
+        self.wins[game.winner] += 1
+        row = self.by_gn_count.setdefault(game.gn_count, {"games": 0, "人間": 0, "グノーシア": 0})
+        row["games"] += 1
+        row[game.winner] += 1
+        self.total_days += game.day
+
+    def merge(self, other):
+        self.games += other.games
+        for faction, n in other.wins.items():
+            self.wins[faction] += n
+        for gn_count, other_row in other.by_gn_count.items():
+            row = self.by_gn_count.setdefault(gn_count, {"games": 0, "人間": 0, "グノーシア": 0})
+            for k, n in other_row.items():
+                row[k] += n
+        self.total_days += other.total_days
+        return self
+
+    def win_rates(self):
+        """陣営ごとの勝率"""
+        if not self.games:
+            return {faction: 0.0 for faction in self.wins}
+        return {faction: n / self.games for faction, n in self.wins.items()}
+
+    def win_rates_by_gn_count(self):
+        """グノーシア人数ごとの陣営勝率"""
+        rates = {}
+        for gn_count, row in sorted(self.by_gn_count.items()):
+            rates[gn_count] = {
+                "人間": row["人間"] / row["games"],
+                "グノーシア": row["グノーシア"] / row["games"],
+            }
+        return rates
+
+    def mean_days(self):
+        return self.total_days / self.games if self.games else 0.0
+
+
+# ---------------------------------------
+# ワーカー
+# ---------------------------------------
+def chunk_seed(base_seed, chunk_index):
+    """チャンクごとの乱数シード（base_seed とチャンク番号から一意に決まる）"""
+    return (base_seed << 32) + chunk_index
+
+def run_chunk(args):
+    """1ワーカー分のゲームをまとめて実行する。collect なら試合ごとの行も result.records に集める。"""
+    seed, n_games, npc_names, rules, collect = args
+    rng = random.Random(seed)
+    result = BatchResult()
+    if collect:
+        from results_store import GameRecords
+        result.records = GameRecords()
+    for _ in range(n_games):
+        game = init_game(seed=rng.getrandbits(63), npc_names=npc_names, record_log=False, rules=rules)
+        play_until_over(game)
+        result.add(game)
+        if collect:
+            result.records.add(game)
+    return result
+
+def run_batch(n_games, workers=None, seed=0, npc_names=None, chunk_size=DEFAULT_CHUNK_SIZE, rules=None,
+              store=None):
+    """n_games 試合をプロセスプールで実行して集計を返す。
+    seed が同じなら workers の数によらず同じ結果になる。rules はバランス定数（省略時は既定値）。
+    store に結果ストアのディレクトリを渡すと、試合ごとの行をチャンク順に追記する。"""
+    npc_names = list(NPC_NAMES if npc_names is None else npc_names)
+    tasks = []
+    for i, start in enumerate(range(0, n_games, chunk_size)):
+        tasks.append((chunk_seed(seed, i), min(chunk_size, n_games - start), npc_names, rules, store is not None))
+
+    writer = None
+    if store is not None:
+        from results_store import ResultsWriter
+        writer = ResultsWriter(store)
+
+    result = BatchResult()
+    def collect(part):
+        result.merge(part)
+        if writer is not None:
+            writer.append(part.records)
+
+    if workers == 1:
+        for task in tasks:
+            collect(run_chunk(task))
+        return result
+
+    # プロセスプールは import だけで数十ミリ秒かかるので、使うときに読む
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(run_chunk, tasks):
+            collect(part)
+    return result
+
+
+# ---------------------------------------
+# コマンドライン
+# ---------------------------------------
+def format_result(result, elapsed):
+    lines = [f"試合数: {result.games}  ({result.games / elapsed:,.0f} 試合/秒)"]
+    for faction, rate in result.win_rates().items():
+        lines.append(f"  {faction}陣営の勝率: {rate:.4f}")
+    for gn_count, rates in result.win_rates_by_gn_count().items():
+        games = result.by_gn_count[gn_count]["games"]
+        lines.append(
+            f"  グノーシア{gn_count}人 ({games}試合): "
+            f"人間 {rates['人間']:.4f} / グノーシア {rates['グノーシア']:.4f}"
+        )
+    lines.append(f"  平均日数: {result.mean_days():.2f}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="グノーシア風ミニゲームの勝率シミュレーション")
+    parser.add_argument("-n", "--games", type=int, default=10000, help="試合数")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="ワーカープロセス数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="1タスクあたりの試合数")
+    parser.add_argument("--npcs", type=int, default=len(NPC_NAMES), help="NPCの人数（大人数ロビー）")
+    parser.add_argument("--vectorized", action="store_true", help="NumPy でまとめて進める（要 numpy）")
+    parser.add_argument(
+        "--belief-weight", type=float, default=0.0, help="人間NPCの役職推理の強さ（0 なら推理なし、要 numpy）"
+    )
+    parser.add_argument("--store", help="試合ごとの結果を追記する結果ストアのディレクトリ（要 numpy）")
+    parser.add_argument("--query", action="store_true", help="--store の結果ストアを集計して表示するだけ")
+    args = parser.parse_args(argv)
+
+    if args.query:
+        if not args.store:
+            parser.error("--query には --store が必要です")
+        from results_store import ResultsStore
+        print(ResultsStore(args.store).summary())
+        return
+    if args.vectorized:
+        # NumPy 版は既定のルール・結果ストアなしでしか進められないので、渡せない指定は黙って捨てずに断る
+        for flag, given in (("--store", args.store), ("--belief-weight", args.belief_weight)):
+            if given:
+                parser.error(f"--vectorized と {flag} は一緒に使えません")
+
+    start = time.perf_counter()
+    if args.vectorized:
+        from vectorized import run_vectorized
+        result = run_vectorized(args.games, seed=args.seed, n_npcs=args.npcs)
+    else:
+        result = run_batch(
+            args.games, workers=args.workers, seed=args.seed,
+            npc_names=make_roster(args.npcs), chunk_size=args.chunk_size,
+            rules=Rules(belief_weight=args.belief_weight) if args.belief_weight else None,
+            store=args.store,
+        )
+    print(format_result(result, time.perf_counter() - start))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+# solver.py
+# 今の局面から各陣営が勝つ確率を、乱数の分岐を列挙して計算する（サイドバーの「勝率の読み」）
+#
+# ゲームは  NPC発言（1人ずつ） → 投票・追放 → 夜の『消す』 → 勝敗判定  をくり返す確率過程なので、
+# 局面ごとに「人間陣営が勝つ確率」を、次に起こりうる出来事の確率で重み付けした平均として求める（期待値の DP）。
+# プレイヤーは play_until_over と同じく、発言せず・投票はランダム・『消す』相手はNPCと同じ基準で選ぶものとする。
+# 役職は本当の配役を使う（全部知っている立場からの確率）。役職推理（belief_weight）による補正は入れない。
+#
+# 局面は次のように詰めて表す（正規化）
+#   - 脱落した人は消して、生存者だけで番号を振り直す（プレイヤーは生存していれば 0 番）
+#   - 好感度はそのままの値で持つ（疑い・信頼の重みには上限がないので、打ち切ると別の局面になってしまう）
+#   - 好感度固定のモデルは投票と夜しかなく順番に意味がないので、NPCを（役職, 好感度の並び）で並べ替えて、
+#     入れ替えただけの局面をまとめる（発言が残る局面は席順で進むので並べ替えない）
+# 計算済みの局面は上限つきの LRU 表に残し、再実行をまたいで使い回す。
+# 表は同じルールの全セッションで共有し、ロックは表の出し入れのときだけ取るので、別々のゲームの読みは並行して進む。
+#
+# 発言は1回ごとに (2 × 相手の数) 通りに分かれるので、序盤から決着まで全部は数えきれない。
+# そこで反復深化する: 深さ d では d 回先の出来事までは本当に分岐させ、その先は
+# 「好感度がもう変わらないとして、投票と夜だけをくり返す」モデルで（こちらは生存者の集合だけの DP なので）厳密に解く。
+# 時間の予算を使い切ったら、最後に最後まで計算できた深さの値を返す。決着まで読み切れたら exact になる。
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from engine import PLAYER_NAME
+
+EXACT_MAX_PLAYERS = 8      # 生存者がこれより多いと投票の分布が重すぎるので、人数だけのモデルにする
+TABLE_SIZE = 200_000       # LRU 表に残す局面の数
+DEFAULT_BUDGET = 0.15      # 1回の計算にかける時間（秒）
+
+TALK, VOTE, NIGHT = 0, 1, 2
+
+# 読みの種類
+MODEL_END = "決着"
+MODEL_COUNTS = "人数のみ"
+MODEL_FROZEN = "好感度固定"
+MODEL_EXPANDED = "展開"
+
+
+class _Timeout(Exception):
+    pass
+
+
+class Odds:
+    """solve の結果"""
+
+    __slots__ = ("human", "model", "depth", "exact", "elapsed")
+
+    def __init__(self, human, model, depth=0, exact=False, elapsed=0.0):
+        self.human = human      # 人間陣営が勝つ確率
+        self.model = model      # MODEL_* のどれか
+        self.depth = depth      # 本当に分岐させた出来事の数
+        self.exact = exact      # 決着まで読み切ったか
+        self.elapsed = elapsed  # かかった時間（秒）
+
+    @property
+    def gnosia(self):
+        return 1.0 - self.human
+
+    def __repr__(self):
+        return (f"Odds(human={self.human:.4f}, model={self.model!r}, depth={self.depth}, "
+                f"exact={self.exact})")
+
+
+# ---------------------------------------
+# 局面
+# 局面 = (プレイヤー生存, 役職（グノーシアなら True）のタプル, 好感度の行列, 手番)
+# 手番 = (TALK, 残りターン数, 何人目の発言者か) / (VOTE,) / (NIGHT,)
+# ---------------------------------------
+class _Weights(dict):
+    """好感度 → 重み。出てきた値だけ計算して覚えておく"""
+
+    __slots__ = ("func",)
+
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def __missing__(self, v):
+        w = self[v] = self.func(v)
+        return w
+
+def state_from_game(game):
+    """GameState から局面を作る。決着済みなら None。"""
+    if game.game_over:
+        return None
+    alive = game.alive_names()  # 席順なので、生存していればプレイヤーが先頭
+    gn = tuple(game.roles[n] == "グノーシア" for n in alive)
+    like = tuple(
+        tuple(game.likes_of(a).get(b, 0) for b in alive)
+        for a in alive
+    )
+    if game.phase == "discussion":
+        turns_left = game.rules.max_discussion_turns - game.discussion_turn
+        phase = (TALK, turns_left, 0) if turns_left > 0 else (VOTE,)
+    elif game.phase == "vote":
+        phase = (VOTE,)
+    else:
+        phase = (NIGHT,)
+    return (game.alive[PLAYER_NAME], gn, like, phase)
+
+def _outcome(state):
+    """決着していれば人間陣営が勝つ確率（1.0 / 0.0）、続くなら None"""
+    gn = state[1]
+    g = sum(gn)
+    if g == 0:
+        return 1.0
+    if len(gn) - g <= g:
+        return 0.0
+    return None
+
+def _remove(state, i, phase):
+    """i 番の人を脱落させた局面"""
+    player_alive, gn, like, _ = state
+    keep = [j for j in range(len(gn)) if j != i]
+    return (
+        player_alive and i != 0,
+        tuple(gn[j] for j in keep),
+        tuple(tuple(like[a][b] for b in keep) for a in keep),
+        phase,
+    )
+
+def _canonical(state):
+    """好感度固定のモデル（投票と夜だけ）の局面のNPCを並べ替えて、入れ替えただけの局面が同じ形になるようにする。
+    そのモデルではNPCの順番が結果に効かないので、同じ形になるのは本当に同じ値を持つ局面だけ。
+    発言が続く局面には使わない（発言は席順に進むので、並べ替えると先の展開が変わる）。"""
+    player_alive, gn, like, phase = state
+    start = 1 if player_alive else 0
+    npcs = sorted(
+        range(start, len(gn)),
+        key=lambda i: (gn[i], sorted(like[i]), sorted(row[i] for row in like)),
+    )
+    order = list(range(start)) + npcs
+    return (
+        player_alive,
+        tuple(gn[i] for i in order),
+        tuple(tuple(like[a][b] for b in order) for a in order),
+        phase,
+    )
+
+@lru_cache(maxsize=None)
+def count_odds(humans, gnosias):
+    """人数だけのモデル：追放は生存者から一様、夜は人間から1人。朝の時点の人数で、人間陣営が勝つ確率。"""
+    if gnosias == 0:
+        return 1.0
+    if humans <= gnosias:
+        return 0.0
+    return (humans * _count_night(humans - 1, gnosias) + gnosias * _count_night(humans, gnosias - 1)) / (humans + gnosias)
+
+def _count_night(humans, gnosias):
+    """追放のあと（決着していなければ夜に人間が1人減る）"""
+    if gnosias == 0:
+        return 1.0
+    if humans <= gnosias:
+        return 0.0
+    return count_odds(humans - 1, gnosias)
+
+
+# ---------------------------------------
+# 読み
+# ---------------------------------------
+class WinSolver:
+    """ルール（engine.Rules）ごとの勝率計算。LRU 表は solve をまたいで残る。
+    Streamlit のセッションはスレッドごとに動くので、表の出し入れだけをロックで守り、締め切りはスレッドごとに持つ。
+    （solve 全体をロックすると、深い読みの後ろにほかのセッションの読みが並んでしまう）"""
+
+    def __init__(self, rules, table_size=TABLE_SIZE):
+        self.rules = rules
+        self.table_size = table_size
+        self.table = OrderedDict()
+        self._lock = threading.Lock()    # table を守る
+        self._local = threading.local()  # 呼び出しごとの締め切り（deadline）
+        gn_s, gn_d = rules.gn_talk_weights
+        hu_s, hu_d = rules.human_talk_weights
+        self._p_suspect = {True: gn_s / (gn_s + gn_d), False: hu_s / (hu_s + hu_d)}
+        slope = rules.like_slope
+        # 好感度 → 重み（engine の weight_from_like_* と gn_kill_target_for_npc の式）
+        self._suspicion_w = _Weights(lambda v: max(0.1, 1.0 + max(0.0, -slope * v)))
+        self._trust_w = _Weights(lambda v: max(0.1, 1.0 + slope * v))
+        self._kill_w = _Weights(lambda v: max(0.1, 1.0 - slope * v))
+
+    # ---------------- LRU 表 ----------------
+    def _get(self, key):
+        with self._lock:
+            hit = self.table.get(key)
+            if hit is not None:
+                self.table.move_to_end(key)
+            return hit
+
+    def _put(self, key, value):
+        with self._lock:
+            self.table[key] = value
+            self.table.move_to_end(key)
+            if len(self.table) > self.table_size:
+                self.table.popitem(last=False)
+
+    def _tick(self):
+        deadline = getattr(self._local, "deadline", None)
+        if deadline is not None and time.perf_counter() > deadline:
+            raise _Timeout
+
+    # ---------------- 入口 ----------------
+    def solve(self, game, budget=DEFAULT_BUDGET):
+        """game の今の局面での勝率を、budget 秒以内に出せるいちばん深い読みで返す"""
+        start = time.perf_counter()
+        state = state_from_game(game)
+        if state is None:
+            return Odds(1.0 if game.winner == "人間" else 0.0, MODEL_END, exact=True)
+
+        g = sum(state[1])
+        odds = Odds(count_odds(len(state[1]) - g, g), MODEL_COUNTS)
+        if len(state[1]) > EXACT_MAX_PLAYERS:
+            odds.elapsed = time.perf_counter() - start
+            return odds
+
+        self._local.deadline = start + budget
+        depth = 0
+        try:
+            while True:
+                value, exact = self._value(state, depth)
+                odds = Odds(value, MODEL_EXPANDED if depth else MODEL_FROZEN, depth, exact)
+                if exact:
+                    break
+                depth += 1
+        except _Timeout:
+            pass
+        finally:
+            self._local.deadline = None
+        odds.elapsed = time.perf_counter() - start
+        return odds
+
+    # ---------------- 展開 ----------------
+    def _value(self, state, depth):
+        """depth 回先までの出来事を分岐させたときの人間陣営の勝率と、決着まで読み切ったか"""
+        result = _outcome(state)
+        if result is not None:
+            return result, True
+        if depth == 0:
+            return self._frozen(state), False
+
+        hit = self._get(state)
+        if hit is not None and (hit[2] or hit[1] >= depth):
+            return hit[0], hit[2]
+        self._tick()
+
+        total = 0.0
+        exact = True
+        for p, nxt in self._transitions(state):
+            value, e = self._value(nxt, depth - 1)
+            total += p * value
+            exact = exact and e
+        self._put(state, (total, depth, exact))
+        return total, exact
+
+    def _transitions(self, state):
+        """次の出来事ごとの (確率, 次の局面)"""
+        phase = state[3]
+        if phase[0] == TALK:
+            return self._talk(state)
+        if phase[0] == VOTE:
+            return [(p, _remove(state, i, (NIGHT,))) for i, p in enumerate(self._exile(state)) if p]
+        return [
+            (p, _remove(state, i, (TALK, self.rules.max_discussion_turns, 0)))
+            for i, p in enumerate(self._kill(state)) if p
+        ]
+
+    def _talk(self, state):
+        """NPC1人の発言（疑う／庇う × 相手）"""
+        player_alive, gn, like, (_, turns_left, speaker) = state
+        npcs = range(1 if player_alive else 0, len(gn))
+        if speaker + 1 < len(npcs):
+            after = (TALK, turns_left, speaker + 1)
+        elif turns_left > 1:
+            after = (TALK, turns_left - 1, 0)
+        else:
+            after = (VOTE,)
+
+        j = npcs[speaker]
+        row = like[j]
+        p_suspect = self._p_suspect[gn[j]]
+        outcomes = []
+        for p_action, weights, delta in (
+            (p_suspect, self._suspicion_w, self.rules.like_delta_down),
+            (1.0 - p_suspect, self._trust_w, self.rules.like_delta_up),
+        ):
+            if not p_action:
+                continue
+            w = [0.0 if c == j else weights[row[c]] for c in range(len(gn))]
+            total = sum(w)
+            for c, wc in enumerate(w):
+                if not wc:
+                    continue
+                # c から発言者 j への好感度が変わる
+                new_row = list(like[c])
+                new_row[j] += delta
+                new_like = like[:c] + (tuple(new_row),) + like[c + 1:]
+                outcomes.append((p_action * wc / total, (player_alive, gn, new_like, after)))
+        return outcomes
+
+    def _exile(self, state):
+        """投票で i 番が追放される確率のリスト（票を1人ずつ足していく票数ベクトルの DP）"""
+        key = ("exile", state)
+        hit = self._get(key)
+        if hit is not None:
+            return hit
+
+        player_alive, gn, like, _ = state
+        k = len(gn)
+        bias = self.rules.player_vote_bias
+        voters = []
+        for j in range(1 if player_alive else 0, k):
+            w = [0.0 if c == j else self._suspicion_w[like[j][c]] for c in range(k)]
+            if player_alive:
+                w[0] += bias
+            total = sum(w)
+            voters.append([(c, wc / total) for c, wc in enumerate(w) if wc])
+        # プレイヤーは生存者（自分以外）からランダムに投票する。脱落していても票は入る（apply_vote と同じ）
+        others = list(range(1, k)) if player_alive else list(range(k))
+        voters.append([(c, 1.0 / len(others)) for c in others])
+
+        # 票数ベクトルは (投票者数+1) 進数の整数で持つ（1票足すのが足し算1回で済む）
+        base = len(voters) + 1
+        place = [base ** c for c in range(k)]
+        dist = {0: 1.0}
+        for choices in voters:
+            self._tick()
+            nxt = {}
+            get = nxt.get
+            for code, p in dist.items():
+                for c, q in choices:
+                    bumped = code + place[c]
+                    nxt[bumped] = get(bumped, 0.0) + p * q
+            dist = nxt
+
+        exile = [0.0] * k
+        for code, p in dist.items():
+            counts = []
+            for _ in range(k):
+                code, n = divmod(code, base)
+                counts.append(n)
+            top = max(counts)
+            tied = [c for c in range(k) if counts[c] == top]
+            share = p / len(tied)
+            for c in tied:
+                exile[c] += share
+        self._put(key, exile)
+        return exile
+
+    def _kill(self, state):
+        """夜に i 番が『消される』確率のリスト"""
+        _, gn, like, _ = state
+        gnosias = [g for g in range(len(gn)) if gn[g]]
+        w = [0.0 if gn[h] else sum(self._kill_w[like[g][h]] for g in gnosias) for h in range(len(gn))]
+        total = sum(w)
+        return [wh / total for wh in w]
+
+    # ---------------- 好感度固定のモデル ----------------
+    def _frozen(self, state):
+        """好感度がもう変わらないとして、投票と夜だけをくり返したときの人間陣営の勝率"""
+        result = _outcome(state)
+        if result is not None:
+            return result
+        player_alive, gn, like, phase = state
+        if phase[0] == TALK:
+            state = (player_alive, gn, like, (VOTE,))
+        state = _canonical(state)
+        key = ("frozen", state)
+        hit = self._get(key)
+        if hit is not None:
+            return hit
+        self._tick()
+
+        if state[3][0] == VOTE:
+            dist, phase = self._exile(state), (NIGHT,)
+        else:
+            dist, phase = self._kill(state), (VOTE,)
+        value = sum(p * self._frozen(_remove(state, i, phase)) for i, p in enumerate(dist) if p)
+        self._put(key, value)
+        return value
+
+
+_SOLVERS = {}
+_SOLVERS_LOCK = threading.Lock()
+
+def get_solver(rules):
+    """rules ごとに共有する WinSolver（LRU 表をセッション・ゲームをまたいで使い回す）"""
+    with _SOLVERS_LOCK:
+        solver = _SOLVERS.get(rules)
+        if solver is None:
+            solver = _SOLVERS[rules] = WinSolver(rules)
+        return solver
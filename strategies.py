@@ -0,0 +1,66 @@
+# strategies.py
+# 既定の方針（engine.DefaultStrategy）と比べるための NPC の方針いくつか
+# 読み込むと engine.STRATEGIES に名前で登録される（tournament.py はこれを読んでから名前で引く）。
+#
+# 自作の方針は engine.Strategy を継承して talk / vote / kill を書き、
+# 名前で登録するか、"モジュール:クラス名" で tournament.py に渡す。
+
+from engine import Strategy, TALK_ACTIONS, register_strategy, sample_sparse
+
+
+class RandomStrategy(Strategy):
+    """好感度も役職も見ずに、発言・投票・『消す』相手を一様に選ぶ（下限の目安）"""
+
+    name = "random"
+
+    def talk(self, game, npc, suspicion):
+        action = game.rng.choice(TALK_ACTIONS)
+        return action, sample_sparse(game.rng, game.alive_pool, {}, 1.0, exclude=npc)
+
+    def vote(self, game, npc, suspicion):
+        return sample_sparse(game.rng, game.alive_pool, {}, 1.0, exclude=npc)
+
+    def kill(self, game, gn_list, humans):
+        return sample_sparse(game.rng, humans, {}, 1.0)
+
+
+class GrudgeStrategy(Strategy):
+    """いちばん好感度の低い相手を迷わず疑って投票する（同じならランダム）。
+    グノーシアのときは、自分たちをいちばん嫌っている人間を『消す』（口封じ）。"""
+
+    name = "grudge"
+
+    @staticmethod
+    def _lowest(rng, candidates, value):
+        best = None
+        tied = []
+        for name in candidates:
+            v = value(name)
+            if best is None or v < best:
+                best, tied = v, [name]
+            elif v == best:
+                tied.append(name)
+        return rng.choice(tied) if tied else None
+
+    def talk(self, game, npc, suspicion):
+        rules = game.rules
+        weights = rules.gn_talk_weights if game.roles[npc] == "グノーシア" else rules.human_talk_weights
+        action = game.rng.choices(TALK_ACTIONS, weights=weights, k=1)[0]
+        likes = game.likes_of(npc)
+        others = [n for n in game.alive_names() if n != npc]
+        if action == "庇う":
+            return action, self._lowest(game.rng, others, lambda n: -likes.get(n, 0))
+        return action, self._lowest(game.rng, others, lambda n: likes.get(n, 0))
+
+    def vote(self, game, npc, suspicion):
+        likes = game.likes_of(npc)
+        others = [n for n in game.alive_names() if n != npc]
+        return self._lowest(game.rng, others, lambda n: likes.get(n, 0))
+
+    def kill(self, game, gn_list, humans):
+        # 人間から見たグノーシアへの好感度の合計がいちばん低い人
+        return self._lowest(game.rng, list(humans), lambda h: sum(game.likes_of(h).get(g, 0) for g in gn_list))
+
+
+register_strategy(RandomStrategy())
+register_strategy(GrudgeStrategy())
@@ -0,0 +1,35 @@
+# tests/test_engine.py
+# engine の入力の受け付け（プレイヤーの発言）
+
+import engine
+
+
+def multi_player_game():
+    game = engine.init_game(seed=4, npc_names=engine.make_roster(8))
+    game.players = (engine.PLAYER_NAME, game.npc_names[0])
+    return game
+
+def test_statement_to_dead_target_is_ignored():
+    game = multi_player_game()
+    dead = game.npc_names[3]
+    game.eliminate(dead)
+    before = (len(game.events), dict(game.likes_of(dead)))
+    engine.apply_player_statement(game, dead, "疑う")
+    engine.apply_player_statement(game, dead, "庇う", speaker=game.npc_names[0])
+    assert (len(game.events), dict(game.likes_of(dead))) == before
+    assert game.player_statement is None
+
+def test_statement_to_self_is_ignored():
+    game = multi_player_game()
+    speaker = game.npc_names[0]
+    before = (len(game.events), dict(game.likes_of(speaker)))
+    engine.apply_player_statement(game, speaker, "疑う", speaker=speaker)
+    engine.apply_player_statement(game, engine.PLAYER_NAME, "庇う")
+    assert (len(game.events), dict(game.likes_of(speaker))) == before
+
+def test_statement_from_second_player_updates_likes():
+    game = multi_player_game()
+    speaker, target = game.npc_names[0], game.npc_names[1]
+    engine.apply_player_statement(game, target, "疑う", speaker=speaker)
+    assert game.likes_of(target).get(speaker) == game.rules.like_delta_down
+    assert game.player_statement is None  # あなたの発言ではない
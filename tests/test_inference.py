@@ -0,0 +1,64 @@
+# tests/test_inference.py
+# 役職推理（inference.RoleBelief）が公開された正体を取り込むか
+
+import pytest
+
+import engine
+from inference import MAX_HYPOTHESES, RoleBelief, hypothesis_count
+from replay import dump_game, load_game
+
+BELIEF_RULES = engine.Rules(belief_weight=2.0)
+
+
+def others(n, seat):
+    return [i for i in range(n) if i != seat]
+
+@pytest.mark.parametrize("n_players, exact", [(9, True), (121, False)])  # 121人は粒子近似
+@pytest.mark.parametrize("is_gnosia", [True, False])
+def test_exile_reveals_role(n_players, exact, is_gnosia):
+    assert (hypothesis_count(n_players, BELIEF_RULES.gn_counts) <= MAX_HYPOTHESES) == exact
+    belief = RoleBelief(n_players, BELIEF_RULES, seed=1)
+    for seat in range(1, n_players, 3):
+        belief.observe_statement(seat, seat % 2 == 0)
+    belief.commit()
+    seat = 4
+    belief.observe_exile(seat, is_gnosia)
+    expected = 1.0 if is_gnosia else 0.0
+    assert belief.suspicion()[others(n_players, seat), seat] == pytest.approx(expected)
+    assert belief.marginals()[seat] == pytest.approx(expected)
+    # 後から発言が入っても、粒子を引き直しても正体は動かない
+    for turn in range(30):
+        for other in range(turn % 3, n_players, 3):
+            belief.observe_statement(other, other % 2 == 0)
+        belief.commit()
+    belief.observe_kill(n_players - 1)
+    assert belief.suspicion()[others(n_players, seat), seat] == pytest.approx(expected)
+
+@pytest.mark.parametrize("n_npcs", [8, 120])
+def test_engine_and_replay_feed_exiles(n_npcs):
+    checked = 0
+    for seed in range(20):
+        game = engine.init_game(seed=seed, npc_names=engine.make_roster(n_npcs), rules=BELIEF_RULES)
+        engine.advance(game, "vote")
+        engine.vote(game)
+        (exiled,) = game.eliminated[-1:] or (None,)
+        if game.game_over or exiled is None:
+            continue
+        seat = game.seat[exiled]
+        expected = 1.0 if game.roles[exiled] == "グノーシア" else 0.0
+        for belief in (game.beliefs, load_game(dump_game(game), rules=BELIEF_RULES).beliefs):
+            assert belief.suspicion()[others(len(game.all_names), seat), seat] == pytest.approx(expected)
+        checked += 1
+    assert checked
+
+def test_particles_redrawn_around_revealed_roles():
+    # 全粒子が矛盾したときに事前分布から引き直す粒子も、公開された正体に従う
+    belief = RoleBelief(121, BELIEF_RULES, seed=2)
+    assert not belief.exact
+    belief.observe_exile(10, True)
+    belief.observe_exile(20, False)
+    belief.observe_kill(30)
+    table = belief._sample_prior(4000)
+    assert table[:, 10].all()
+    assert not table[:, [20, 30]].any()
+    assert set(table.sum(axis=1).tolist()) == set(BELIEF_RULES.gn_counts)
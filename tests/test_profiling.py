@@ -0,0 +1,73 @@
+# tests/test_profiling.py
+# 計測フック：渡した Profiler に数えること、乱数を引いた回数、同時に書き出しても壊れないこと
+
+import json
+import os
+import threading
+
+import pytest
+
+import engine
+import profiling
+from profiling import CountingRandom, Profiler, counting_random
+
+
+@pytest.fixture
+def installed():
+    profiler = Profiler(enabled=True)
+    profiling.install(profiler)
+    try:
+        yield profiler
+    finally:
+        profiling.uninstall()
+
+def test_install_counts_into_given_profiler(installed):
+    before = dict(profiling.PROFILER.counters)
+    game = engine.play_until_over(engine.init_game(seed=7))
+    assert installed.counters["rng_draws"] > 0
+    assert installed.timers["npc_talks"].count > 0
+    assert profiling.PROFILER.counters == before
+    # 数えるだけで、引く乱数は変わらない
+    profiling.uninstall()
+    assert engine.play_until_over(engine.init_game(seed=7)).events.to_bytes() == game.events.to_bytes()
+
+def test_every_draw_is_counted_once():
+    profiler = Profiler(enabled=True)
+    rng = counting_random(profiler)(3)
+    for call, draws in (
+        (lambda: rng.random(), 1),
+        (lambda: rng.choices("ab", weights=(1, 2), k=5), 5),
+        (lambda: rng.getrandbits(63), 1),
+    ):
+        start = profiler.counters.get("rng_draws", 0)
+        call()
+        assert profiler.counters["rng_draws"] - start == draws
+    # choice / sample は getrandbits を（やり直しを含めて）1回以上引く
+    for call in (lambda: rng.choice(range(10)), lambda: rng.sample(range(10), 3)):
+        start = profiler.counters["rng_draws"]
+        call()
+        assert profiler.counters["rng_draws"] > start
+    assert counting_random(profiling.PROFILER) is CountingRandom
+
+def test_concurrent_exports_do_not_interleave(tmp_path):
+    profiler = Profiler(enabled=True)
+    for i in range(200):
+        profiler.observe(f"phase{i}", i / 1000)
+    errors = []
+
+    def export():
+        try:
+            for _ in range(20):
+                profiler.export(str(tmp_path), force=True)
+        except Exception as e:  # noqa: BLE001  スレッドの中の失敗をテストに持ち帰る
+            errors.append(e)
+
+    threads = [threading.Thread(target=export) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert sorted(os.listdir(tmp_path)) == ["metrics.json", "metrics.prom"]
+    with open(tmp_path / "metrics.json", encoding="utf-8") as f:
+        assert len(json.load(f)["timers"]) == 200
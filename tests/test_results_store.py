@@ -0,0 +1,64 @@
+# tests/test_results_store.py
+# 結果ストア：書いた試合がそのまま読めること、書きかけ・壊れた列の扱い
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import engine
+from results_store import COLUMNS, GameRecords, ResultsStore, ResultsWriter
+
+
+def records(seeds, rules=None):
+    rec = GameRecords()
+    for seed in seeds:
+        rec.add(engine.play_until_over(engine.init_game(seed=seed, record_log=False, rules=rules)))
+    return rec
+
+def likes_of(game):
+    return [v for row in game.like_map.values() for v in row.values()]
+
+
+def test_round_trip(tmp_path):
+    writer = ResultsWriter(str(tmp_path))
+    writer.append(records(range(30)))
+    writer.append(records(range(30, 50)))
+    store = ResultsStore(str(tmp_path))
+    assert len(store) == 50
+    assert store.column("seed").tolist() == list(range(50))
+    game = engine.play_until_over(engine.init_game(seed=42, record_log=False))
+    assert store.column("like_min")[42] == min([0, *likes_of(game)])
+    assert store.seats("elim_order", 42) == [game.seat[n] for n in game.eliminated]
+
+def test_fractional_like_deltas_are_kept(tmp_path):
+    rules = engine.Rules(like_delta_up=0.5, like_delta_down=-0.25)
+    writer = ResultsWriter(str(tmp_path))
+    writer.append(records(range(10), rules))
+    store = ResultsStore(str(tmp_path))
+    for seed in range(10):
+        values = likes_of(engine.play_until_over(engine.init_game(seed=seed, record_log=False, rules=rules)))
+        assert store.column("like_sum")[seed] == pytest.approx(sum(values))
+        assert store.column("like_min")[seed] == pytest.approx(min([0, *values]))
+        assert store.column("like_max")[seed] == pytest.approx(max([0, *values]))
+    assert any(v % 1 for v in store.column("like_sum").tolist())
+
+def test_uncommitted_tail_is_dropped(tmp_path):
+    writer = ResultsWriter(str(tmp_path))
+    writer.append(records(range(5)))
+    # meta.json を書く前に落ちたことにする：列の後ろに余分なバイトがある
+    with open(tmp_path / "seed.col", "ab") as f:
+        f.write(b"\xff" * 8 * 3)
+    ResultsWriter(str(tmp_path)).append(records(range(5, 8)))
+    assert ResultsStore(str(tmp_path)).column("seed").tolist() == list(range(8))
+
+@pytest.mark.parametrize("filename", ["winner.col", "elim_order.offsets", "gn_seats.values"])
+def test_short_column_is_rejected(tmp_path, filename):
+    ResultsWriter(str(tmp_path)).append(records(range(5)))
+    path = tmp_path / filename
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    with pytest.raises(ValueError):
+        ResultsWriter(str(tmp_path))
+    assert set(COLUMNS) <= {p.stem for p in tmp_path.glob("*.col")}
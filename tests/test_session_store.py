@@ -0,0 +1,75 @@
+# tests/test_session_store.py
+# SessionStore の退避と、ttl_seconds を過ぎた退避済みゲームの掃除
+
+import pytest
+
+import engine
+from session_store import EXPIRE_INTERVAL, SessionStore
+
+
+def new_store(tmp_path, **kwargs):
+    return SessionStore(path=str(tmp_path / "sessions.sqlite3"), **kwargs)
+
+def disk_ids(store):
+    return sorted(row[0] for row in store._db.execute("SELECT session_id FROM games"))
+
+
+def test_evicted_game_comes_back(tmp_path):
+    store = new_store(tmp_path, idle_seconds=10)
+    game = engine.play_until_over(engine.init_game(seed=5))
+    store.put("a", game, now=0)
+    store.evict_idle(now=100)
+    assert disk_ids(store) == ["a"]
+    back = store.get("a", now=100)
+    assert back.events.to_bytes() == game.events.to_bytes()
+    assert disk_ids(store) == []  # 復元したら行は消える（古い状態が掃除や別プロセスから戻ってこない）
+    store.evict_idle(now=200)
+    assert disk_ids(store) == ["a"]
+
+def test_expire_drops_only_old_rows(tmp_path):
+    store = new_store(tmp_path, idle_seconds=10 ** 6, ttl_seconds=1000)
+    for i, sid in enumerate("abcd"):
+        store.put(sid, engine.init_game(seed=i), now=i * 400)
+    store.idle_seconds = 10
+    store.evict_idle(now=2000)  # 全部ディスクへ（最後に触られた時刻 0, 400, 800, 1200 のまま）
+    assert disk_ids(store) == ["a", "b", "c", "d"]
+    assert store.expire(now=1500) == 2
+    assert disk_ids(store) == ["c", "d"]
+    assert store.get("a", now=1500) is None
+    assert store.get("c", now=1500) is not None
+    assert disk_ids(store) == ["d"]
+
+def test_expire_runs_from_evict(tmp_path):
+    store = new_store(tmp_path, idle_seconds=10, ttl_seconds=100)
+    store.put("old", engine.init_game(seed=1), now=0)
+    store.evict_idle(now=50)
+    assert disk_ids(store) == ["old"]
+    # 掃除は EXPIRE_INTERVAL ごとなので、それまでは期限が切れていても残る
+    store.evict_idle(now=200)
+    assert disk_ids(store) == ["old"]
+    store.evict_idle(now=50 + EXPIRE_INTERVAL)
+    assert disk_ids(store) == []
+
+def test_ttl_none_keeps_everything(tmp_path):
+    store = new_store(tmp_path, idle_seconds=10, ttl_seconds=None)
+    store.put("a", engine.init_game(seed=1), now=0)
+    store.evict_idle(now=100)
+    assert store.expire(now=10 ** 9) == 0
+    assert disk_ids(store) == ["a"]
+
+def test_two_stores_do_not_both_restore(tmp_path):
+    # 同じファイルを開いた2つ目（別プロセスの代わり）は、1つ目が復元したゲームを読めない
+    first = new_store(tmp_path, idle_seconds=10)
+    second = new_store(tmp_path, idle_seconds=10)
+    first.put("a", engine.init_game(seed=2), now=0)
+    first.evict_idle(now=100)
+    assert first.get("a", now=100) is not None
+    assert second.get("a", now=100) is None
+
+def test_unreadable_row_is_kept(tmp_path):
+    store = new_store(tmp_path)
+    store._write([("bad", b"not a game", 0)])
+    with pytest.raises(ValueError):
+        store.get("bad", now=0)
+    assert disk_ids(store) == ["bad"]
+    assert store.active_count() == 0
@@ -0,0 +1,120 @@
+# tests/test_snapshots.py
+# 書き換え時コピー（GameState.own / snapshot / fork）の独立性と、巻き戻し・分岐の再現性
+
+import pytest
+
+import engine
+from replay import dump_game, load_game
+
+NPCS = [6, 40]  # 40人は抽選用の重み（WeightTable）を持つ大人数ロビー
+
+
+def like_rows(game):
+    return {a: {b: v for b, v in row.items() if v} for a, row in game.like_map.items()}
+
+def state(game):
+    """比べる中身（入れ物を複製してから読む）"""
+    beliefs = None
+    if game.beliefs is not None:
+        b = game.beliefs
+        beliefs = (b.llr.tolist(), b.logw.tolist(), b.known_human.tolist(), len(b.alive_checks))
+    return (
+        {a: row for a, row in like_rows(game).items() if row}, dict(game.alive), list(game.alive_order),
+        sorted(game.alive_pool), {r: sorted(s) for r, s in game.alive_by_role.items()},
+        list(game.eliminated), list(game.day_starts), game.day, game.phase, game.discussion_turn,
+        game.events.to_bytes(), beliefs,
+    )
+
+def new_game(seed, n_npcs, beliefs=False):
+    rules = engine.Rules(belief_weight=2.0) if beliefs else None
+    return engine.init_game(seed=seed, npc_names=engine.make_roster(n_npcs), rules=rules)
+
+
+@pytest.mark.parametrize("n_npcs", NPCS)
+@pytest.mark.parametrize("seed", range(5))
+def test_fork_leaves_parent_untouched(seed, n_npcs):
+    parent = new_game(seed, n_npcs)
+    engine.advance(parent, "vote")
+    before = state(parent)
+    timeline = list(parent.timeline)
+    child = parent.fork()
+    # 子だけを進める：好感度・生存者・ログ・日付・スナップショットの列がすべて変わる
+    engine.advance(child, "day")
+    engine.apply_player_statement(child, child.alive_names()[-1], "疑う")
+    engine.change_like(child, parent.npc_names[0], engine.PLAYER_NAME, 5)
+    assert state(parent) == before
+    assert parent.timeline == timeline
+    assert state(child) != before
+
+@pytest.mark.parametrize("n_npcs", NPCS)
+def test_parent_changes_do_not_leak_into_fork(n_npcs):
+    parent = new_game(1, n_npcs)
+    engine.advance(parent, "vote")
+    child = parent.fork()
+    before = state(child)
+    engine.play_until_over(parent)
+    assert state(child) == before
+
+def test_snapshot_is_frozen():
+    game = new_game(2, 6)
+    engine.advance(game, "vote")
+    snap = game.snapshot()
+    before = state(snap)
+    engine.play_until_over(game)
+    assert state(snap) == before
+    # スナップショットから分岐した2つのゲームも互いに独立
+    a, b = snap.fork(), snap.fork()
+    engine.advance(a, "day")
+    assert state(b) == before
+
+def test_fork_isolates_beliefs():
+    parent = new_game(3, 6, beliefs=True)
+    engine.advance(parent, "vote")
+    before = state(parent)
+    child = parent.fork()
+    engine.advance(child, "day")
+    engine.advance(child, "vote")
+    assert state(parent) == before
+    assert state(child)[-1] != before[-1]
+
+@pytest.mark.parametrize("n_npcs", NPCS)
+def test_fork_isolates_roster_sets(n_npcs):
+    parent = new_game(4, n_npcs)
+    child = parent.fork()
+    victim = parent.npc_names[0]
+    child.eliminate(victim)
+    assert parent.alive[victim] and victim in parent.alive_pool and victim in parent.alive_order
+    assert victim in parent.alive_by_role[parent.roles[victim]]
+    assert not child.alive[victim] and victim not in child.alive_pool
+
+@pytest.mark.parametrize("n_npcs", NPCS)
+@pytest.mark.parametrize("seed", range(5))
+def test_rewind_and_replay_reproduces_the_game(seed, n_npcs):
+    """巻き戻して同じ行動をとれば、元とまったく同じ展開をくり返す"""
+    game = engine.play_until_over(new_game(seed, n_npcs))
+    final = state(game)
+    for index, snap in enumerate(game.timeline):
+        again = engine.rewind_to(game, index)
+        assert state(again) == state(snap)
+        engine.play_until_over(again)
+        assert state(again) == final
+    # 元のゲームとその timeline は巻き戻しの影響を受けない
+    assert state(game) == final
+
+def test_rewind_matches_replay_from_log():
+    game = engine.play_until_over(new_game(6, 6))
+    for day in range(1, game.day + 1):
+        rewound = engine.rewind(game, day)
+        replayed = load_game(dump_game(game), until_day=day)
+        assert state(rewound) == state(replayed)
+
+def test_branch_diverges_without_touching_the_original():
+    game = new_game(7, 6)
+    engine.advance(game, "vote")
+    other = engine.branch(game)
+    engine.vote(game, game.alive_names()[1])
+    engine.vote(other, other.alive_names()[2])
+    assert state(game) != state(other)
+    original = state(game)
+    engine.play_until_over(other)
+    assert state(game) == original
@@ -0,0 +1,52 @@
+# tests/test_solver.py
+# 勝率の読み：同じルールの WinSolver を共有する別々のゲームが、互いの読みを待たないこと
+
+import threading
+import time
+
+import engine
+from solver import MODEL_END, WinSolver
+
+
+def new_game(seed, n_npcs):
+    return engine.init_game(seed=seed, npc_names=engine.make_roster(n_npcs), record_log=False)
+
+def test_solves_run_side_by_side():
+    solver = WinSolver(engine.DEFAULT_RULES)
+    started = threading.Event()
+    deep = threading.Thread(target=lambda: (started.set(), solver.solve(new_game(1, 5), budget=3.0)))
+    deep.start()
+    started.wait()
+    time.sleep(0.2)  # 深い読みが始まってから
+    begin = time.perf_counter()
+    odds = solver.solve(new_game(2, 4), budget=0.05)
+    waited = time.perf_counter() - begin
+    deep.join()
+    assert waited < 1.0  # 1つずつしか読めないと、3秒の読みが終わるまで待たされる
+    assert 0.0 <= odds.human <= 1.0
+
+def test_parallel_solves_match_serial():
+    games = [new_game(seed, 2) for seed in range(6)]
+    serial = [WinSolver(engine.DEFAULT_RULES).solve(g, budget=30.0) for g in games]
+    assert all(o.exact for o in serial)
+
+    shared = WinSolver(engine.DEFAULT_RULES)
+    results = [None] * len(games)
+
+    def work(i):
+        results[i] = shared.solve(games[i], budget=30.0)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(len(games))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for a, b in zip(serial, results):
+        assert b.exact
+        assert abs(a.human - b.human) < 1e-12
+
+def test_finished_game():
+    game = engine.play_until_over(new_game(3, 6))
+    odds = WinSolver(game.rules).solve(game)
+    assert odds.model == MODEL_END
+    assert odds.human == (1.0 if game.winner == "人間" else 0.0)
@@ -0,0 +1,42 @@
+# tests/test_tournament.py
+# 総当たり戦：名前のない方針の扱いと、名前の重複
+
+import pytest
+
+import strategies  # noqa: F401  見本の方針を登録する
+import tournament
+from engine import Strategy, get_strategy, make_roster, strategy_name
+
+
+class Unnamed(Strategy):
+    """name を決めていない方針（中身は既定の方針と同じ選び方）"""
+
+    def talk(self, game, npc, suspicion):
+        return get_strategy("default").talk(game, npc, suspicion)
+
+    def vote(self, game, npc, suspicion):
+        return get_strategy("default").vote(game, npc, suspicion)
+
+    def kill(self, game, gn_list, humans):
+        return get_strategy("default").kill(game, gn_list, humans)
+
+class AlsoUnnamed(Unnamed):
+    pass
+
+
+def test_unnamed_strategy_uses_class_name():
+    assert strategy_name(Unnamed()) == "Unnamed"
+    assert strategy_name(AlsoUnnamed()) == "AlsoUnnamed"
+    assert strategy_name(get_strategy("grudge")) == "grudge"
+
+def test_unnamed_strategies_stay_separate():
+    t = tournament.Tournament([Unnamed(), AlsoUnnamed(), "random"], n_games=20, npc_names=make_roster(4))
+    assert t.names == ["Unnamed", "AlsoUnnamed", "random"]
+    t.run(workers=1)
+    assert len(t.ratings()) == 3
+
+def test_duplicate_names_are_rejected():
+    with pytest.raises(ValueError):
+        tournament.Tournament([Unnamed(), Unnamed()])
+    with pytest.raises(SystemExit):
+        tournament.main(["default", "default", "-j", "1"])
@@ -0,0 +1,34 @@
+# tests/test_tune.py
+# tune.Tuner の止まり方（収束・上限）と、既定値で収束にたどり着けること
+
+import pytest
+
+import tune
+from tune import DEFAULT_MAX_GAMES, Tuner, wilson_interval
+
+
+def test_default_precision_is_reachable():
+    tuner = Tuner([{}])
+    assert tuner.games_needed() <= DEFAULT_MAX_GAMES
+    # games_needed 試合あれば、いちばん読みにくい p=0.5 でも半幅が precision に収まる
+    n = tuner.games_needed()
+    lo, hi = wilson_interval(n // 2, n, tuner.z)
+    assert (hi - lo) / 2 <= tuner.precision
+
+def test_converged_path_fires():
+    tuner = Tuner([{}], precision=0.05, batch=200, max_games=5000, min_games=200)
+    (cand,) = tuner.run(workers=1)
+    assert cand.status == "converged"
+    assert cand.result.games < tuner.max_games
+    lo, hi = cand.interval
+    assert (hi - lo) / 2 <= tuner.precision
+
+def test_budget_path_fires():
+    tuner = Tuner([{}], precision=0.001, batch=200, max_games=400, min_games=200)
+    (cand,) = tuner.run(workers=1)
+    assert cand.status == "budget"
+    assert cand.result.games == 400
+
+def test_unreachable_precision_is_rejected():
+    with pytest.raises(SystemExit):
+        tune.main(["--precision", "0.005", "--samples", "1", "-j", "1"])
@@ -0,0 +1,165 @@
+# tests/test_vectorized.py
+# NumPy 版（vectorized.py）が engine.py と同じ確率分布で動いているかを、勝率と1日目の各段階の分布の一致で確かめる
+
+import math
+from statistics import NormalDist
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import engine
+from engine import DEFAULT_RULES, NPC_NAMES, PLAYER_NAME, Rules, init_game, play_until_over
+import vectorized
+from vectorized import MAX_BATCH_CELLS, BatchGames, batch_games, run_vectorized
+
+ENGINE_GAMES = 3000
+VECTOR_GAMES = 30000
+Z_LIMIT = 4.0  # 両側でおよそ 6e-5。シードは固定なので落ちるなら分布がずれている
+ALPHA = 1e-4   # カイ二乗検定の有意水準
+LIKE_CLIP = 4  # 好感度の分布はこの幅で端をまとめて数える
+
+# 既定値とは違うルール（どの定数を読み落としても分布が動くように、全部少しずつ変える）
+SKEWED_RULES = Rules(
+    like_delta_up=2,
+    like_delta_down=-1,
+    gn_talk_weights=(0.9, 0.1),
+    human_talk_weights=(0.3, 0.7),
+    like_slope=1.0,
+    player_vote_bias=4.0,
+    max_discussion_turns=3,
+    gn_counts=(2,),
+)
+
+
+def engine_rate(rules, n_games=ENGINE_GAMES):
+    wins = 0
+    for seed in range(n_games):
+        game = play_until_over(init_game(seed=seed, record_log=False, rules=rules))
+        wins += game.winner == "人間"
+    return wins / n_games
+
+def clip(v):
+    return max(-LIKE_CLIP, min(LIKE_CLIP, int(v)))
+
+def engine_first_day(rules, n_games=ENGINE_GAMES):
+    """1日目の (議論後の好感度を2人1組 (a→b, b→a) で数えた分布, プレイヤーが追放された数, 夜に消された人へのグノーシアからの好感度の分布)"""
+    likes, exiled, kills = {}, 0, {}
+    for seed in range(n_games):
+        game = init_game(seed=seed, record_log=False, rules=rules)
+        engine.advance(game, "vote")
+        names = game.all_names
+        for i, a in enumerate(names):
+            for b in names[i + 1:]:
+                v = (clip(game.likes_of(a).get(b, 0)), clip(game.likes_of(b).get(a, 0)))
+                likes[v] = likes.get(v, 0) + 1
+        gnosias = [n for n in game.all_names if game.roles[n] == "グノーシア"]
+        engine.vote(game)
+        exiled += not game.alive[PLAYER_NAME]
+        if game.game_over:
+            continue
+        before = set(game.alive_names())
+        engine.resolve_night(game)
+        (victim,) = before - set(game.alive_names())
+        v = clip(sum(game.likes_of(g).get(victim, 0) for g in gnosias if game.alive[g]))
+        kills[v] = kills.get(v, 0) + 1
+    return likes, exiled, kills
+
+def vector_first_day(rules, n_games=VECTOR_GAMES):
+    batch = BatchGames(n_games, seed=2, rules=rules)
+    active = ~batch.over
+    for _ in range(rules.max_discussion_turns):
+        batch.talk_turn(active)
+    a, b = np.triu_indices(batch.n_players, k=1)
+    clipped = np.clip(batch.likes, -LIKE_CLIP, LIKE_CLIP)
+    pairs = np.stack([clipped[:, a, b].ravel(), clipped[:, b, a].ravel()], axis=1)
+    values, counts = np.unique(pairs, axis=0, return_counts=True)
+    likes = dict(zip(map(tuple, values.tolist()), counts.tolist()))
+    active = batch.vote(active)
+    exiled = int((~batch.alive[:, 0]).sum())
+    before = batch.alive.copy()
+    active = batch.night(active)
+    killed = before & ~batch.alive
+    g, victim = np.nonzero(killed)
+    gn_alive = (batch.alive & batch.is_gn)[g]
+    to_victim = batch.likes[g, :, victim]  # [試合, グノーシア側の席] → 消された人への好感度
+    sums = np.clip((to_victim * gn_alive).sum(axis=1), -LIKE_CLIP, LIKE_CLIP)
+    values, counts = np.unique(sums, return_counts=True)
+    return likes, exiled, dict(zip(values.tolist(), counts.tolist()))
+
+def chi2_two_sample(h1, h2):
+    """2つのヒストグラムが同じ分布から出たかのカイ二乗統計量と自由度（少ない枠はまとめない代わりに除く）"""
+    n1, n2 = sum(h1.values()), sum(h2.values())
+    stat, df = 0.0, -1
+    for k in set(h1) | set(h2):
+        a, b = h1.get(k, 0), h2.get(k, 0)
+        if a + b < 20:
+            continue
+        e1, e2 = (a + b) * n1 / (n1 + n2), (a + b) * n2 / (n1 + n2)
+        stat += (a - e1) ** 2 / e1 + (b - e2) ** 2 / e2
+        df += 1
+    return stat, df
+
+def chi2_critical(df, alpha=ALPHA):
+    """カイ二乗分布の上側 alpha 点（Wilson–Hilferty 近似）"""
+    z = NormalDist().inv_cdf(1 - alpha)
+    return df * (1 - 2 / (9 * df) + z * (2 / (9 * df)) ** 0.5) ** 3
+
+def z_score(p1, n1, p2, n2):
+    p = (p1 * n1 + p2 * n2) / (n1 + n2)
+    return (p1 - p2) / math.sqrt(p * (1 - p) * (1 / n1 + 1 / n2))
+
+
+@pytest.mark.parametrize("rules", [DEFAULT_RULES, SKEWED_RULES], ids=["default", "skewed"])
+def test_win_rate_matches_engine(rules):
+    expected = engine_rate(rules)
+    result = run_vectorized(VECTOR_GAMES, seed=1, rules=rules)
+    actual = result.win_rates()["人間"]
+    assert abs(z_score(expected, ENGINE_GAMES, actual, VECTOR_GAMES)) < Z_LIMIT, (expected, actual)
+
+@pytest.mark.parametrize("rules", [DEFAULT_RULES, SKEWED_RULES], ids=["default", "skewed"])
+def test_first_day_matches_engine(rules):
+    """勝率だけでは効きにくい定数（好感度の変化量・重みの傾き・投票の偏り）も、1日目の各段階の分布で比べる"""
+    e_likes, e_exiled, e_kills = engine_first_day(rules)
+    v_likes, v_exiled, v_kills = vector_first_day(rules)
+    for name, h1, h2 in (("likes", e_likes, v_likes), ("kills", e_kills, v_kills)):
+        stat, df = chi2_two_sample(h1, h2)
+        assert stat < chi2_critical(df), (name, h1, h2)
+    z = z_score(e_exiled / ENGINE_GAMES, ENGINE_GAMES, v_exiled / VECTOR_GAMES, VECTOR_GAMES)
+    assert abs(z) < Z_LIMIT, (e_exiled, v_exiled)
+
+def test_rules_change_the_outcome():
+    """ルールを読んでいなければ、ずらしたルールでも既定と同じ勝率になってしまう"""
+    default = run_vectorized(VECTOR_GAMES, seed=1).win_rates()["人間"]
+    skewed = run_vectorized(VECTOR_GAMES, seed=1, rules=SKEWED_RULES).win_rates()["人間"]
+    assert abs(z_score(default, VECTOR_GAMES, skewed, VECTOR_GAMES)) > Z_LIMIT
+
+def test_gn_counts_from_rules():
+    batch = BatchGames(1000, seed=0, rules=Rules(gn_counts=(2, 3)))
+    assert set(np.unique(batch.gn_count)) == {2, 3}
+    assert (batch.is_gn.sum(axis=1) == batch.gn_count).all()
+
+def test_belief_weight_is_rejected():
+    with pytest.raises(ValueError):
+        BatchGames(10, n_npcs=len(NPC_NAMES), rules=Rules(belief_weight=1.0))
+
+def test_large_lobbies_use_smaller_batches(monkeypatch):
+    assert batch_games(len(NPC_NAMES)) == vectorized.DEFAULT_BATCH_SIZE
+    for n_npcs in (100, 500, 5000):
+        size = batch_games(n_npcs)
+        assert size >= 1
+        assert size == 1 or size * (n_npcs + 1) ** 2 <= MAX_BATCH_CELLS
+    # 上限を小さくして、試合数がそろったまま何回にも分けて進むこと
+    sizes = []
+
+    class Recording(BatchGames):
+        def __init__(self, n_games, **kwargs):
+            sizes.append(n_games)
+            super().__init__(n_games, **kwargs)
+
+    monkeypatch.setattr(vectorized, "MAX_BATCH_CELLS", 50 * 31 * 31)
+    monkeypatch.setattr(vectorized, "BatchGames", Recording)
+    result = run_vectorized(120, n_npcs=30)
+    assert sizes == [50, 50, 20]
+    assert result.games == 120
+
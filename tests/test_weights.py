@@ -0,0 +1,146 @@
+# tests/test_weights.py
+# 大人数ロビーの抽選用の木（WeightTree / WeightTable / sample_tree）が、
+# 線形の抽選（sample_sparse）と同じ分布で引けるか、好感度の変化・脱落のあとも正しく保たれるか
+
+import random
+from statistics import NormalDist
+
+import pytest
+
+import engine
+from engine import (
+    PLAYER_NAME, SAMPLER_MIN_PLAYERS, WEIGHT_SCALE, WeightTree, change_like, sample_sparse, sample_tree,
+    weight_from_like_for_suspicion, weight_from_like_for_trust, weights_from_likes,
+)
+
+DRAWS = 40000
+ALPHA = 1e-4  # シードは固定なので、落ちるなら分布がずれている
+
+
+def chi2_critical(df, alpha=ALPHA):
+    """カイ二乗分布の上側 alpha 点（Wilson–Hilferty 近似）"""
+    z = NormalDist().inv_cdf(1 - alpha)
+    return df * (1 - 2 / (9 * df) + z * (2 / (9 * df)) ** 0.5) ** 3
+
+def chi2(counts, probs, n):
+    return sum((counts.get(k, 0) - n * p) ** 2 / (n * p) for k, p in probs.items())
+
+def assert_same_distribution(draw, probs, seed=0):
+    rng = random.Random(seed)
+    counts = {}
+    for _ in range(DRAWS):
+        name = draw(rng)
+        assert name in probs, name
+        counts[name] = counts.get(name, 0) + 1
+    assert chi2(counts, probs, DRAWS) < chi2_critical(len(probs) - 1)
+
+def lobby(seed=0, n_npcs=40, turns=3, exiles=3):
+    """好感度がばらけて、何人か脱落した大人数ロビー"""
+    game = engine.init_game(seed=seed, npc_names=engine.make_roster(n_npcs), record_log=False)
+    assert game.weights is not None
+    rng = random.Random(seed)
+    names = game.all_names
+    for _ in range(turns):
+        engine.advance_discussion(game)
+    for _ in range(300):
+        a, b = rng.sample(names, 2)
+        change_like(game, a, b, rng.choice((-3, -1, 1, 2)))
+    for name in rng.sample(game.npc_names, exiles):
+        game.eliminate(name)
+    return game
+
+def linear_probs(game, npc, weight, bonus=0.0):
+    """sample_sparse と同じ組み立て方で、npc が各人を引く確率"""
+    slope = game.rules.like_slope
+    pool = game.alive_pool
+    weights = {c: 1.0 for c in pool if c != npc}
+    for c, v in game.likes_of(npc).items():
+        if c in weights:
+            weights[c] = weight(v, slope)
+    if bonus and game.alive[PLAYER_NAME] and npc != PLAYER_NAME:
+        weights[PLAYER_NAME] += bonus
+    total = sum(weights.values())
+    return {c: w / total for c, w in weights.items()}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_tree_matches_linear_distribution_for_suspicion(seed):
+    game = lobby(seed)
+    npc = next(n for n in game.npc_names if game.alive[n] and len(game.likes_of(n)) > 5)
+    probs = linear_probs(game, npc, weight_from_like_for_suspicion)
+    tree = game.weights.row(npc).suspicion
+    assert_same_distribution(lambda rng: sample_tree(rng, game.alive_pool, tree, exclude=npc), probs, seed)
+    # 線形の抽選そのものも同じ分布（テスト側の期待値の組み立てが正しいことの確認）
+    special = {c: weight_from_like_for_suspicion(v, game.rules.like_slope)
+               for c, v in game.likes_of(npc).items() if c in game.alive_pool}
+    assert_same_distribution(lambda rng: sample_sparse(rng, game.alive_pool, special, 1.0, exclude=npc), probs, seed)
+
+def test_tree_matches_linear_distribution_for_trust_and_vote_bonus():
+    game = lobby(1)
+    npc = next(n for n in game.npc_names if game.alive[n] and len(game.likes_of(n)) > 5)
+    row = game.weights.row(npc)
+    probs = linear_probs(game, npc, weight_from_like_for_trust)
+    assert_same_distribution(lambda rng: sample_tree(rng, game.alive_pool, row.trust, exclude=npc), probs)
+
+    bias = game.rules.player_vote_bias
+    probs = linear_probs(game, npc, weight_from_like_for_suspicion, bonus=bias)
+    assert_same_distribution(
+        lambda rng: sample_tree(rng, game.alive_pool, row.suspicion, exclude=npc,
+                                bonus_names=(PLAYER_NAME,), bonus=bias),
+        probs,
+    )
+
+def test_tree_find_matches_cumulative_weights():
+    rng = random.Random(0)
+    tree = WeightTree()
+    weights = {}
+    for i in range(100):
+        name = f"n{i}"
+        weights[name] = rng.choice((0.1, 0.5, 1.0, 1.3, 2.2))
+        tree.set(name, weights[name])
+    for name in rng.sample(sorted(weights), 30):
+        weights[name] = rng.choice((0.0, 0.1, 3.0))
+        tree.set(name, weights[name])
+    order = [n for n in tree._names[1:]]
+    acc = 0.0
+    for name in order:
+        w = weights[name]
+        if w > 0:
+            # 区間の真ん中を引けばその人
+            assert tree.find(acc + w / 2) == name
+        acc += w
+    assert tree.total == pytest.approx(sum(weights.values()))
+    assert tree.count == sum(1 for w in weights.values() if w > 0)
+
+@pytest.mark.parametrize("n_npcs", [SAMPLER_MIN_PLAYERS - 1, 40, 120])
+@pytest.mark.parametrize("seed", range(3))
+def test_table_tracks_change_like_and_eliminations(n_npcs, seed):
+    game = lobby(seed, n_npcs=n_npcs, exiles=n_npcs // 4)
+    slope = game.rules.like_slope
+    weights = game.weights
+    for npc, row in weights.rows.items():
+        assert game.alive[npc]
+        for tree, weight in ((row.suspicion, weight_from_like_for_suspicion), (row.trust, weight_from_like_for_trust)):
+            expected = {c: weight(v, slope) for c, v in game.likes_of(npc).items() if game.alive[c]}
+            actual = {n: tree._w[i] / WEIGHT_SCALE for n, i in tree._slot.items() if tree._w[i] > 0}
+            assert actual == pytest.approx(expected)
+            assert tree.count == len(expected)
+            assert tree.total == pytest.approx(sum(expected.values()))
+            # Fenwick の各枠が受け持つ区間の合計と一致している
+            for i in range(1, len(tree._tree)):
+                assert tree._tree[i] == sum(tree._w[i - (i & -i) + 1:i + 1])
+        if row.kill is not None:
+            expected = {c: max(0.1, 1.0 - slope * v) for c, v in game.likes_of(npc).items()
+                        if game.alive[c] and game.roles[c] == "人間"}
+            actual = {n: row.kill._w[i] / WEIGHT_SCALE for n, i in row.kill._slot.items() if row.kill._w[i] > 0}
+            assert actual == pytest.approx(expected)
+    # 脱落者はどの行にも残らず、作り直した表と同じ
+    for name in game.eliminated:
+        assert name not in weights.rows
+        assert all(name not in row.suspicion for row in weights.rows.values())
+    rebuilt = weights_from_likes(game)
+    for npc, row in weights.rows.items():
+        other = rebuilt.row(npc)
+        live = {n: row.suspicion._w[i] for n, i in row.suspicion._slot.items() if row.suspicion._w[i]}
+        fresh = {n: other.suspicion._w[i] for n, i in other.suspicion._slot.items() if other.suspicion._w[i]}
+        assert live == fresh
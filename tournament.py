@@ -0,0 +1,260 @@
+# tournament.py
+# NPC の方針（engine.Strategy）どうしの総当たり戦。Elo 式のレーティングを信頼区間つきで出す
+# 実行: python tournament.py default random grudge -n 2000 -j 8
+#       python tournament.py default mybot:MyStrategy      （自作の方針は "モジュール:クラス名"）
+#
+# 1つの対戦（A と B）は、シードごとに「席を2組に分けて A と B を割り当てた試合」と
+# 「同じシードで割り当てを入れ替えた試合」の2試合1組（デュプリケート）で行う。
+# 配役はシードで決まるので、どの席・役職も両方の方針で1回ずつ遊ぶことになり、配役の運が打ち消される。
+# そろうのは配役と最初の乱数の状態まで。方針が違えば引く乱数の数が変わるので、手番の乱数は
+# 最初に展開が分かれたところからずれる（手番ごとに (シード, 日, 手番) から作り直しても
+# スコアのばらつきは縮まらず、遅くなるだけだった）。シードは全部の組で同じものを使う。
+# 1組のスコアは、A の席が勝った数 /（A の席 + B の席が勝った数）。両方の試合で同じ陣営が勝てば 0.5。
+#
+# レーティングは全組のスコアから Bradley–Terry モデルを最尤推定して Elo の尺度にしたもの
+# （最初に挙げた方針が ELO_BASE）。信頼区間はシードを選び直すブートストラップで出す。
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from itertools import combinations
+
+import strategies  # noqa: F401  見本の方針を登録する
+from engine import NPC_NAMES, get_strategy, init_game, make_roster, play_until_over, strategy_name
+
+DEFAULT_GAMES = 1000      # 1つの対戦あたりのシード数（1シード2試合）
+DEFAULT_CHUNK = 100       # 1タスクあたりのシード数
+DEFAULT_BOOTSTRAP = 1000
+DEFAULT_ALPHA = 0.05
+ELO_BASE = 1500.0
+ELO_SCALE = 400.0 / math.log(10)
+PRIOR = 0.5               # 全勝・全敗でも発散しないよう、各対戦に足す引き分けの組数
+
+
+# ---------------------------------------
+# 試合
+# ---------------------------------------
+def make_seeds(n, seed=0):
+    """全部の対戦で共通に使うシード"""
+    rng = random.Random(seed)
+    return [rng.getrandbits(63) for _ in range(n)]
+
+def seat_split(seed, n_seats):
+    """席を2組に分ける（True の席が A）。シードごとに分け方が変わる"""
+    a = set(random.Random(seed).sample(range(n_seats), n_seats // 2))
+    return [i in a for i in range(n_seats)]
+
+def play(seed, seat_strategies, npc_names, rules=None):
+    """全席を NPC の方針で動かして決着まで進める（プレイヤーの席も seat_strategies[0] が動かす）"""
+    game = init_game(seed=seed, npc_names=npc_names, record_log=False, rules=rules)
+    game.players = ()
+    game.strategies = seat_strategies
+    return play_until_over(game)
+
+def duplicate(seed, a, b, npc_names, rules=None):
+    """A と B の1組（2試合）。(A の席が勝った数, B の席が勝った数) を返す"""
+    n_seats = len(npc_names) + 1
+    is_a = seat_split(seed, n_seats)
+    wins = [0, 0]
+    for swap in (False, True):
+        game = play(seed, tuple(a if x != swap else b for x in is_a), npc_names, rules)
+        for i, name in enumerate(game.all_names):
+            if game.roles[name] == game.winner:
+                wins[0 if is_a[i] != swap else 1] += 1
+    return wins
+
+def run_chunk(args):
+    """1ワーカー分。方針は名前で受け取り、ワーカー側で引く（自作の方針も import される）"""
+    key, spec_a, spec_b, seeds, npc_names, rules = args
+    a, b = get_strategy(spec_a), get_strategy(spec_b)
+    return key, [duplicate(seed, a, b, npc_names, rules) for seed in seeds]
+
+
+# ---------------------------------------
+# レーティング
+# ---------------------------------------
+def score(wins):
+    total = wins[0] + wins[1]
+    return wins[0] / total if total else 0.5
+
+def fit_bradley_terry(n_players, totals, counts, iterations=200, tol=1e-10):
+    """totals[(i, j)] = i が j から取ったスコアの合計、counts[(i, j)] = 組数（i < j）。
+    MM 法で強さを推定し、プレイヤー0 を ELO_BASE とした Elo を返す。"""
+    wins = [0.0] * n_players
+    games = {}
+    for (i, j), n in counts.items():
+        s = totals[(i, j)] + PRIOR
+        n = n + 2 * PRIOR
+        wins[i] += s
+        wins[j] += n - s
+        games[(i, j)] = n
+    strength = [1.0] * n_players
+    for _ in range(iterations):
+        denom = [0.0] * n_players
+        for (i, j), n in games.items():
+            d = n / (strength[i] + strength[j])
+            denom[i] += d
+            denom[j] += d
+        new = [wins[i] / denom[i] if denom[i] else strength[i] for i in range(n_players)]
+        scale = math.exp(sum(math.log(x) for x in new) / n_players)
+        new = [x / scale for x in new]
+        done = max(abs(x - y) for x, y in zip(new, strength)) < tol
+        strength = new
+        if done:
+            break
+    return [ELO_BASE + ELO_SCALE * math.log(x / strength[0]) for x in strength]
+
+
+class Tournament:
+    """方針の総当たり戦。pair_scores[(i, j)][k] はシード k での i 対 j の (i の勝ち, j の勝ち)"""
+
+    def __init__(self, specs, n_games=DEFAULT_GAMES, seed=0, npc_names=None, rules=None, chunk_size=DEFAULT_CHUNK):
+        self.specs = list(specs)
+        self.names = [strategy_name(get_strategy(s)) for s in self.specs]
+        # 名前が同じだと結果の表で1つにまとまってしまうので、ここで断る
+        for name in self.names:
+            if self.names.count(name) > 1:
+                raise ValueError(f"方針の名前が重複しています: {name}（name 属性で別の名前をつけてください）")
+        self.seeds = make_seeds(n_games, seed)
+        self.npc_names = list(NPC_NAMES if npc_names is None else npc_names)
+        self.rules = rules
+        self.chunk_size = chunk_size
+        self.pairs = list(combinations(range(len(self.specs)), 2))
+        self.pair_scores = {pair: [None] * n_games for pair in self.pairs}
+
+    @property
+    def games_played(self):
+        return 2 * len(self.seeds) * len(self.pairs)
+
+    def tasks(self):
+        for i, j in self.pairs:
+            for start in range(0, len(self.seeds), self.chunk_size):
+                seeds = self.seeds[start:start + self.chunk_size]
+                yield ((i, j), start), self.specs[i], self.specs[j], seeds, self.npc_names, self.rules
+
+    def record(self, part):
+        (pair, start), results = part
+        self.pair_scores[pair][start:start + len(results)] = results
+
+    def run(self, workers=None):
+        if workers == 1:
+            for task in self.tasks():
+                self.record(run_chunk(task))
+            return self
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(run_chunk, self.tasks()):
+                self.record(part)
+        return self
+
+    def scores(self):
+        """対戦ごとの、シード順の1組ずつのスコア"""
+        return {pair: [score(w) for w in results] for pair, results in self.pair_scores.items()}
+
+    def ratings(self, indices=None):
+        """シード indices（省略時は全部）での Elo"""
+        if indices is None:
+            indices = range(len(self.seeds))
+        totals, counts = {}, {}
+        for pair, scores in self.scores().items():
+            totals[pair] = sum(scores[k] for k in indices)
+            counts[pair] = len(indices)
+        return fit_bradley_terry(len(self.specs), totals, counts)
+
+    def intervals(self, n_boot=DEFAULT_BOOTSTRAP, alpha=DEFAULT_ALPHA, seed=0):
+        """シードを選び直すブートストラップでの Elo の (1-alpha) 区間。共通乱数の相関ごと選び直す"""
+        rng = random.Random(seed)
+        n = len(self.seeds)
+        scores = self.scores()
+        samples = []
+        for _ in range(n_boot):
+            indices = rng.choices(range(n), k=n)
+            totals = {pair: sum(s[k] for k in indices) for pair, s in scores.items()}
+            samples.append(fit_bradley_terry(len(self.specs), totals, {pair: n for pair in scores}))
+        lo_k = int(alpha / 2 * n_boot)
+        hi_k = min(n_boot - 1, int((1 - alpha / 2) * n_boot))
+        out = []
+        for p in range(len(self.specs)):
+            values = sorted(s[p] for s in samples)
+            out.append((values[lo_k], values[hi_k]))
+        return out
+
+    def pair_summary(self, pair):
+        """(平均スコア, 標準誤差, 勝ち越し, 引き分け, 負け越し)"""
+        scores = self.scores()[pair]
+        n = len(scores)
+        mean = sum(scores) / n
+        var = sum((s - mean) ** 2 for s in scores) / (n - 1) if n > 1 else 0.0
+        wins = sum(s > 0.5 for s in scores)
+        draws = sum(s == 0.5 for s in scores)
+        return mean, math.sqrt(var / n), wins, draws, n - wins - draws
+
+
+# ---------------------------------------
+# コマンドライン
+# ---------------------------------------
+def format_report(t, ratings, intervals, elapsed):
+    lines = [
+        f"方針: {len(t.specs)}  対戦: {len(t.pairs)}  試合数: {t.games_played:,}"
+        f"  ({t.games_played / elapsed:,.0f} 試合/秒)",
+        f"レーティング（{t.names[0]} = {ELO_BASE:.0f}、区間はシードのブートストラップ）:",
+    ]
+    for p in sorted(range(len(t.specs)), key=lambda p: -ratings[p]):
+        lo, hi = intervals[p]
+        lines.append(f"  {ratings[p]:7.1f} [{lo:7.1f}, {hi:7.1f}]  {t.names[p]}")
+    lines.append("対戦成績（左の方針から見たスコア ± 標準誤差、勝ち越し/引き分け/負け越し）:")
+    for i, j in t.pairs:
+        mean, se, w, d, l = t.pair_summary((i, j))
+        lines.append(f"  {t.names[i]} vs {t.names[j]}: {mean:.4f} ± {se:.4f}  ({w}/{d}/{l})")
+    return "\n".join(lines)
+
+def dump_results(t, ratings, intervals, path):
+    data = {
+        "strategies": t.specs,
+        "ratings": {t.names[p]: {"elo": ratings[p], "interval": list(intervals[p])} for p in range(len(t.specs))},
+        "pairs": [
+            dict(zip(("a", "b", "score", "stderr", "wins", "draws", "losses"),
+                     (t.names[i], t.names[j], *t.pair_summary((i, j)))))
+            for i, j in t.pairs
+        ],
+        "seeds": len(t.seeds),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NPC の方針どうしの総当たり戦")
+    parser.add_argument("strategies", nargs="+", help="方針の名前か モジュール:クラス名（最初のものが基準）")
+    parser.add_argument("-n", "--games", type=int, default=DEFAULT_GAMES, help="1対戦あたりのシード数（1シード2試合）")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="ワーカープロセス数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--npcs", type=int, default=len(NPC_NAMES), help="NPCの人数（席数はこれ＋1）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help="1タスクあたりのシード数")
+    parser.add_argument("--bootstrap", type=int, default=DEFAULT_BOOTSTRAP, help="ブートストラップの回数")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="区間の有意水準")
+    parser.add_argument("--out", help="結果を書き出す JSON")
+    args = parser.parse_args(argv)
+    if len(args.strategies) < 2:
+        parser.error("方針を2つ以上挙げてください")
+
+    try:
+        t = Tournament(
+            args.strategies, n_games=args.games, seed=args.seed,
+            npc_names=make_roster(args.npcs), chunk_size=args.chunk_size,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    t.run(workers=args.workers)
+    elapsed = time.perf_counter() - start
+    ratings = t.ratings()
+    intervals = t.intervals(args.bootstrap, args.alpha, args.seed)
+    print(format_report(t, ratings, intervals, elapsed))
+    if args.out:
+        dump_results(t, ratings, intervals, args.out)
+
+if __name__ == "__main__":
+    main()
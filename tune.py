@@ -0,0 +1,287 @@
+# tune.py
+# バランス定数（engine.Rules）の組み合わせを総当たり／ランダムに探して、陣営の勝率が目標に近いものを探す
+# 実行: python tune.py --samples 200 -j 8
+#
+# 各組み合わせは数百試合ずつ追加で回し、そのたびに勝率の信頼区間を見直す。
+# 区間が十分狭くなったもの（収束）や、今の最良候補に明らかに負けているもの（打ち切り）は
+# それ以上回さないので、大半の組み合わせは少ない試合数で評価が終わる。
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from statistics import NormalDist
+
+from engine import DEFAULT_RULES, NPC_NAMES, make_roster
+from simulate import BatchResult, chunk_seed, run_chunk
+
+# 探す範囲（Rules の引数名 → 候補の値）
+SEARCH_SPACE = {
+    "like_delta_up": [1, 2],
+    "like_delta_down": [-1, -2],
+    "gn_talk_weights": [(0.6, 0.4), (0.7, 0.3), (0.8, 0.2)],
+    "human_talk_weights": [(0.5, 0.5), (0.6, 0.4), (0.7, 0.3)],
+    "like_slope": [0.1, 0.3, 0.5],
+    "player_vote_bias": [0.0, 0.3, 0.6],
+    "max_discussion_turns": [3, 5, 7],
+    "gn_counts": [(1,), (1, 2), (2,)],
+}
+
+DEFAULT_TARGET = 0.5       # 目標とする人間陣営の勝率
+DEFAULT_PRECISION = 0.015  # 信頼区間の半幅がこれ以下になったら収束（既定の上限試合数で届く幅）
+DEFAULT_BATCH = 500        # 1回に追加する試合数
+DEFAULT_MAX_GAMES = 20000  # 1組み合わせあたりの上限
+DEFAULT_MIN_GAMES = 1000   # これ未満では打ち切らない
+DEFAULT_ALPHA = 0.05
+
+
+# ---------------------------------------
+# 探索する組み合わせ
+# ---------------------------------------
+def grid_configs(space):
+    """space の全組み合わせ"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+def random_configs(space, n, seed=0):
+    """space から重複なしに n 通り選ぶ（全組み合わせより多ければ全部）"""
+    total = math.prod(len(v) for v in space.values())
+    if n >= total:
+        return grid_configs(space)
+    rng = random.Random(seed)
+    seen = set()
+    configs = []
+    while len(configs) < n:
+        idx = tuple(rng.randrange(len(v)) for v in space.values())
+        if idx in seen:
+            continue
+        seen.add(idx)
+        configs.append({k: space[k][i] for k, i in zip(space, idx)})
+    return configs
+
+def load_space(path):
+    """JSON の探索範囲を読む（組になる値は配列で書く）"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return {k: [tuple(v) if isinstance(v, list) else v for v in values] for k, values in raw.items()}
+
+
+# ---------------------------------------
+# 逐次検定
+# ---------------------------------------
+def wilson_interval(wins, n, z):
+    """勝率の Wilson 信頼区間"""
+    if n == 0:
+        return 0.0, 1.0
+    p = wins / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+class Candidate:
+    """評価中の1組み合わせ"""
+
+    __slots__ = ("params", "rules", "result", "batches", "pending", "status", "interval")
+
+    def __init__(self, params):
+        self.params = params
+        self.rules = DEFAULT_RULES.replace(**params)
+        self.result = BatchResult()
+        self.batches = 0      # 投入したバッチ数（バッチ番号＝乱数シードの番号）
+        self.pending = False  # 実行中のバッチがあるか
+        self.status = None    # None（評価中）/ "converged" / "pruned" / "budget"
+        self.interval = (0.0, 1.0)
+
+    def human_rate(self):
+        return self.result.win_rates()["人間"]
+
+    def distance(self, target):
+        """目標からの距離の (下限, 上限)"""
+        lo, hi = self.interval
+        upper = max(abs(lo - target), abs(hi - target))
+        lower = 0.0 if lo <= target <= hi else min(abs(lo - target), abs(hi - target))
+        return lower, upper
+
+class Tuner:
+    """組み合わせごとにバッチを投入し、結果が返るたびに続けるかを決める。
+
+    全組み合わせで同じバッチ番号には同じシードを使う（共通乱数）ので、
+    組み合わせ同士の差はルールの違いによるものだけになり、少ない試合数で優劣がつく。
+    何度も途中で区間を見るぶん、有意水準は見る回数の上限で割って（Bonferroni）保守的にしている。"""
+
+    def __init__(self, configs, target=DEFAULT_TARGET, precision=DEFAULT_PRECISION,
+                 batch=DEFAULT_BATCH, max_games=DEFAULT_MAX_GAMES, min_games=DEFAULT_MIN_GAMES,
+                 alpha=DEFAULT_ALPHA, seed=0, npc_names=None):
+        self.candidates = [Candidate(params) for params in configs]
+        self.target = target
+        self.precision = precision
+        self.batch = batch
+        self.max_games = max_games
+        self.min_games = min_games
+        self.seed = seed
+        self.npc_names = list(NPC_NAMES if npc_names is None else npc_names)
+        looks = max(1, math.ceil(max_games / batch))
+        self.z = NormalDist().inv_cdf(1 - alpha / (2 * looks))
+        self.games_played = 0
+
+    def games_needed(self):
+        """勝率がいちばん読みにくい 0.5 のときに、区間の半幅が precision に収まる試合数。
+        Wilson 区間の半幅は p=0.5 で z / (2√(n + z²)) になる。"""
+        z = self.z
+        return max(0, math.ceil((z / (2 * self.precision)) ** 2 - z * z))
+
+    def task(self, cand):
+        cand.pending = True
+        seed = chunk_seed(self.seed, cand.batches)
+        cand.batches += 1
+        n = min(self.batch, self.max_games - cand.result.games)
+        return (seed, n, self.npc_names, cand.rules, False)
+
+    def waiting(self):
+        """次のバッチを投入できる組み合わせ"""
+        return [c for c in self.candidates if c.status is None and not c.pending]
+
+    def record(self, cand, part):
+        """バッチの結果を足し込み、続けるかを決める"""
+        cand.pending = False
+        cand.result.merge(part)
+        self.games_played += part.games
+        n = cand.result.games
+        cand.interval = wilson_interval(cand.result.wins["人間"], n, self.z)
+        lo, hi = cand.interval
+        if (hi - lo) / 2 <= self.precision:
+            cand.status = "converged"
+        elif n >= self.max_games:
+            cand.status = "budget"
+        self.prune()
+
+    def prune(self):
+        """最良候補の距離の上限より、距離の下限が大きい組み合わせを打ち切る"""
+        ready = [c for c in self.candidates if c.result.games >= self.min_games]
+        if not ready:
+            return
+        best = min(c.distance(self.target)[1] for c in ready)
+        for c in ready:
+            if c.status is None and c.distance(self.target)[0] > best:
+                c.status = "pruned"
+
+    def run(self, workers=None):
+        """すべての組み合わせの評価が終わるまで回す"""
+        if workers == 1:
+            while True:
+                batch = self.waiting()
+                if not batch:
+                    break
+                for cand in batch:
+                    if cand.status is None:
+                        self.record(cand, run_chunk(self.task(cand)))
+            return self.ranked()
+
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while True:
+                for cand in self.waiting():
+                    if len(running) >= 2 * workers:
+                        break
+                    running[pool.submit(run_chunk, self.task(cand))] = cand
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cand = running.pop(future)
+                    if cand.status is None:
+                        self.record(cand, future.result())
+                    else:
+                        cand.pending = False
+        return self.ranked()
+
+    def ranked(self):
+        """目標に近い順（推定値の距離）"""
+        return sorted(self.candidates, key=lambda c: abs(c.human_rate() - self.target))
+
+
+# ---------------------------------------
+# コマンドライン
+# ---------------------------------------
+def format_params(params):
+    """既定値と違う定数だけを並べる"""
+    diff = {k: v for k, v in params.items() if getattr(DEFAULT_RULES, k) != v}
+    return ", ".join(f"{k}={v}" for k, v in diff.items()) or "（既定値）"
+
+def format_ranking(tuner, top, elapsed):
+    statuses = {}
+    for c in tuner.candidates:
+        statuses[c.status] = statuses.get(c.status, 0) + 1
+    lines = [
+        f"組み合わせ: {len(tuner.candidates)}  試合数: {tuner.games_played:,}"
+        f"  ({tuner.games_played / elapsed:,.0f} 試合/秒)",
+        "  " + "  ".join(f"{k}: {n}" for k, n in sorted(statuses.items(), key=lambda kv: str(kv[0]))),
+        f"人間陣営の勝率が {tuner.target} に近い順:",
+    ]
+    for c in tuner.ranked()[:top]:
+        lo, hi = c.interval
+        lines.append(
+            f"  {c.human_rate():.4f} [{lo:.4f}, {hi:.4f}]  {c.result.games:>6}試合  "
+            f"{c.status:<9}  {format_params(c.params)}"
+        )
+    return "\n".join(lines)
+
+def dump_results(tuner, path):
+    rows = []
+    for c in tuner.ranked():
+        rows.append({
+            "params": c.params,
+            "human_win_rate": c.human_rate(),
+            "interval": list(c.interval),
+            "games": c.result.games,
+            "mean_days": c.result.mean_days(),
+            "status": c.status,
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="バランス定数の探索")
+    parser.add_argument("--grid", action="store_true", help="全組み合わせを試す")
+    parser.add_argument("--samples", type=int, default=100, help="ランダムに試す組み合わせ数")
+    parser.add_argument("--space", help="探索範囲の JSON（省略時は SEARCH_SPACE）")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET, help="目標とする人間陣営の勝率")
+    parser.add_argument("--precision", type=float, default=DEFAULT_PRECISION, help="収束とみなす信頼区間の半幅")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="1回に追加する試合数")
+    parser.add_argument("--max-games", type=int, default=DEFAULT_MAX_GAMES, help="1組み合わせあたりの上限試合数")
+    parser.add_argument("--min-games", type=int, default=DEFAULT_MIN_GAMES, help="打ち切りを判断する最低試合数")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="有意水準")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="ワーカープロセス数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--npcs", type=int, default=len(NPC_NAMES), help="NPCの人数")
+    parser.add_argument("--top", type=int, default=10, help="表示する件数")
+    parser.add_argument("--out", help="全組み合わせの結果を書き出す JSON")
+    args = parser.parse_args(argv)
+
+    space = load_space(args.space) if args.space else SEARCH_SPACE
+    configs = grid_configs(space) if args.grid else random_configs(space, args.samples, args.seed)
+    tuner = Tuner(
+        configs, target=args.target, precision=args.precision, batch=args.batch,
+        max_games=args.max_games, min_games=args.min_games, alpha=args.alpha,
+        seed=args.seed, npc_names=make_roster(args.npcs),
+    )
+    if tuner.games_needed() > args.max_games:
+        parser.error(
+            f"--precision {args.precision} に収束するには最大 {tuner.games_needed():,} 試合が要ります"
+            f"（--max-games を増やすか --precision を広げてください）"
+        )
+
+    start = time.perf_counter()
+    tuner.run(workers=args.workers)
+    print(format_ranking(tuner, args.top, time.perf_counter() - start))
+    if args.out:
+        dump_results(tuner, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# vectorized.py
+# 複数ゲームを NumPy 配列でまとめて進めるバッチ版ルール
+# engine.py と同じ確率分布で動くが、乱数の消費順は異なるので1試合ごとの展開は一致しない
+# 重みや好感度の変化量は engine.Rules から読む（役職推理 belief_weight には対応しない）
+#
+# 配列の形（G = 試合数, P = 参加人数。席0がプレイヤー、席1以降が NPC_NAMES の順）
+#   likes[g, a, b] : 試合 g における a → b の好感度
+#   alive[g, a]    : 生存フラグ
+#   is_gn[g, a]    : グノーシアかどうか
+
+import numpy as np
+
+from engine import DEFAULT_RULES, NPC_NAMES
+
+HUMAN_WIN = 0
+GNOSIA_WIN = 1
+FACTIONS = ["人間", "グノーシア"]  # winner の値 → 陣営名
+
+DEFAULT_BATCH_SIZE = 4096  # 1回にまとめて進める試合数
+MAX_BATCH_CELLS = 1 << 24  # 1回にまとめる G×P×P の上限（好感度とその重みの一時配列がこの要素数になる）
+
+
+# ---------------------------------------
+# 重み付き抽選（行ごと）
+# ---------------------------------------
+def sample_rows(rng, weights):
+    """weights の各行から、重みに比例して列番号を1つずつ選ぶ。重み0の列は選ばれない。"""
+    cum = np.cumsum(weights, axis=-1)
+    total = cum[..., -1:]
+    u = rng.random(total.shape) * total
+    idx = (cum <= u).sum(axis=-1)
+    return np.minimum(idx, weights.shape[-1] - 1)
+
+def weight_for_suspicion(likes, slope=DEFAULT_RULES.like_slope):
+    # 好感度が低いほど重く
+    return np.maximum(0.1, 1.0 + np.maximum(0.0, -slope * likes))
+
+def weight_for_trust(likes, slope=DEFAULT_RULES.like_slope):
+    # 好感度が高いほど重く
+    return np.maximum(0.1, 1.0 + slope * likes)
+
+
+# ---------------------------------------
+# バッチ状態
+# ---------------------------------------
+class BatchGames:
+    """G 試合ぶんの状態をまとめて保持し、全試合を同じ歩調で1日ずつ進める。"""
+
+    def __init__(self, n_games, n_npcs=len(NPC_NAMES), seed=None, rules=None):
+        rules = DEFAULT_RULES if rules is None else rules
+        if rules.belief_weight:
+            raise ValueError("NumPy 版は役職推理（belief_weight）に対応していません")
+        self.rules = rules
+        self.rng = np.random.default_rng(seed)
+        self.n_games = n_games
+        self.n_players = n_npcs + 1
+        G, P = n_games, self.n_players
+        rng = self.rng
+
+        # グノーシア人数を rules.gn_counts から等確率で決め、ランダムな席に割り当てる
+        self.gn_count = rng.choice(np.array(rules.gn_counts), size=G)
+        rank = np.argsort(np.argsort(rng.random((G, P)), axis=1), axis=1)
+        self.is_gn = rank < self.gn_count[:, None]
+
+        deltas = (rules.like_delta_up, rules.like_delta_down)
+        like_dtype = np.int32 if all(isinstance(d, int) for d in deltas) else np.float64
+        self.likes = np.zeros((G, P, P), dtype=like_dtype)
+        self.alive = np.ones((G, P), dtype=bool)
+        self.day = np.ones(G, dtype=np.int32)
+        self.over = np.zeros(G, dtype=bool)
+        self.winner = np.full(G, -1, dtype=np.int8)
+
+        self._not_self = ~np.eye(P, dtype=bool)
+        # (疑う, 庇う) の重みから「疑う」を選ぶ確率（グノーシア / 人間）
+        gn_s, gn_d = rules.gn_talk_weights
+        hu_s, hu_d = rules.human_talk_weights
+        self._p_suspect_gn = gn_s / (gn_s + gn_d)
+        self._p_suspect_human = hu_s / (hu_s + hu_d)
+
+    # ---------------- discussion ----------------
+    def talk_turn(self, active):
+        """議論1ターン分。NPCは席順に発言するので席ごとにループし、試合方向はまとめて計算する。"""
+        rng = self.rng
+        rules = self.rules
+        G = self.n_games
+        active = active & (self.alive.sum(axis=1) > 2)
+        rows = np.arange(G)
+        for npc in range(1, self.n_players):
+            speaking = active & self.alive[:, npc]
+            if not speaking.any():
+                continue
+
+            p_suspect = np.where(self.is_gn[:, npc], self._p_suspect_gn, self._p_suspect_human)
+            suspect = rng.random(G) < p_suspect
+
+            like_row = self.likes[:, npc, :]
+            weights = np.where(
+                suspect[:, None],
+                weight_for_suspicion(like_row, rules.like_slope),
+                weight_for_trust(like_row, rules.like_slope),
+            )
+            weights *= self.alive & self._not_self[npc]
+            target = sample_rows(rng, weights)
+
+            delta = np.where(suspect, rules.like_delta_down, rules.like_delta_up)
+            g = rows[speaking]
+            self.likes[g, target[speaking], npc] += delta[speaking]
+
+    # ---------------- vote ----------------
+    def vote(self, active):
+        """全NPCの投票をまとめて抽選し、最多得票者（同数ならランダム）を追放する"""
+        rng = self.rng
+        G, P = self.n_games, self.n_players
+
+        base = weight_for_suspicion(self.likes, self.rules.like_slope)
+        base[:, :, 0] += self.rules.player_vote_bias  # プレイヤーは少し狙われやすい
+        candidate = self.alive[:, None, :] & self._not_self[None, :, :]
+        votes = sample_rows(rng, np.maximum(0.1, base) * candidate)
+
+        voting = self.alive.copy()
+        # プレイヤーは生死にかかわらず、自分以外の生存者にランダム投票する
+        voting[:, 0] = True
+        player_weights = self.alive & self._not_self[0]
+        votes[:, 0] = sample_rows(rng, player_weights.astype(np.float64))
+
+        counts = np.zeros((G, P), dtype=np.int32)
+        g_idx, voter = np.nonzero(voting)
+        np.add.at(counts, (g_idx, votes[g_idx, voter]), 1)
+
+        top = counts == counts.max(axis=1, keepdims=True)
+        tie_break = np.where(top, rng.random((G, P)), -1.0)
+        eliminated = tie_break.argmax(axis=1)
+
+        g = np.flatnonzero(active)
+        self.alive[g, eliminated[g]] = False
+        return self.check_win(active)
+
+    # ---------------- night ----------------
+    def night(self, active):
+        """生存グノーシアの好感度を重ね合わせて人間1人を『消す』"""
+        alive_gn = self.alive & self.is_gn
+        alive_human = self.alive & ~self.is_gn
+        per_gn = np.maximum(0.1, 1.0 - self.rules.like_slope * self.likes)
+        weights = np.einsum("ga,gab->gb", alive_gn.astype(np.float64), per_gn)
+        weights *= alive_human
+        target = sample_rows(self.rng, weights)
+
+        g = np.flatnonzero(active & alive_gn.any(axis=1) & alive_human.any(axis=1))
+        self.alive[g, target[g]] = False
+        return self.check_win(active)
+
+    # ---------------- 勝敗判定 ----------------
+    def check_win(self, active):
+        """active な試合の勝敗を判定し、まだ続く試合のマスクを返す"""
+        gn_alive = (self.alive & self.is_gn).sum(axis=1)
+        human_alive = (self.alive & ~self.is_gn).sum(axis=1)
+
+        human_win = active & (gn_alive == 0)
+        gnosia_win = active & ~human_win & (human_alive <= gn_alive)
+        self.winner[human_win] = HUMAN_WIN
+        self.winner[gnosia_win] = GNOSIA_WIN
+        self.over |= human_win | gnosia_win
+        return active & ~self.over
+
+    def play_day(self):
+        """まだ続いている試合をまとめて1日進める"""
+        active = ~self.over
+        for _ in range(self.rules.max_discussion_turns):
+            self.talk_turn(active)
+        active = self.vote(active)
+        active = self.night(active)
+        self.day[active] += 1
+
+    def run(self):
+        """全試合が決着するまで進める"""
+        while not self.over.all():
+            self.play_day()
+        return self
+
+
+# ---------------------------------------
+# 集計
+# ---------------------------------------
+def add_to_result(result, batch):
+    """BatchGames の結果を simulate.BatchResult に足し込む"""
+    result.games += batch.n_games
+    for winner, faction in enumerate(FACTIONS):
+        result.wins[faction] += int((batch.winner == winner).sum())
+    for gn_count in np.unique(batch.gn_count):
+        mask = batch.gn_count == gn_count
+        row = result.by_gn_count.setdefault(int(gn_count), {"games": 0, "人間": 0, "グノーシア": 0})
+        row["games"] += int(mask.sum())
+        for winner, faction in enumerate(FACTIONS):
+            row[faction] += int((batch.winner[mask] == winner).sum())
+    result.total_days += int(batch.day.sum())
+    return result
+
+def batch_games(n_npcs, batch_size=DEFAULT_BATCH_SIZE):
+    """1回にまとめる試合数。好感度は G×P×P の密な配列なので、大人数では G×P×P が MAX_BATCH_CELLS に収まるまで減らす"""
+    n_players = n_npcs + 1
+    return max(1, min(batch_size, MAX_BATCH_CELLS // (n_players * n_players)))
+
+def run_vectorized(n_games, seed=0, n_npcs=len(NPC_NAMES), batch_size=DEFAULT_BATCH_SIZE, rules=None):
+    """n_games 試合を batch_size ずつまとめて実行し、simulate.BatchResult で返す（大人数では batch_games で減らす）"""
+    from simulate import BatchResult
+
+    batch_size = batch_games(n_npcs, batch_size)
+    seeds = np.random.SeedSequence(seed).spawn((n_games + batch_size - 1) // batch_size)
+    result = BatchResult()
+    for i, child in enumerate(seeds):
+        size = min(batch_size, n_games - i * batch_size)
+        add_to_result(result, BatchGames(size, n_npcs=n_npcs, seed=child, rules=rules).run())
+    return result